@@ -0,0 +1,83 @@
+# bench_login.py
+"""Login password checks under concurrency: legacy SHA-256, bcrypt on the loop, bcrypt on the pool.
+
+Runs a fixed number of password checks from concurrent clients on one
+event loop while a probe task measures how late its timer wakeups are.
+That lag is what every other request on the same worker waits. Run from
+the backend directory:
+
+    python -m benchmarks.bench_login --logins 200 --concurrency 16 --rounds 12
+"""
+import argparse
+import asyncio
+import time
+from typing import Callable, List
+from src.passwords import PasswordHasher, check_password, hash_password, legacy_hash
+
+PASSWORD = "correct horse battery staple"
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+async def probe_lag(lags: List[float], stop: asyncio.Event, interval: float = 0.005):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+
+async def run(check: Callable, logins: int, concurrency: int):
+    """(logins/s, latencies, lags) for ``logins`` checks spread over ``concurrency`` clients."""
+    latencies: List[float] = []
+    lags: List[float] = []
+    stop = asyncio.Event()
+    remaining = iter(range(logins))
+
+    async def client():
+        for _ in remaining:
+            started = time.perf_counter()
+            assert await check()
+            latencies.append(time.perf_counter() - started)
+
+    probe = asyncio.create_task(probe_lag(lags, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+    return logins / elapsed, sorted(latencies), sorted(lags or [0.0])
+
+async def main_async(args):
+    legacy = legacy_hash(PASSWORD)
+    stored = hash_password(PASSWORD, args.rounds)
+    hasher = PasswordHasher(rounds=args.rounds, workers=args.workers)
+
+    async def sha256_inline():
+        return check_password(PASSWORD, legacy)
+
+    async def bcrypt_inline():
+        return check_password(PASSWORD, stored)
+
+    async def bcrypt_pool():
+        matches, _ = await hasher.verify(PASSWORD, stored)
+        return matches
+
+    print(f"bcrypt rounds {args.rounds}, {args.workers} hash workers, {args.concurrency} concurrent clients")
+    print(f"{'scheme':>14} {'logins/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'loop lag p99 ms':>16} {'max lag ms':>11}")
+    for label, check in (("sha256 inline", sha256_inline), ("bcrypt inline", bcrypt_inline),
+                         ("bcrypt pool", bcrypt_pool)):
+        rate, latencies, lags = await run(check, args.logins, args.concurrency)
+        print(f"{label:>14} {rate:>9.1f} {percentile(latencies, 50) * 1000:>8.1f} "
+              f"{percentile(latencies, 99) * 1000:>8.1f} {percentile(lags, 99) * 1000:>16.1f} {lags[-1] * 1000:>11.1f}")
+    hasher.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument("--workers", type=int, default=4, help="Password hashing threads")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
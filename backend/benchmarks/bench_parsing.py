@@ -0,0 +1,95 @@
+# bench_parsing.py
+"""Compare the lxml/XPath page parsers with the BeautifulSoup ones.
+
+Checks that both give identical output on every saved fixture page, then
+reports parse time and peak traced memory per page. tracemalloc only sees
+Python allocations; lxml trees live in libxml2 buffers it doesn't trace,
+so the lxml memory figures leave out the tree itself. Run from the backend
+directory:
+
+    python -m benchmarks.bench_parsing --fixtures /tmp/fixtures
+
+Fixture pages are written with scrappers/fixture_server.py --save when the
+directory doesn't hold any yet.
+"""
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+SCRAPPERS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scrappers")
+sys.path.insert(0, SCRAPPERS_DIR)
+import extract
+import extract_lxml
+from fixture_server import save_fixtures
+
+IMPLEMENTATIONS = (("bs4", extract), ("lxml", extract_lxml))
+PARSERS = {"list": "parse_list_page", "detail": "parse_detail_page"}
+
+def load_pages(directory: str, kind: str):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, f"{kind}-*.html"))):
+        with open(path, encoding="utf-8") as f:
+            pages.append((os.path.basename(path), f.read()))
+    return pages
+
+def check_parity(kind: str, pages) -> None:
+    """Raise AssertionError if the two parsers disagree on any page."""
+    name = PARSERS[kind]
+    for filename, html in pages:
+        expected = getattr(extract, name)(html)
+        actual = getattr(extract_lxml, name)(html)
+        assert actual == expected, f"Parser mismatch on {filename}:\n{actual}\n!=\n{expected}"
+
+def time_per_page(parse, pages, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for _, html in pages:
+            parse(html)
+    return (time.perf_counter() - started) / (repeat * len(pages))
+
+def peak_memory_per_page(parse, pages) -> float:
+    """Mean peak of traced allocations while parsing one page, in bytes."""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _, html in pages:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            parse(html)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    return sum(peaks) / len(peaks)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", help="Directory of saved list-*.html and detail-*.html pages")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed passes over the fixture pages")
+    args = parser.parse_args()
+
+    directory = args.fixtures or tempfile.mkdtemp(prefix="scholarship-fixtures-")
+    if not glob.glob(os.path.join(directory, "*.html")):
+        save_fixtures(directory)
+
+    print(f"{'page':>6} {'pages':>6} {'impl':>5} {'ms/page':>8} {'peak KiB/page':>14} {'speedup':>8}")
+    for kind in PARSERS:
+        pages = load_pages(directory, kind)
+        if not pages:
+            continue
+        check_parity(kind, pages)
+        baseline = None
+        for label, module in IMPLEMENTATIONS:
+            parse = getattr(module, PARSERS[kind])
+            parse(pages[0][1])  # warm up
+            per_page = time_per_page(parse, pages, args.repeat)
+            peak = peak_memory_per_page(parse, pages)
+            baseline = baseline or per_page
+            print(f"{kind:>6} {len(pages):>6} {label:>5} {per_page * 1000:>8.3f} "
+                  f"{peak / 1024:>14.1f} {baseline / per_page:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# bench_responses.py
+"""Compare validated responses with the FAST_JSON_RESPONSES orjson path.
+
+Serves GET /scholarships from a synthetic in-memory catalog through the
+ASGI app, checks that both paths return the same body, then reports
+p50/p99 latency and CPU time per request for each page size. Run from
+the backend directory:
+
+    python -m benchmarks.bench_responses --sizes 100 500 1000
+"""
+import argparse
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+import httpx
+from src import server
+from benchmarks.synthetic import make_catalog
+
+class CatalogDAL:
+    """Serves scholarships from a list, handing out fresh dicts the way Motor does."""
+    def __init__(self, catalog: List[Dict[str, Any]]):
+        self.catalog = catalog
+
+    async def fetch_all_scholarships(self, skip: int = 0, limit: int = 100,
+                                     projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        docs = self.catalog[skip:skip + limit]
+        if projection is not None:
+            return [{k: v for k, v in doc.items() if k in projection or k == "_id"} for doc in docs]
+        return [dict(doc) for doc in docs]
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+async def fetch(client: httpx.AsyncClient, url: str, fast: bool) -> bytes:
+    server.FAST_JSON_RESPONSES = fast
+    response = await client.get(url)
+    response.raise_for_status()
+    return response.content
+
+async def measure(client: httpx.AsyncClient, url: str, fast: bool, requests: int):
+    """(p50 ms, p99 ms, CPU ms per request)."""
+    await fetch(client, url, fast)  # warm up
+    latencies = []
+    cpu_started = time.process_time()
+    for _ in range(requests):
+        started = time.perf_counter()
+        await fetch(client, url, fast)
+        latencies.append(time.perf_counter() - started)
+    cpu = (time.process_time() - cpu_started) / requests
+    latencies.sort()
+    return percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000, cpu * 1000
+
+async def run(sizes: List[int], requests: int, fields: Optional[str]):
+    dal = CatalogDAL(make_catalog(max(sizes)))
+    server.app.dependency_overrides[server.get_dal] = lambda: dal
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'items':>6} {'path':>9} {'p50 ms':>8} {'p99 ms':>8} {'CPU ms/req':>11} {'KiB':>7} {'speedup':>8}")
+        for size in sizes:
+            url = f"/scholarships?limit={size}" + (f"&fields={fields}" if fields else "")
+            validated = await fetch(client, url, fast=False)
+            assert await fetch(client, url, fast=True) == validated, f"Response bodies differ for {url}"
+            baseline = None
+            for label, fast in (("validated", False), ("orjson", True)):
+                p50, p99, cpu = await measure(client, url, fast, requests)
+                baseline = baseline or cpu
+                print(f"{size:>6} {label:>9} {p50:>8.2f} {p99:>8.2f} {cpu:>11.2f} "
+                      f"{len(validated) / 1024:>7.0f} {baseline / cpu:>7.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 1000])
+    parser.add_argument("--requests", type=int, default=200, help="Timed requests per size and path")
+    parser.add_argument("--fields", help="fields= value to benchmark the summary view instead")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(run(args.sizes, args.requests, args.fields))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# bench_scoring.py
+"""Compare the NumPy ScoringEngine with the per-document reference scorer.
+
+Checks that both produce identical rankings, including on documents without
+a stored sentiment score, then times them across catalog sizes. Run from
+the backend directory:
+
+    python -m benchmarks.bench_scoring --sizes 1000 10000 100000
+"""
+import argparse
+import time
+from src.recommendation import recommend_linear, TOP_K
+from src.scoring_engine import ScoringEngine
+from benchmarks.synthetic import make_catalog, make_users, without_stored_sentiment
+
+def check_parity(engine: ScoringEngine, catalog, users) -> None:
+    """Raise AssertionError if any user's ranking differs from the reference."""
+    for user in users:
+        expected = [(s["_id"], score) for s, score in recommend_linear(user, catalog, TOP_K)]
+        actual = [(catalog[pos]["_id"], score) for pos, score in engine.top_k(user, TOP_K)]
+        assert actual == expected, f"Ranking mismatch for {user}:\n{actual}\n!=\n{expected}"
+
+def time_per_user(fn, users) -> float:
+    started = time.perf_counter()
+    for user in users:
+        fn(user)
+    return (time.perf_counter() - started) / len(users)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--users", type=int, default=50, help="Users timed per catalog size")
+    parser.add_argument("--parity-users", type=int, default=200)
+    parser.add_argument("--reference-budget", type=float, default=20.0,
+                        help="Seconds of reference scoring allowed per size")
+    args = parser.parse_args()
+
+    print(f"{'catalog':>8} {'build ms':>9} {'reference ms/user':>18} {'engine ms/user':>15} {'speedup':>8}")
+    for size in args.sizes:
+        catalog = make_catalog(size)
+        users = make_users(args.users)
+
+        started = time.perf_counter()
+        engine = ScoringEngine(catalog)
+        build = time.perf_counter() - started
+
+        parity_users = make_users(args.parity_users, seed=2)[:max(5, args.parity_users * 1000 // size)]
+        check_parity(engine, catalog, parity_users)
+        # Documents not backfilled yet take the engine's analyse-the-text fallback
+        unscored = without_stored_sentiment(catalog[:min(size, 2000)])
+        check_parity(ScoringEngine(unscored), unscored, parity_users[:20])
+
+        engine_time = time_per_user(lambda user: engine.top_k(user, TOP_K), users)
+        # Keep the reference run bounded on large catalogs
+        probe = time_per_user(lambda user: recommend_linear(user, catalog, TOP_K), users[:2])
+        reference_users = users[:max(2, min(len(users), int(args.reference_budget / max(probe, 1e-9))))]
+        reference_time = time_per_user(lambda user: recommend_linear(user, catalog, TOP_K), reference_users)
+
+        print(f"{size:>8} {build * 1000:>9.1f} {reference_time * 1000:>18.3f} "
+              f"{engine_time * 1000:>15.3f} {reference_time / engine_time:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+# loadtest.py
+"""Load-test the API with a weighted mix of routes and report per-route latency.
+
+Concurrent virtual users each loop for --duration seconds, picking a route
+from the --mix weights and waiting for the response before the next one
+(a closed loop, so throughput is what the server sustains at that
+concurrency). Three targets:
+
+    # In-process: the app on this event loop through an ASGI transport
+    python -m benchmarks.loadtest --concurrency 32 --duration 30
+
+    # A local uvicorn worker in a subprocess, driven over HTTP
+    python -m benchmarks.loadtest --uvicorn --concurrency 32 --duration 30
+
+    # Any running server
+    python -m benchmarks.loadtest --url http://localhost:8000 --catalog 0
+
+In-process and --uvicorn runs use STORAGE_BACKEND=memory with a synthetic
+catalog of --catalog scholarships, so the figures are the capacity of one
+worker without database round trips. In-process, the event-loop lag is the
+server's own; in the other modes it is the load generator's, and a high
+value there means the client, not the server, is the bottleneck.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Tuple
+import httpx
+from src.dal import AcademicMajor
+from benchmarks.synthetic import PASSWORD, SEARCH_QUERIES, make_catalog, make_registration
+
+DEFAULT_MIX = "get_user=30,list=30,search=20,put_user=8,login=8,register=4"
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+@dataclass
+class RouteStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: Dict[int, int] = field(default_factory=dict)
+
+class Workload:
+    """The users and request bodies the virtual users share."""
+
+    def __init__(self, client: httpx.AsyncClient, seed: int = 0):
+        self.client = client
+        self.rng = random.Random(seed)
+        # (user id, email) of every registered user
+        self.users: List[Tuple[str, str]] = []
+        self.registered = 0
+        self.majors = [member.value for member in AcademicMajor]
+
+    async def register(self) -> httpx.Response:
+        self.registered += 1
+        # Keep emails unique across runs against the same --url server
+        registration = make_registration(self.registered, self.rng)
+        registration["email"] = f"load{os.getpid()}-{self.registered}@example.com"
+        response = await self.client.post("/register", json=registration)
+        if response.status_code == 200:
+            self.users.append((response.json()["_id"], registration["email"]))
+        return response
+
+    async def login(self) -> httpx.Response:
+        _, email = self.rng.choice(self.users)
+        return await self.client.post("/login", json={"email": email, "password": PASSWORD})
+
+    async def get_user(self) -> httpx.Response:
+        user_id, _ = self.rng.choice(self.users)
+        return await self.client.get(f"/users/{user_id}")
+
+    async def put_user(self) -> httpx.Response:
+        user_id, _ = self.rng.choice(self.users)
+        return await self.client.put(f"/users/{user_id}", json={
+            "interests": self.rng.sample(SEARCH_QUERIES, self.rng.randint(1, 3)),
+            "grade_point_average": round(self.rng.uniform(2.0, 4.0), 1),
+        })
+
+    async def list_scholarships(self) -> httpx.Response:
+        return await self.client.get("/scholarships", params={
+            "skip": self.rng.randrange(0, 200), "limit": 20, "fields": "summary"})
+
+    async def search_scholarships(self) -> httpx.Response:
+        if self.rng.random() < 0.5:
+            params: Dict[str, Any] = {"q": self.rng.choice(SEARCH_QUERIES)}
+        else:
+            params = {"academic_majors": self.rng.choice(self.majors),
+                      "grade_point_average": round(self.rng.uniform(2.0, 4.0), 1)}
+        return await self.client.get("/scholarships/search", params={**params, "limit": 20, "fields": "summary"})
+
+ROUTES = {
+    "register": ("POST /register", Workload.register),
+    "login": ("POST /login", Workload.login),
+    "get_user": ("GET /users/{id}", Workload.get_user),
+    "put_user": ("PUT /users/{id}", Workload.put_user),
+    "list": ("GET /scholarships", Workload.list_scholarships),
+    "search": ("GET /scholarships/search", Workload.search_scholarships),
+}
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """'get_user=30,list=30' -> {"get_user": 30.0, "list": 30.0}."""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ROUTES:
+            raise argparse.ArgumentTypeError(f"Unknown route {name!r}, expected one of {', '.join(ROUTES)}")
+        try:
+            weights[name] = float(weight or 1)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Invalid weight {weight!r} for {name}")
+    if not any(weight > 0 for weight in weights.values()):
+        raise argparse.ArgumentTypeError("The mix needs at least one positive weight")
+    return weights
+
+async def probe_lag(lags: List[Tuple[float, float]], stop: asyncio.Event, interval: float = 0.01):
+    """Append (time, lag) for each timer wakeup, lag being how late it fired."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        now = time.perf_counter()
+        lags.append((now, now - started - interval))
+
+async def virtual_user(workload: Workload, routes: List[str], weights: List[float], stats: Dict[str, RouteStats],
+                       warmup_until: float, deadline: float):
+    rng = random.Random(workload.rng.random())
+    while time.perf_counter() < deadline:
+        name = rng.choices(routes, weights)[0]
+        started = time.perf_counter()
+        try:
+            response = await ROUTES[name][1](workload)
+            status = response.status_code
+        except httpx.HTTPError:
+            status = 0
+        finished = time.perf_counter()
+        if started < warmup_until:
+            continue
+        route = stats.setdefault(name, RouteStats())
+        route.latencies.append(finished - started)
+        route.statuses[status] = route.statuses.get(status, 0) + 1
+        if not 200 <= status < 300:
+            route.errors += 1
+
+async def run_load(client: httpx.AsyncClient, args) -> Dict[str, Any]:
+    workload = Workload(client, seed=args.seed)
+    print(f"Registering {args.users} users...", flush=True)
+    for _ in range(args.users):
+        (await workload.register()).raise_for_status()
+
+    routes = list(args.mix)
+    weights = [args.mix[name] for name in routes]
+    stats: Dict[str, RouteStats] = {}
+    lags: List[Tuple[float, float]] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_lag(lags, stop))
+    started = time.perf_counter()
+    warmup_until = started + args.warmup
+    deadline = warmup_until + args.duration
+    print(f"Running {args.concurrency} virtual users for {args.warmup:g}s warm-up + {args.duration:g}s...", flush=True)
+    await asyncio.gather(*(virtual_user(workload, routes, weights, stats, warmup_until, deadline)
+                           for _ in range(args.concurrency)))
+    # Requests still in flight at the deadline finish late; measure over the real span
+    elapsed = time.perf_counter() - warmup_until
+    stop.set()
+    await probe
+    measured_lags = sorted([lag for at, lag in lags if at >= warmup_until] or [0.0])
+    return summarize(stats, elapsed, measured_lags)
+
+def summarize(stats: Dict[str, RouteStats], elapsed: float, lags: List[float]) -> Dict[str, Any]:
+    def row(latencies: List[float], errors: int) -> Dict[str, Any]:
+        latencies = sorted(latencies)
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "rps": len(latencies) / elapsed,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "max_ms": latencies[-1] * 1000,
+        }
+    routes = {ROUTES[name][0]: {**row(route.latencies, route.errors), "statuses": route.statuses}
+              for name, route in stats.items() if route.latencies}
+    every = [latency for route in stats.values() for latency in route.latencies]
+    return {
+        "elapsed_s": elapsed,
+        "routes": routes,
+        "total": row(every, sum(route.errors for route in stats.values())) if every else None,
+        "loop_lag": {"p50_ms": percentile(lags, 50) * 1000, "p99_ms": percentile(lags, 99) * 1000,
+                     "max_ms": lags[-1] * 1000},
+    }
+
+def print_report(report: Dict[str, Any], lag_label: str):
+    print(f"\n{'route':<26} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'max ms':>8}")
+    rows = sorted(report["routes"].items())
+    if report["total"]:
+        rows.append(("total", report["total"]))
+    for name, row in rows:
+        print(f"{name:<26} {row['requests']:>9} {row['errors']:>7} {row['rps']:>8.1f} {row['p50_ms']:>8.1f} "
+              f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}")
+    lag = report["loop_lag"]
+    print(f"\n{lag_label} event-loop lag: p50 {lag['p50_ms']:.1f} ms, p99 {lag['p99_ms']:.1f} ms, "
+          f"max {lag['max_ms']:.1f} ms")
+    for name, row in report["routes"].items():
+        failures = {status: count for status, count in row["statuses"].items() if not 200 <= status < 300}
+        if failures:
+            print(f"{name}: failed responses by status (0 = connection error) {failures}")
+
+def seed_lifespan(catalog_size: int):
+    """The server's lifespan on in-memory storage, with a synthetic catalog loaded at startup."""
+    from src import server
+    server.STORAGE_BACKEND = "memory"
+
+    @asynccontextmanager
+    async def lifespan(app) -> AsyncIterator[None]:
+        async with server.lifespan(app):
+            if catalog_size:
+                await server.client[server.DATABASE_NAME]["scholarships"].insert_many(make_catalog(catalog_size))
+            yield
+    return lifespan
+
+async def run_in_process(args) -> Dict[str, Any]:
+    from src import server
+    lifespan = seed_lifespan(args.catalog)
+    async with lifespan(server.app):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+            return await run_load(client, args)
+
+async def run_over_http(args, url: str) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+        return await run_load(client, args)
+
+async def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 300.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with status {process.returncode}")
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.25)
+    raise TimeoutError(f"Server at {url} not up after {timeout:.0f}s")
+
+async def run_uvicorn(args) -> Dict[str, Any]:
+    url = f"http://127.0.0.1:{args.port}"
+    process = subprocess.Popen([sys.executable, "-m", "benchmarks.loadtest", "serve",
+                                "--catalog", str(args.catalog), "--port", str(args.port)])
+    try:
+        print(f"Starting uvicorn on {url} with {args.catalog} scholarships...", flush=True)
+        await wait_until_up(url, process)
+        return await run_over_http(args, url)
+    finally:
+        process.terminate()
+        process.wait()
+
+def serve(args):
+    """One uvicorn worker on in-memory storage; what --uvicorn starts."""
+    import uvicorn
+    from src import server
+    server.app.router.lifespan_context = seed_lifespan(args.catalog)
+    uvicorn.run(server.app, host="127.0.0.1", port=args.port, log_level="warning", access_log=False)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", nargs="?", choices=["run", "serve"], default="run",
+                        help="serve only starts the worker --uvicorn drives")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="Base URL of a running server instead of the in-process app")
+    target.add_argument("--uvicorn", action="store_true", help="Start a local uvicorn worker and drive it over HTTP")
+    parser.add_argument("--port", type=int, default=8765, help="Port for --uvicorn")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help=f"Route weights, from {', '.join(ROUTES)} (default {DEFAULT_MIX})")
+    parser.add_argument("--concurrency", type=int, default=16, help="Virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds of load before measuring")
+    parser.add_argument("--catalog", type=int, default=5000, help="Synthetic scholarships to load")
+    parser.add_argument("--users", type=int, default=50, help="Users registered before the run")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Request timeout over HTTP")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    if args.command == "serve":
+        serve(args)
+        return
+    if args.url:
+        report = asyncio.run(run_over_http(args, args.url.rstrip("/")))
+    elif args.uvicorn:
+        report = asyncio.run(run_uvicorn(args))
+    else:
+        report = asyncio.run(run_in_process(args))
+    print_report(report, "Server" if not (args.url or args.uvicorn) else "Load generator")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": {key: value for key, value in vars(args).items() if key != "command"},
+                       **report}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
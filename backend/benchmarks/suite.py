@@ -0,0 +1,270 @@
+# suite.py
+"""Benchmark suite: scorers, full recommendation runs and endpoint handlers.
+
+``run`` times every benchmark on synthetic data and writes the results to
+JSON; ``compare`` reads two result files and flags the benchmarks that got
+slower by more than a threshold, exiting 1 if any did, so it can gate CI.
+Recommendation runs and endpoints use the in-memory storage backend, so no
+database is needed. Run from the backend directory:
+
+    python -m benchmarks.suite run --sizes 1000 10000 100000 --output before.json
+    python -m benchmarks.suite run --sizes 1000 10000 100000 --output after.json
+    python -m benchmarks.suite compare before.json after.json --threshold 0.15
+
+Each result is the median time per call over several rounds, which is far
+steadier between runs than the mean; the minimum and the rounds are kept
+alongside it. Only compare results taken on the same machine.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import httpx
+from src import recommendation, server
+from src.dal import ScholarshipDAL
+from src.recommendation import (
+    TOP_K, calculate_grant_score, calculate_interest_score, calculate_sentiment_score, check_eligibility,
+    compute_recommendations, generate_recommendations_streaming, get_scoring_engine, invalidate_catalog_cache,
+    recommend_linear,
+)
+from src.storage import MemoryClient
+from benchmarks.synthetic import PASSWORD, SEARCH_QUERIES, make_catalog, make_registrations, make_users
+
+Results = Dict[str, Dict[str, Any]]
+
+def summarize(per_call: List[float]) -> Dict[str, Any]:
+    """Milliseconds per call: the median and minimum over rounds, and every round."""
+    return {
+        "median_ms": statistics.median(per_call) * 1000,
+        "min_ms": min(per_call) * 1000,
+        "rounds_ms": [round(seconds * 1000, 6) for seconds in per_call],
+    }
+
+def measure(fn: Callable[[int], Any], calls: int, rounds: int) -> Dict[str, Any]:
+    """Time ``calls`` calls of fn(i) per round; fn gets the call index to pick its input."""
+    fn(0)  # warm up
+    per_call = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for i in range(calls):
+            fn(i)
+        per_call.append((time.perf_counter() - started) / calls)
+    return summarize(per_call)
+
+async def measure_async(fn: Callable[[int], Awaitable[Any]], calls: int, rounds: int) -> Dict[str, Any]:
+    await fn(0)
+    per_call = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for i in range(calls):
+            await fn(i)
+        per_call.append((time.perf_counter() - started) / calls)
+    return summarize(per_call)
+
+def report(results: Results, name: str, result: Dict[str, Any]):
+    results[name] = result
+    print(f"{name:<52} {result['median_ms']:>12.4f} {result['min_ms']:>12.4f}", flush=True)
+
+def bench_scorers(results: Results, catalog: List[Dict[str, Any]], users: List[Dict[str, Any]], rounds: int):
+    """Per-call cost of each reference scorer over (user, scholarship) pairs."""
+    pairs = [(users[i % len(users)], catalog[i % len(catalog)]) for i in range(len(catalog))]
+    calls = len(pairs)
+    report(results, "score.check_eligibility", measure(lambda i: check_eligibility(*pairs[i]), calls, rounds))
+    report(results, "score.calculate_grant_score", measure(lambda i: calculate_grant_score(pairs[i][1]), calls, rounds))
+    report(results, "score.calculate_interest_score",
+           measure(lambda i: calculate_interest_score(*pairs[i]), calls, rounds))
+    report(results, "score.calculate_sentiment_score",
+           measure(lambda i: calculate_sentiment_score(pairs[i][1]), calls, rounds))
+    report(results, f"score.recommend_linear[{len(catalog)}]",
+           measure(lambda i: recommend_linear(users[i % len(users)], catalog, TOP_K), len(users), rounds))
+
+async def load_dal(catalog: List[Dict[str, Any]]) -> ScholarshipDAL:
+    db = MemoryClient()["benchmark"]
+    dal = ScholarshipDAL(user_collection=db["users"], scholarship_collection=db["scholarships"],
+                         meta_collection=db["meta"])
+    await dal.create_indexes()
+    await db["scholarships"].insert_many(catalog)
+    return dal
+
+async def bench_recommendations(results: Results, size: int, users: List[Dict[str, Any]], rounds: int,
+                                budget: float):
+    """Full recommendation runs against a catalog of ``size`` held in memory storage."""
+    dal = await load_dal(make_catalog(size))
+
+    async def build(_):
+        invalidate_catalog_cache()
+        await get_scoring_engine(dal)
+
+    async def engine(i):
+        # Drop cached results so every call ranks, but keep the engine
+        recommendation.recommendation_cache.clear()
+        await compute_recommendations(users[i % len(users)], dal)
+
+    async def stream(i):
+        await generate_recommendations_streaming(users[i % len(users)], dal)
+
+    build_rounds = max(1, min(rounds, int(budget / 3)))
+    report(results, f"recommend.engine_build[{size}]", await measure_async(build, 1, build_rounds))
+    report(results, f"recommend.engine[{size}]", await measure_async(engine, len(users), rounds))
+    started = time.perf_counter()
+    await stream(0)
+    stream_calls = max(1, min(len(users), int(budget / rounds / max(time.perf_counter() - started, 1e-9))))
+    report(results, f"recommend.stream[{size}]", await measure_async(stream, stream_calls, rounds))
+    invalidate_catalog_cache()
+
+async def bench_endpoints(results: Results, size: int, calls: int, rounds: int):
+    """Requests through the ASGI app, middleware included, with STORAGE_BACKEND=memory."""
+    server.STORAGE_BACKEND = "memory"
+    async with server.lifespan(server.app):
+        db = server.client[server.DATABASE_NAME]
+        await db["scholarships"].insert_many(make_catalog(size))
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            # Registering is timed as it happens, since each call needs a new email
+            registrations = make_registrations(calls)
+            user_ids = []
+
+            async def register(i):
+                response = await client.post("/register", json=registrations[i])
+                response.raise_for_status()
+                user_ids.append(response.json()["_id"])
+
+            started = time.perf_counter()
+            for i in range(calls):
+                await register(i)
+            report(results, "endpoint.POST /register", summarize([(time.perf_counter() - started) / calls]))
+
+            rng = random.Random(3)
+            second_page = (await client.get("/scholarships", params={"limit": 50, "cursor": ""})).json()["next_cursor"]
+            sat_scores = [rng.randint(400, 1600) for _ in range(calls)]
+
+            async def get(url: str, **params: Any):
+                response = await client.get(url, params=params)
+                response.raise_for_status()
+
+            async def login(i):
+                registration = registrations[i % len(registrations)]
+                response = await client.post("/login", json={"email": registration["email"], "password": PASSWORD})
+                response.raise_for_status()
+
+            async def update(i):
+                response = await client.put(f"/users/{user_ids[i % len(user_ids)]}",
+                                            json={"interests": rng.sample(SEARCH_QUERIES, 2)})
+                response.raise_for_status()
+
+            endpoints = [
+                ("GET /scholarships?limit=100", lambda i: get("/scholarships", skip=i % 50, limit=100)),
+                ("GET /scholarships?limit=100&fields=summary",
+                 lambda i: get("/scholarships", skip=i % 50, limit=100, fields="summary")),
+                ("GET /scholarships?cursor", lambda i: get("/scholarships", limit=50, cursor=second_page)),
+                ("GET /scholarships/search?q", lambda i: get("/scholarships/search",
+                                                             q=SEARCH_QUERIES[i % len(SEARCH_QUERIES)], limit=20)),
+                ("GET /scholarships/search?sat_score", lambda i: get("/scholarships/search",
+                                                                     sat_score=sat_scores[i], limit=20)),
+                ("GET /users/{id}", lambda i: get(f"/users/{user_ids[i % len(user_ids)]}")),
+                ("PUT /users/{id}", update),
+            ]
+            for name, fn in endpoints:
+                report(results, f"endpoint.{name}", await measure_async(fn, calls, rounds))
+            # bcrypt makes logins 100x slower than the rest; fewer calls keep the suite short
+            report(results, "endpoint.POST /login", await measure_async(login, max(1, calls // 10), rounds))
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def run(args) -> Dict[str, Any]:
+    results: Results = {}
+    users = make_users(args.users)
+    print(f"{'benchmark':<52} {'median ms':>12} {'min ms':>12}")
+    bench_scorers(results, make_catalog(1000), users, args.rounds)
+    for size in args.sizes:
+        await bench_recommendations(results, size, users, args.rounds, args.budget)
+    if args.endpoint_size:
+        await bench_endpoints(results, args.endpoint_size, args.requests, args.rounds)
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("command", "func")},
+        },
+        "results": results,
+    }
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """Print a comparison table and return the names of benchmarks that regressed."""
+    regressions = []
+    before, after = baseline["results"], current["results"]
+    print(f"{'benchmark':<52} {'before ms':>12} {'after ms':>12} {'change':>8}")
+    for name in sorted(set(before) | set(after)):
+        if name not in before or name not in after:
+            print(f"{name:<52} {'only in ' + ('before' if name in before else 'after'):>34}")
+            continue
+        old, new = before[name]["median_ms"], after[name]["median_ms"]
+        change = new / old - 1 if old else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{name:<52} {old:>12.4f} {new:>12.4f} {change:>+7.1%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="Run the benchmarks and write their results")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                            help="Catalog sizes for full recommendation runs")
+    run_parser.add_argument("--users", type=int, default=20, help="Users ranked per round")
+    run_parser.add_argument("--rounds", type=int, default=5)
+    run_parser.add_argument("--budget", type=float, default=10.0,
+                            help="Seconds allowed for the slow runs (engine builds, streaming) per size")
+    run_parser.add_argument("--endpoint-size", type=int, default=10000,
+                            help="Catalog size behind the endpoint benchmarks, 0 to skip them")
+    run_parser.add_argument("--requests", type=int, default=50, help="Requests per endpoint per round")
+    run_parser.add_argument("--output", help="Write the results to this JSON file")
+    compare_parser = commands.add_parser("compare", help="Flag regressions between two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="Slowdown of the median that counts as a regression (0.10 = 10%%)")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    if args.command == "run":
+        document = asyncio.run(run(args))
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(document, f, indent=2)
+            print(f"Wrote {len(document['results'])} results to {args.output}")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print(f"No regressions over {args.threshold:.0%}")
+
+if __name__ == "__main__":
+    main()
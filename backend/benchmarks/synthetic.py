@@ -0,0 +1,110 @@
+# synthetic.py
+"""Synthetic scholarship catalogs and user profiles for benchmarks."""
+from typing import List, Dict, Any
+from datetime import datetime, timedelta
+import random
+from src.dal import AcademicMajor, AgeRange, Gender, FinancialNeed, GradePointAverageRange, SATScoreRange
+from src.parsing import parsed_fields
+
+WORDS = (
+    "students scholarship award leadership community service research science engineering "
+    "technology mathematics medicine nursing art design music writing essay volunteer women "
+    "minority first-generation stem business finance computer data robotics environment health "
+    "history education teaching future career excellence merit need-based outstanding passionate"
+).split()
+
+ENUM_FIELDS = [
+    ('academic_major', AcademicMajor),
+    ('age', AgeRange),
+    ('gender', Gender),
+    ('financial_need', FinancialNeed),
+    ('grade_point_average', GradePointAverageRange),
+    ('sat_score', SATScoreRange),
+]
+
+def _sentence(rng: random.Random, length: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(length)).capitalize() + '.'
+
+def _amount(rng: random.Random) -> str:
+    kind = rng.random()
+    if kind < 0.1:
+        return "Varies"
+    low = rng.choice([500, 1000, 1500, 2000, 2500, 5000, 10000])
+    if kind < 0.3:
+        return f"${low:,} - ${low * rng.choice([2, 3, 5]):,}"
+    return f"${low:,}"
+
+def make_scholarship(i: int, rng: random.Random, now: datetime) -> Dict[str, Any]:
+    scholarship = {
+        "_id": f"{i:024x}",
+        "title": f"{rng.choice(WORDS).capitalize()} {rng.choice(WORDS).capitalize()} Scholarship {i}",
+        "link": f"https://www.scholarships.com/financial-aid/college-scholarships/scholarship-directory/s-{i}",
+        "amount": _amount(rng),
+        "due_date": (now + timedelta(days=rng.randint(-60, 365))).strftime("%B %d, %Y"),
+        "description": ' '.join(_sentence(rng, rng.randint(12, 30)) for _ in range(rng.randint(2, 5))),
+        "details": [_sentence(rng, rng.randint(4, 10)) for _ in range(rng.randint(1, 4))],
+        "eligibility_criteria": [_sentence(rng, rng.randint(4, 10)) for _ in range(rng.randint(1, 5))],
+        "sentiment_score": round(rng.uniform(40, 100), 1),
+    }
+    if rng.random() < 0.05:
+        scholarship["due_date"] = "Varies"
+    # Scraped documents only carry the category attributes they were listed under
+    for field, enum in ENUM_FIELDS:
+        if rng.random() < 0.5:
+            values = [member.value for member in enum]
+            scholarship[field] = rng.sample(values, rng.randint(1, min(4, len(values))))
+    scholarship.update(parsed_fields(scholarship))
+    return scholarship
+
+def make_catalog(size: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    now = datetime.now()
+    return [make_scholarship(i, rng, now) for i in range(size)]
+
+def without_stored_sentiment(catalog: List[Dict[str, Any]], share: float = 0.2, seed: int = 0) -> List[Dict[str, Any]]:
+    """Copy of catalog where ``share`` of the documents lack sentiment_score, as before the backfill."""
+    rng = random.Random(seed)
+    stripped = []
+    for scholarship in catalog:
+        if rng.random() < share:
+            scholarship = {k: v for k, v in scholarship.items() if k != "sentiment_score"}
+        stripped.append(scholarship)
+    return stripped
+
+def make_user(rng: random.Random) -> Dict[str, Any]:
+    def maybe(enum):
+        return rng.choice([member.value for member in enum]) if rng.random() < 0.8 else None
+    return {
+        "name": "Benchmark User",
+        "email": f"user{rng.randint(0, 10**9)}@example.com",
+        "academic_major": maybe(AcademicMajor),
+        "age": maybe(AgeRange),
+        "gender": maybe(Gender),
+        "financial_need": maybe(FinancialNeed),
+        "grade_point_average": round(rng.uniform(1.0, 4.0), 1) if rng.random() < 0.8 else None,
+        "sat_score": rng.randint(400, 1600) if rng.random() < 0.6 else None,
+        "interests": rng.sample(WORDS, rng.randint(0, 6)),
+    }
+
+def make_users(count: int, seed: int = 1) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [make_user(rng) for _ in range(count)]
+
+PASSWORD = "benchmark password"
+
+# Mixes ranked terms with ones that match nothing, as real searches do
+SEARCH_QUERIES = (
+    "engineering", "women in stem", "community service leadership", "nursing scholarship",
+    "first-generation research", "music", "data science", "aerospace",
+)
+
+def make_registration(i: int, rng: random.Random) -> Dict[str, Any]:
+    """POST /register body for the i-th user; emails are unique per i."""
+    registration = make_user(rng)
+    registration["email"] = f"user{i}@example.com"
+    registration["password"] = PASSWORD
+    return registration
+
+def make_registrations(count: int, seed: int = 1) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [make_registration(i, rng) for i in range(count)]
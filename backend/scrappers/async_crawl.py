@@ -0,0 +1,332 @@
+"""Concurrent crawl of the scholarship directory over plain HTTP.
+
+A bounded pool of asyncio fetches pulls category list pages and the detail
+pages they link, with requests to each host spaced by a rate limiter. HTML is
+parsed in a process pool so parsing never blocks fetching. Selenium is only
+used for list pages that come back without any scholarship rows, which is
+what a page rendered by JavaScript looks like to a plain HTTP client.
+
+    python async_crawl.py --concurrency 16
+    python fixture_server.py & python async_crawl.py --base-url http://127.0.0.1:8765 --dry-run
+
+--base-url only changes where pages are fetched from; stored links always
+point at scholarships.com.
+"""
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from extract import SITE_URL
+from extract_lxml import parse_detail_page, parse_list_page
+from frontier import DEFAULT_FRONTIER_PATH, DETAIL, PENDING, Frontier
+from page_cache import DEFAULT_CACHE_PATH, DEFAULT_MAX_AGE, PageCache
+from bulk_writer import BulkWriter
+from scholarships import category_targets, collection, get_driver, meta_collection
+
+EMPTY_DETAIL = {"description": None, "details": None, "eligibility_criteria": None}
+
+
+class HostRateLimiter:
+    """Spaces requests to the same host at least 1 / per_host_rps seconds apart."""
+
+    def __init__(self, per_host_rps: float = 0.0):
+        self.interval = 1.0 / per_host_rps if per_host_rps > 0 else 0.0
+        self._next: Dict[str, float] = {}
+
+    async def wait(self, host: str):
+        if not self.interval:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        # Reserve the next free slot before sleeping so concurrent callers queue up
+        slot = max(now, self._next.get(host, now))
+        self._next[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+def render_with_browser(url: str) -> str:
+    driver = get_driver()
+    try:
+        driver.get(url)
+        time.sleep(5)  # Let JS load for list page
+        return driver.page_source
+    finally:
+        driver.quit()
+
+
+class CrawlStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.list_pages = 0
+        self.detail_pages = 0
+        self.browser_pages = 0
+        self.errors = 0
+        self.retries = 0
+        self.saved = 0
+
+    @property
+    def pages(self) -> int:
+        return self.list_pages + self.detail_pages
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        print(
+            f"Fetched {self.pages} pages ({self.list_pages} list, {self.detail_pages} detail, "
+            f"{self.browser_pages} via browser) in {elapsed:.1f}s "
+            f"({self.pages / elapsed if elapsed else 0.0:.2f} pages/sec), "
+            f"{self.saved} scholarships saved, {self.retries} retries, {self.errors} errors"
+        )
+
+
+class Crawler:
+    def __init__(self, base_url: str = SITE_URL, concurrency: int = 8, per_host_rps: float = 0.0,
+                 parse_workers: int = os.cpu_count() or 1, max_count: int = 25,
+                 writer: Optional[BulkWriter] = None,
+                 browser_fallback: bool = True, timeout: float = 30.0,
+                 cache: Optional[PageCache] = None, frontier: Optional[Frontier] = None):
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.limiter = HostRateLimiter(per_host_rps)
+        self.parse_workers = parse_workers
+        self.max_count = max_count
+        self.writer = writer
+        self.browser_fallback = browser_fallback
+        self.timeout = timeout
+        self.cache = cache or PageCache(None)
+        self.frontier = frontier or Frontier(":memory:")
+        self.stats = CrawlStats()
+        self._fetch_slots: Optional[asyncio.Semaphore] = None
+        self._browser_slot: Optional[asyncio.Semaphore] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def fetch_url(self, url: str) -> str:
+        if url.startswith(SITE_URL):
+            return self.base_url + url[len(SITE_URL):]
+        return url
+
+    async def fetch(self, url: str) -> str:
+        url = self.fetch_url(url)
+        async with self._fetch_slots:
+            await self.limiter.wait(urlsplit(url).netloc)
+            response = await self._client.get(url)
+            response.raise_for_status()
+            return response.text
+
+    async def parse(self, func, *args):
+        if self._pool is None:
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(self._pool, partial(func, *args))
+
+    async def fetch_with_browser(self, url: str) -> str:
+        # One browser at a time; these are the slow path
+        async with self._browser_slot:
+            self.stats.browser_pages += 1
+            return await asyncio.to_thread(render_with_browser, url)
+
+    def save(self, scholarship: dict, on_written: Optional[Callable[[], None]] = None):
+        # Hand off to the writer stage; never waits on the database
+        if self.writer is not None:
+            self.writer.add(scholarship, on_written)
+        elif on_written is not None:
+            on_written()
+        self.stats.saved += 1
+
+    async def fetch_retrying(self, url: str) -> str:
+        """Fetch with exponential backoff between attempts, recording failures in the frontier."""
+        await asyncio.sleep(self.frontier.delay(url))
+        while True:
+            try:
+                return await self.fetch(url)
+            except Exception as e:
+                delay = self.frontier.failed(url, str(e))
+                if delay is None:
+                    raise
+                self.stats.retries += 1
+                await asyncio.sleep(delay)
+
+    async def crawl_detail(self, row: dict, field_name: Optional[str], field_value: Optional[str],
+                           on_written: Optional[Callable[[], None]] = None):
+        link = row["link"]
+        scholarship = {
+            "title": row["title"],
+            "link": link,
+            "amount": row["amount"],
+            "due_date": row["due_date"]
+        }
+        if field_name and field_value:
+            scholarship[field_name] = [field_value]
+
+        # Repeat appearances, links finished before a restart and recently fetched
+        # pages only merge the list fields and category
+        if self.cache.seen(link) or self.frontier.is_done(link) or self.cache.is_fresh(link):
+            self.save(scholarship, on_written)
+            return
+        self.frontier.add(link, DETAIL, scholarship)
+        await self.fetch_detail(scholarship, on_written)
+
+    async def fetch_detail(self, scholarship: dict, on_written: Optional[Callable[[], None]] = None):
+        link = scholarship["link"]
+        try:
+            html = await self.fetch_retrying(link)
+            self.stats.detail_pages += 1
+            detail = await self.parse(parse_detail_page, html)
+        except Exception as e:
+            # The list fields and category are still saved; the link stays failed for --retry-failed
+            self.stats.errors += 1
+            self.frontier.give_up(link, str(e))
+            print(f"Error scraping details for {scholarship['title']}: {str(e)}")
+            self.save(scholarship, on_written)
+            return
+
+        content_hash = self.cache.changed(link, detail)
+        if content_hash:
+            scholarship = {**scholarship, **detail}
+
+        # Only mark the page cached and done once its content is written
+        def written():
+            if content_hash:
+                self.cache.touch(link, content_hash)
+            self.frontier.done(link)
+            if on_written is not None:
+                on_written()
+
+        self.save(scholarship, written)
+
+    async def crawl_category(self, url: str, field_name: Optional[str], field_value: Optional[str]) -> int:
+        try:
+            html = await self.fetch_retrying(url)
+            self.stats.list_pages += 1
+            rows = await self.parse(parse_list_page, html, self.max_count)
+            if not rows and self.browser_fallback:
+                rows = await self.parse(parse_list_page, await self.fetch_with_browser(url), self.max_count)
+        except (Exception, SystemExit) as e:
+            # get_driver exits when no browser is installed; only this page is lost
+            self.stats.errors += 1
+            self.frontier.give_up(url, str(e))
+            print(f"Error scraping {url}: {str(e)}")
+            return 0
+
+        # The page is done once every row from it has been written
+        remaining = len(rows)
+
+        def row_written():
+            nonlocal remaining
+            remaining -= 1
+            if remaining == 0:
+                self.frontier.done(url)
+
+        if not rows:
+            self.frontier.done(url)
+        await asyncio.gather(*(self.crawl_detail(row, field_name, field_value, row_written) for row in rows))
+        print(f"Scraped {len(rows)} scholarships from {url} | {field_name}: {field_value}")
+        return len(rows)
+
+    async def retry_detail(self, scholarship: dict):
+        """Fetch a detail page left pending or failed by an earlier run."""
+        if not self.cache.seen(scholarship["link"]):
+            await self.fetch_detail(scholarship)
+
+    async def run(self, targets, details=()) -> CrawlStats:
+        """Crawl the given list pages, plus detail pages carried over from an earlier run."""
+        self.stats = CrawlStats()
+        self._fetch_slots = asyncio.Semaphore(self.concurrency)
+        self._browser_slot = asyncio.Semaphore(1)
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        pool = ProcessPoolExecutor(max_workers=self.parse_workers) if self.parse_workers > 0 else None
+        self._pool = pool
+        if self.writer is not None:
+            self.writer.start()
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout, limits=limits, follow_redirects=True,
+                                         headers={"User-Agent": "Mozilla/5.0 (ScholarshipFinder crawler)"}) as client:
+                self._client = client
+                await asyncio.gather(
+                    *(self.crawl_category(*target) for target in targets),
+                    *(self.retry_detail(scholarship) for scholarship in details)
+                )
+        finally:
+            self._client = None
+            self._pool = None
+            if pool is not None:
+                pool.shutdown()
+            if self.writer is not None:
+                await self.writer.close()
+        return self.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl the scholarship directory concurrently")
+    parser.add_argument("--base-url", default=SITE_URL, help="Host to fetch pages from, e.g. a local fixture server")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum requests in flight")
+    parser.add_argument("--per-host-rps", type=float, default=4.0, help="Requests per second per host; 0 disables")
+    parser.add_argument("--parse-workers", type=int, default=os.cpu_count() or 1,
+                        help="Parser processes; 0 parses on the event loop")
+    parser.add_argument("--max-count", type=int, default=25, help="Scholarships per category page")
+    parser.add_argument("--no-browser", action="store_true", help="Never fall back to Selenium")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Parse pages but don't write to MongoDB or the page cache")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="SQLite file recording fetched detail pages")
+    parser.add_argument("--cache-max-age", type=float, default=DEFAULT_MAX_AGE / 3600,
+                        help="Hours before a cached detail page is fetched again")
+    parser.add_argument("--no-cache", action="store_true", help="Fetch every detail page once per run")
+    parser.add_argument("--frontier", default=DEFAULT_FRONTIER_PATH, help="SQLite checkpoint of the crawl")
+    parser.add_argument("--resume", action="store_true", help="Continue the checkpointed crawl instead of starting over")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Resume, giving pages that ran out of attempts another try")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Fetch attempts per page before it is failed")
+    parser.add_argument("--batch-size", type=int, default=200, help="Scholarships per bulk_write")
+    parser.add_argument("--flush-interval", type=float, default=2.0, help="Seconds between bulk_write flushes")
+    args = parser.parse_args()
+
+    print("Starting Scholarship Scraper (async)...")
+    # A dry run saves nothing, so it mustn't mark pages as saved either
+    cache_path = None if args.dry_run or args.no_cache else args.cache
+    cache = PageCache(cache_path, max_age=args.cache_max_age * 3600)
+    frontier = Frontier(":memory:" if args.dry_run else args.frontier, max_attempts=args.max_attempts)
+    if args.retry_failed:
+        frontier.retry_failed()
+    elif not args.resume:
+        frontier.reset()
+    frontier.seed(category_targets())
+    targets = frontier.targets(PENDING)
+    details = [data for _, data in frontier.items(DETAIL, PENDING)]
+    if args.resume or args.retry_failed:
+        print(f"Resuming: {len(targets)} list pages and {len(details)} detail pages left")
+    writer = None if args.dry_run else BulkWriter(
+        collection, meta_collection, batch_size=args.batch_size, flush_interval=args.flush_interval
+    )
+    crawler = Crawler(
+        base_url=args.base_url,
+        concurrency=args.concurrency,
+        per_host_rps=args.per_host_rps,
+        parse_workers=args.parse_workers,
+        max_count=args.max_count,
+        writer=writer,
+        browser_fallback=not args.no_browser,
+        cache=cache,
+        frontier=frontier,
+    )
+    try:
+        stats = asyncio.run(crawler.run(targets, details))
+    finally:
+        cache.close()
+        frontier.report()
+        frontier.close()
+    print("Scraping complete. Merged all scholarship attributes.")
+    stats.report()
+    if writer is not None:
+        writer.report()
+    cache.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""Batched scholarship upserts for the scrapers.
+
+Scraped rows are merged per link in memory, so a scholarship seen under
+several categories becomes one update with all of them, and are written
+as unordered bulk_write batches once enough links are pending or enough
+time has passed. After each flush the sentiment and parsed fields of the
+flushed documents are refreshed where stale, and the catalog version is
+bumped once.
+
+Crawlers running on an event loop start the writer as a background task
+(BulkWriter.start) so fetching never waits on the database. The Selenium
+driver loop uses ThreadedBulkWriter, which hands due batches to a writer
+thread through a queue for the same reason.
+"""
+import asyncio
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+from src.parsing import SOURCE_FIELDS, PARSED_FIELDS, stale_parsed_fields
+from src.sentiment import TEXT_FIELDS, sentiment_fields
+
+# Fields merged with $addToSet; everything else is $set
+LIST_FIELDS = {
+    'academic_major', 'age', 'financial_need', 'gender',
+    'grade_point_average', 'sat_score', 'eligibility_criteria', 'qualified_based_on'
+}
+
+# Fields read back after an upsert to refresh the derived fields
+DERIVED_SOURCE_FIELDS = TEXT_FIELDS + ('sentiment_score', 'sentiment_hash') + SOURCE_FIELDS + PARSED_FIELDS
+
+
+def scholarship_update(scholarship: Dict[str, Any]) -> Dict[str, Any]:
+    """$set/$addToSet update for a scraped row; None values are left untouched."""
+    set_data = {}
+    add_to_set = {}
+    for key, value in scholarship.items():
+        if value is not None:
+            if key in LIST_FIELDS:
+                add_to_set[key] = {"$each": value if isinstance(value, list) else [value]}
+            else:
+                set_data[key] = value
+
+    update_operations = {}
+    if set_data:
+        update_operations["$set"] = set_data
+    if add_to_set:
+        update_operations["$addToSet"] = add_to_set
+    return update_operations
+
+
+def merge_update(into: Dict[str, Any], update: Dict[str, Any]):
+    """Fold update into into, as if both had been applied in order."""
+    if "$set" in update:
+        into.setdefault("$set", {}).update(update["$set"])
+    for key, spec in update.get("$addToSet", {}).items():
+        values = into.setdefault("$addToSet", {}).setdefault(key, {"$each": []})["$each"]
+        values.extend(v for v in spec["$each"] if v not in values)
+
+
+def derived_fields(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Sentiment and parsed fields of a stored document that are missing or stale."""
+    derived = sentiment_fields(doc)
+    derived.update(stale_parsed_fields(doc))
+    return derived
+
+
+class BulkWriter:
+    def __init__(self, collection, meta_collection=None, batch_size: int = 200, flush_interval: float = 2.0):
+        self.collection = collection
+        self.meta_collection = meta_collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        # Called with no arguments once the link's pending update is written
+        self.callbacks: Dict[str, List[Callable[[], None]]] = {}
+        self.last_flush = time.monotonic()
+        self.rows = 0
+        self.upserted = 0
+        self.matched = 0
+        self.modified = 0
+        self.derived = 0
+        self.errors = 0
+        self.flush_seconds: List[float] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def add(self, scholarship: Dict[str, Any], on_written: Optional[Callable[[], None]] = None):
+        link = scholarship["link"]
+        merge_update(self.pending.setdefault(link, {}), scholarship_update(scholarship))
+        if on_written is not None:
+            self.callbacks.setdefault(link, []).append(on_written)
+        self.rows += 1
+        if self._wake is not None and len(self.pending) >= self.batch_size:
+            self._wake.set()
+
+    def due(self) -> bool:
+        return bool(self.pending) and (
+            len(self.pending) >= self.batch_size
+            or time.monotonic() - self.last_flush >= self.flush_interval
+        )
+
+    def flush_if_due(self):
+        if self.due():
+            self.flush_now()
+
+    def flush_now(self):
+        """Write everything pending; blocks on the database."""
+        batch, self.pending = self.pending, {}
+        callbacks, self.callbacks = self.callbacks, {}
+        self.last_flush = time.monotonic()
+        if batch:
+            self._written(self.write(batch), callbacks)
+
+    def _written(self, links: List[str], callbacks: Dict[str, List[Callable[[], None]]]):
+        for link in links:
+            for callback in callbacks.get(link, ()):
+                callback()
+
+    def write(self, batch: Dict[str, Dict[str, Any]]) -> List[str]:
+        """Apply one batch and refresh its derived fields; returns the links written."""
+        started = time.perf_counter()
+        links = list(batch)
+        requests = [UpdateOne({"link": link}, batch[link], upsert=True) for link in links]
+        failed = set()
+        try:
+            result = self.collection.bulk_write(requests, ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            # Unordered: the other updates in the batch were still applied
+            details = e.details
+            failed = {links[error["index"]] for error in details.get("writeErrors", [])}
+            self.errors += len(failed)
+            print(f"Bulk write failed for {len(failed)} of {len(requests)} scholarships: {failed}")
+        self.upserted += details.get("nUpserted", 0)
+        self.matched += details.get("nMatched", 0)
+        self.modified += details.get("nModified", 0)
+
+        # Refresh derived fields from the merged documents, only where stale
+        written = [link for link in links if link not in failed]
+        projection = {field: 1 for field in DERIVED_SOURCE_FIELDS}
+        refresh = []
+        for doc in self.collection.find({"link": {"$in": written}}, projection):
+            derived = derived_fields(doc)
+            if derived:
+                refresh.append(UpdateOne({"_id": doc["_id"]}, {"$set": derived}))
+        if refresh:
+            self.collection.bulk_write(refresh, ordered=False)
+            self.derived += len(refresh)
+        if self.meta_collection is not None and written:
+            # Same counter ScholarshipDAL.bump_catalog_version uses; invalidates cached recommendations
+            self.meta_collection.update_one({"_id": "catalog"}, {"$inc": {"version": 1}}, upsert=True)
+        self.flush_seconds.append(time.perf_counter() - started)
+        return written
+
+    # ---- Writer stage on an event loop ----
+    def start(self):
+        self._wake = asyncio.Event()
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            if not self._closing:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._wake.clear()
+            if self.pending:
+                batch, self.pending = self.pending, {}
+                callbacks, self.callbacks = self.callbacks, {}
+                self.last_flush = time.monotonic()
+                try:
+                    # Callbacks run back on the loop's thread
+                    self._written(await asyncio.to_thread(self.write, batch), callbacks)
+                except Exception as e:
+                    self.errors += len(batch)
+                    print(f"Bulk write of {len(batch)} scholarships failed: {str(e)}")
+            if self._closing and not self.pending:
+                return
+
+    async def close(self):
+        """Flush what's left and stop the writer task."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wake.set()
+        await self._task
+        self._task = None
+        self._wake = None
+
+    def report(self):
+        flushes = len(self.flush_seconds)
+        total = sum(self.flush_seconds)
+        print(
+            f"Writes: {self.rows} rows merged into {self.upserted + self.matched} updates over {flushes} flushes "
+            f"({self.upserted} upserted, {self.matched} matched, {self.modified} modified, "
+            f"{self.derived} derived refreshed, {self.errors} failed); flush time {total:.2f}s total, "
+            f"{total / flushes if flushes else 0.0:.3f}s mean, {max(self.flush_seconds, default=0.0):.3f}s max"
+        )
+
+
+class ThreadedBulkWriter(BulkWriter):
+    """BulkWriter whose batches are written on a background thread.
+
+    flush_if_due() and hand_off() only queue the batch, so the crawl loop
+    never waits on Mongo; it only blocks when max_queued batches are
+    already waiting, which bounds memory if the database falls behind.
+    on_written callbacks touch the page cache and frontier, whose SQLite
+    connections belong to the crawl thread, so the writer thread sends them
+    back and they run in the crawl thread's next flush_if_due() or join().
+    """
+
+    def __init__(self, collection, meta_collection=None, batch_size: int = 200, flush_interval: float = 2.0,
+                 max_queued: int = 4):
+        super().__init__(collection, meta_collection, batch_size, flush_interval)
+        self._batches: "queue.Queue[Optional[Tuple[Dict, Dict, Optional[Callable[[], None]]]]]" = \
+            queue.Queue(maxsize=max_queued)
+        self._done: "queue.SimpleQueue[Tuple[List[str], Dict, Optional[Callable[[], None]]]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._write_batches, name="bulk-writer", daemon=True)
+        self._thread.start()
+
+    def _write_batches(self):
+        while True:
+            item = self._batches.get()
+            if item is None:
+                self._batches.task_done()
+                return
+            batch, callbacks, then = item
+            try:
+                # A batch can be empty when it only carries a checkpoint
+                self._done.put((self.write(batch) if batch else [], callbacks, then))
+            except Exception as e:
+                self.errors += len(batch)
+                print(f"Bulk write of {len(batch)} scholarships failed: {str(e)}")
+            self._batches.task_done()
+
+    def run_callbacks(self):
+        """Run the callbacks of every batch written so far, on the calling thread."""
+        while True:
+            try:
+                links, callbacks, then = self._done.get_nowait()
+            except queue.Empty:
+                return
+            self._written(links, callbacks)
+            if then is not None:
+                then()
+
+    def hand_off(self, then: Optional[Callable[[], None]] = None):
+        """Queue everything pending; then() runs once it and every earlier batch is written."""
+        batch, self.pending = self.pending, {}
+        callbacks, self.callbacks = self.callbacks, {}
+        self.last_flush = time.monotonic()
+        if batch or then is not None:
+            self._batches.put((batch, callbacks, then))
+
+    def flush_if_due(self):
+        self.run_callbacks()
+        if self.due():
+            self.hand_off()
+
+    def flush_now(self):
+        """Write everything pending and wait for the writer thread to finish it."""
+        self.hand_off()
+        self._batches.join()
+        self.run_callbacks()
+
+    def join(self):
+        """Flush what's left and stop the writer thread."""
+        if self._thread is None:
+            return
+        self.hand_off()
+        self._batches.put(None)
+        self._thread.join()
+        self._thread = None
+        self.run_callbacks()
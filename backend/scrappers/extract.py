@@ -0,0 +1,64 @@
+from bs4 import BeautifulSoup
+
+SITE_URL = "https://www.scholarships.com"
+
+# --- Detail page sections ---
+def extract_description(soup):
+    header = soup.find('h2', string=lambda s: s and s.strip() == "Scholarship Description")
+    if not header:
+        return None
+    next_div = header.find_next_sibling('div')
+    if next_div:
+        ps = next_div.find_all('p', recursive=False)
+        return "\n".join(p.get_text(strip=True) for p in ps)
+    return None
+
+def extract_section(soup, header_text):
+    header = soup.find('h2', string=lambda s: s and s.strip() == header_text)
+    if not header:
+        return None
+    content = []
+    next_elem = header.find_next_sibling()
+    while next_elem:
+        if next_elem.name == 'h2':
+            break
+        if next_elem.name == 'ul':
+            items = [li.get_text(strip=True) for li in next_elem.find_all('li')]
+            content.extend(items)
+        next_elem = next_elem.find_next_sibling()
+    return content if content else None
+
+def parse_detail_page(html):
+    """Description, details and eligibility criteria from a scholarship page."""
+    detail_soup = BeautifulSoup(html, "lxml")
+    return {
+        "description": extract_description(detail_soup),
+        "details": extract_section(detail_soup, "Scholarship Details"),
+        "eligibility_criteria": extract_section(detail_soup, "Eligibility Criteria"),
+    }
+
+# --- Category list page ---
+def parse_list_page(html, max_count=25):
+    """Up to max_count scholarship rows (title, link, amount, due date) from a list page."""
+    soup = BeautifulSoup(html, "lxml")
+    rows = soup.find_all('tr')
+    results = []
+
+    for row in rows:
+        if len(results) >= max_count:
+            break
+        tds = row.find_all('td')
+        if len(tds) >= 4:
+            a_tag = tds[1].find('a')
+            amount_label = tds[2].find('label')
+            amount_span = tds[2].find('span')
+            if a_tag and amount_label and "Amount" in amount_label.text:
+                path = a_tag['href'].strip()
+                results.append({
+                    "title": a_tag.text.strip(),
+                    "path": path,
+                    "link": SITE_URL + path,
+                    "amount": amount_span.text.strip() if amount_span else None,
+                    "due_date": tds[3].get_text(strip=True).replace("Due Date:", "").strip(),
+                })
+    return results
@@ -0,0 +1,143 @@
+"""lxml/XPath versions of the extract.py parsers, with identical output.
+
+Pages are parsed straight into lxml trees and searched with precompiled
+XPath expressions instead of building BeautifulSoup trees and matching
+headers with Python predicates. Text is collected the way bs4's
+get_text() does it: comments are dropped, and so is anything inside
+script, style, template, rt and rp. A header matches the way bs4's
+string= filter does, only when the whole tag is one string.
+"""
+from lxml import etree
+
+from extract import SITE_URL
+
+# Tags whose strings bs4 keeps out of get_text()
+_HIDDEN_TEXT_TAGS = frozenset(('script', 'style', 'template', 'rt', 'rp'))
+
+_ROWS = etree.XPath("//tr")
+_CELLS = etree.XPath(".//td")
+_FIRST_LINK = etree.XPath("(.//a)[1]")
+_FIRST_LABEL = etree.XPath("(.//label)[1]")
+_FIRST_SPAN = etree.XPath("(.//span)[1]")
+_HEADERS = etree.XPath("//h2")
+_NEXT_DIV = etree.XPath("following-sibling::div[1]")
+_CHILD_PARAGRAPHS = etree.XPath("p")
+_LIST_ITEMS = etree.XPath(".//li")
+
+
+def _strings(el):
+    if el.tag in _HIDDEN_TEXT_TAGS:
+        return
+    if el.text:
+        yield el.text
+    for child in el:
+        if isinstance(child.tag, str):
+            yield from _strings(child)
+        # Comment and processing instruction text is skipped, their tails aren't
+        if child.tail:
+            yield child.tail
+
+
+def get_text(el, strip: bool = False) -> str:
+    """Same result as bs4's Tag.get_text(strip=strip)."""
+    if strip:
+        return "".join(s.strip() for s in _strings(el) if s.strip())
+    return "".join(_strings(el))
+
+
+def _tag_string(el):
+    """bs4's Tag.string: the tag's only string, looking through single-child tags."""
+    children = list(el)
+    if el.text:
+        return None if children else el.text
+    if len(children) != 1 or children[0].tail:
+        return None
+    child = children[0]
+    if not isinstance(child.tag, str):
+        return child.text
+    return _tag_string(child)
+
+
+def _find_header(root, header_text):
+    for header in _HEADERS(root):
+        string = _tag_string(header)
+        if string and string.strip() == header_text:
+            return header
+    return None
+
+
+# Pages arrive decoded; encoding them back lets lxml ignore any charset declaration
+_PARSER = etree.HTMLParser(encoding="utf-8")
+
+
+def _parse(html):
+    """Root element, or None for documents without any elements."""
+    if not html:
+        return None
+    if isinstance(html, str):
+        html = html.encode("utf-8")
+    return etree.fromstring(html, _PARSER)
+
+
+# --- Detail page sections ---
+def extract_description(root):
+    header = _find_header(root, "Scholarship Description")
+    if header is None:
+        return None
+    next_div = _NEXT_DIV(header)
+    if next_div:
+        ps = _CHILD_PARAGRAPHS(next_div[0])
+        return "\n".join(get_text(p, strip=True) for p in ps)
+    return None
+
+def extract_section(root, header_text):
+    header = _find_header(root, header_text)
+    if header is None:
+        return None
+    content = []
+    for next_elem in header.itersiblings():
+        if not isinstance(next_elem.tag, str):
+            continue
+        if next_elem.tag == 'h2':
+            break
+        if next_elem.tag == 'ul':
+            content.extend(get_text(li, strip=True) for li in _LIST_ITEMS(next_elem))
+    return content if content else None
+
+def parse_detail_page(html):
+    """Description, details and eligibility criteria from a scholarship page."""
+    root = _parse(html)
+    if root is None:
+        return {"description": None, "details": None, "eligibility_criteria": None}
+    return {
+        "description": extract_description(root),
+        "details": extract_section(root, "Scholarship Details"),
+        "eligibility_criteria": extract_section(root, "Eligibility Criteria"),
+    }
+
+# --- Category list page ---
+def parse_list_page(html, max_count=25):
+    """Up to max_count scholarship rows (title, link, amount, due date) from a list page."""
+    root = _parse(html)
+    results = []
+    if root is None:
+        return results
+
+    for row in _ROWS(root):
+        if len(results) >= max_count:
+            break
+        tds = _CELLS(row)
+        if len(tds) >= 4:
+            a_tag = _FIRST_LINK(tds[1])
+            amount_label = _FIRST_LABEL(tds[2])
+            amount_span = _FIRST_SPAN(tds[2])
+            if a_tag and amount_label and "Amount" in get_text(amount_label[0]):
+                path = a_tag[0].attrib['href'].strip()
+                results.append({
+                    "title": get_text(a_tag[0]).strip(),
+                    "path": path,
+                    "link": SITE_URL + path,
+                    "amount": get_text(amount_span[0]).strip() if amount_span else None,
+                    "due_date": get_text(tds[3], strip=True).replace("Due Date:", "").strip(),
+                })
+    return results
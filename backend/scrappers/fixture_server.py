@@ -0,0 +1,198 @@
+"""Local stand-in for scholarships.com, for crawling without hitting the real site.
+
+Serves deterministic category list pages and scholarship detail pages with the
+same markup the scrapers parse. The same scholarship appears under several
+categories, as it does on the real site. Run from the scrappers directory:
+
+    python fixture_server.py --port 8765 --latency 0.05
+    python async_crawl.py --base-url http://127.0.0.1:8765 --dry-run
+
+With --save DIR the server writes one list page and one detail page per
+category to DIR instead of serving, for parser benchmarks.
+"""
+import argparse
+import hashlib
+import os
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+LIST_PREFIX = "/financial-aid/college-scholarships/scholarship-directory/"
+DETAIL_PREFIX = "/financial-aid/ut/"
+
+WORDS = (
+    "student community leadership engineering art science research service award "
+    "foundation memorial women minority rural first generation veteran essay "
+    "technology medicine nursing business design music education environment"
+).split()
+
+NAV = "".join(
+    f'<li><a href="/financial-aid/college-scholarships/scholarship-directory/{w}">{w.title()} Scholarships</a></li>'
+    for w in WORDS
+)
+
+
+def _rng(*parts) -> random.Random:
+    seed = hashlib.sha1("/".join(str(p) for p in parts).encode()).hexdigest()
+    return random.Random(int(seed[:16], 16))
+
+
+def _title(sid: int) -> str:
+    rng = _rng("title", sid)
+    return " ".join(w.title() for w in rng.sample(WORDS, 3)) + " Scholarship"
+
+
+def _slug(sid: int) -> str:
+    return _title(sid).lower().replace(" ", "-")
+
+
+def _page(title: str, body: str) -> str:
+    return (
+        "<!DOCTYPE html><html><head>"
+        f"<title>{title} | Scholarships.com</title>"
+        '<meta charset="utf-8"><link rel="stylesheet" href="/static/site.css">'
+        '<script src="/static/app.js"></script>'
+        "</head><body>"
+        f'<header><nav><ul class="menu">{NAV}</ul></nav></header>'
+        f'<main id="content">{body}</main>'
+        f'<footer><ul class="links">{NAV}</ul><p>&copy; Scholarships.com</p></footer>'
+        "</body></html>"
+    )
+
+
+def list_page(path: str, catalog_size: int, per_page: int = 30) -> str:
+    """A category page listing a deterministic sample of the catalog."""
+    rng = _rng("list", path)
+    ids = rng.sample(range(catalog_size), min(per_page, catalog_size))
+    rows = []
+    for sid in ids:
+        # Row fields belong to the scholarship, so they match across categories
+        row_rng = _rng("row", sid)
+        amount = f"${row_rng.choice([500, 1000, 2500, 5000, 10000]):,}"
+        if row_rng.random() < 0.2:
+            amount = "Varies"
+        due = date(2027, 1, 1) + timedelta(days=_rng("due", sid).randrange(365))
+        rows.append(
+            "<tr>"
+            f'<td class="save"><button data-id="{sid}">Save</button></td>'
+            f'<td><a href="{DETAIL_PREFIX}{sid}/{_slug(sid)}">{_title(sid)}</a></td>'
+            f"<td><label>Amount</label><span>{amount}</span></td>"
+            f"<td>Due Date: {due.strftime('%B %d, %Y')}</td>"
+            "</tr>"
+        )
+    table = (
+        '<table class="scholarship-list"><thead><tr><th></th><th>Scholarship</th>'
+        "<th>Amount</th><th>Deadline</th></tr></thead>"
+        f"<tbody>{''.join(rows)}</tbody></table>"
+    )
+    return _page("Scholarship Directory", f"<h1>Scholarship Directory</h1>{table}")
+
+
+def detail_page(sid: int) -> str:
+    rng = _rng("detail", sid)
+    title = _title(sid)
+    paragraphs = "".join(
+        f"<p>{' '.join(rng.choice(WORDS) for _ in range(rng.randint(20, 60)))}.</p>"
+        for _ in range(rng.randint(1, 4))
+    )
+    details = "".join(f"<li>{' '.join(rng.sample(WORDS, 4))}</li>" for _ in range(rng.randint(2, 6)))
+    criteria = "".join(f"<li>{' '.join(rng.sample(WORDS, 5))}</li>" for _ in range(rng.randint(1, 5)))
+    body = (
+        f"<h1>{title}</h1>"
+        '<div class="scholarship-detail">'
+        "<h2>Scholarship Description</h2>"
+        f"<div>{paragraphs}</div>"
+        "<h2>Scholarship Details</h2>"
+        f"<ul>{details}</ul>"
+        "<h2>Eligibility Criteria</h2>"
+        f"<ul>{criteria}</ul>"
+        "<h2>Related Scholarships</h2>"
+        "</div>"
+    )
+    return _page(title, body)
+
+
+def render(path: str, catalog_size: int):
+    """(status, html) for a request path."""
+    if path.startswith(LIST_PREFIX):
+        return 200, list_page(path, catalog_size)
+    if path.startswith(DETAIL_PREFIX):
+        parts = path[len(DETAIL_PREFIX):].split("/")
+        if parts[0].isdigit() and int(parts[0]) < catalog_size:
+            return 200, detail_page(int(parts[0]))
+    return 404, _page("Not Found", "<h1>Page not found</h1>")
+
+
+def make_handler(catalog_size: int, latency: float, fail_rate: float = 0.0):
+    class FixtureHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+            if fail_rate and random.random() < fail_rate:
+                status, html = 503, _page("Unavailable", "<h1>Service unavailable</h1>")
+            else:
+                status, html = render(urlsplit(self.path).path, catalog_size)
+            body = html.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixtureHandler
+
+
+def serve(port: int = 0, catalog_size: int = 400, latency: float = 0.0, fail_rate: float = 0.0,
+          background: bool = False):
+    """Start the server; with background=True it runs in a daemon thread and is returned."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(catalog_size, latency, fail_rate))
+    server.daemon_threads = True
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+    print(f"Serving fixture pages on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def save_fixtures(directory: str, catalog_size: int = 400):
+    """Write one list page and the first detail page it links per category URL."""
+    from scholarships import urls
+    os.makedirs(directory, exist_ok=True)
+    for idx, url in enumerate(urls):
+        path = urlsplit(url).path
+        html = list_page(path, catalog_size)
+        with open(os.path.join(directory, f"list-{idx:02d}.html"), "w", encoding="utf-8") as f:
+            f.write(html)
+        sid = _rng("list", path).sample(range(catalog_size), 1)[0]
+        with open(os.path.join(directory, f"detail-{idx:02d}.html"), "w", encoding="utf-8") as f:
+            f.write(detail_page(sid))
+    print(f"Saved {2 * len(urls)} fixture pages to {directory}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fixture scholarship pages locally")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--catalog-size", type=int, default=400, help="Distinct scholarships behind the list pages")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before each response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with a 503")
+    parser.add_argument("--save", metavar="DIR", help="Write fixture pages to DIR instead of serving")
+    args = parser.parse_args()
+    if args.save:
+        save_fixtures(args.save, args.catalog_size)
+    else:
+        serve(args.port, args.catalog_size, args.latency, args.fail_rate)
+
+
+if __name__ == "__main__":
+    main()
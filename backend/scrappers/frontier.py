@@ -0,0 +1,130 @@
+"""Persisted crawl frontier, so an interrupted crawl resumes where it stopped.
+
+Every category list page and every detail link the crawl reaches is a row
+in a SQLite table with a status (pending, done or failed), an attempt count
+and the time its next attempt is allowed. Items are only marked done once
+what they produced has been written to MongoDB. A failed fetch is retried
+with exponential backoff until max_attempts, after which the item is left
+failed for a later --retry-failed run.
+"""
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_FRONTIER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "crawl_frontier.sqlite3")
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+LIST = "list"
+DETAIL = "detail"
+
+
+class Frontier:
+    def __init__(self, path: str = DEFAULT_FRONTIER_PATH, max_attempts: int = 3,
+                 backoff: float = 2.0, max_backoff: float = 60.0):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        # ":memory:" gives a frontier that lasts only for the run
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS frontier ("
+            "url TEXT PRIMARY KEY, kind TEXT NOT NULL, data TEXT NOT NULL, "
+            "status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+            "next_attempt_at REAL NOT NULL DEFAULT 0, last_error TEXT, updated_at REAL NOT NULL)"
+        )
+        self.db.commit()
+
+    def _set(self, url: str, **fields):
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        self.db.execute(f"UPDATE frontier SET {columns} WHERE url = ?", (*fields.values(), url))
+        self.db.commit()
+
+    def reset(self):
+        self.db.execute("DELETE FROM frontier")
+        self.db.commit()
+
+    def add(self, url: str, kind: str, data: Dict[str, Any]):
+        """Add a pending item; items already known keep their status."""
+        self.db.execute(
+            "INSERT OR IGNORE INTO frontier (url, kind, data, status, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (url, kind, json.dumps(data), PENDING, time.time())
+        )
+        self.db.commit()
+
+    def seed(self, targets: List[Tuple[str, Optional[str], Optional[str]]]):
+        for url, field_name, field_value in targets:
+            self.add(url, LIST, {"field_name": field_name, "field_value": field_value})
+
+    def status(self, url: str) -> Optional[str]:
+        row = self.db.execute("SELECT status FROM frontier WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def is_done(self, url: str) -> bool:
+        return self.status(url) == DONE
+
+    def done(self, url: str):
+        self._set(url, status=DONE, last_error=None)
+
+    def failed(self, url: str, error: str) -> Optional[float]:
+        """Record a failed attempt; returns the backoff before the next one, or None once out of attempts."""
+        row = self.db.execute("SELECT attempts FROM frontier WHERE url = ?", (url,)).fetchone()
+        attempts = (row[0] if row else 0) + 1
+        if attempts >= self.max_attempts:
+            self._set(url, status=FAILED, attempts=attempts, last_error=error)
+            return None
+        delay = min(self.backoff * 2 ** (attempts - 1), self.max_backoff)
+        self._set(url, status=PENDING, attempts=attempts, next_attempt_at=time.time() + delay, last_error=error)
+        return delay
+
+    def give_up(self, url: str, error: str):
+        """Mark an item failed without further attempts this run."""
+        self._set(url, status=FAILED, last_error=error)
+
+    def delay(self, url: str) -> float:
+        """Seconds until the item may be attempted again."""
+        row = self.db.execute("SELECT next_attempt_at FROM frontier WHERE url = ?", (url,)).fetchone()
+        return max(0.0, row[0] - time.time()) if row else 0.0
+
+    def items(self, kind: str, status: str) -> List[Tuple[str, Dict[str, Any]]]:
+        rows = self.db.execute(
+            "SELECT url, data FROM frontier WHERE kind = ? AND status = ? ORDER BY rowid", (kind, status)
+        )
+        return [(url, json.loads(data)) for url, data in rows]
+
+    def targets(self, status: str = PENDING) -> List[Tuple[str, Optional[str], Optional[str]]]:
+        """(url, field_name, field_value) of the list pages with the given status."""
+        return [(url, data["field_name"], data["field_value"]) for url, data in self.items(LIST, status)]
+
+    def retry_failed(self):
+        """Give failed items a fresh set of attempts."""
+        self.db.execute(
+            "UPDATE frontier SET status = ?, attempts = 0, next_attempt_at = 0, updated_at = ? WHERE status = ?",
+            (PENDING, time.time(), FAILED)
+        )
+        self.db.commit()
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        counts = {LIST: {PENDING: 0, DONE: 0, FAILED: 0}, DETAIL: {PENDING: 0, DONE: 0, FAILED: 0}}
+        for kind, status, count in self.db.execute("SELECT kind, status, COUNT(*) FROM frontier GROUP BY kind, status"):
+            counts[kind][status] = count
+        return counts
+
+    def close(self):
+        self.db.close()
+
+    def report(self):
+        counts = self.counts()
+        print(
+            "Frontier: " + "; ".join(
+                f"{kind} pages {c[DONE]} done, {c[PENDING]} pending, {c[FAILED]} failed"
+                for kind, c in counts.items()
+            )
+        )
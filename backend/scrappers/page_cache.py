@@ -0,0 +1,122 @@
+"""Detail-page dedup for a crawl run, backed by an on-disk page cache.
+
+The same scholarship is listed under many categories. Within a run only its
+first appearance fetches the detail page; later ones just merge their
+category. Across runs a SQLite table keeps each detail page's content hash
+and fetch time: pages fetched within max_age are not fetched again, and
+pages whose content hash hasn't changed are not rewritten. Recorded pages
+are committed every commit_every touches, so an interrupted crawl keeps
+what it had already saved.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "page_cache.sqlite3")
+DEFAULT_MAX_AGE = 24 * 3600
+DEFAULT_COMMIT_EVERY = 50
+
+
+def detail_hash(detail: Dict[str, Any]) -> str:
+    """Hash of the extracted content, so page chrome that changes per request doesn't count."""
+    return hashlib.sha256(json.dumps(detail, sort_keys=True).encode()).hexdigest()
+
+
+class PageCache:
+    def __init__(self, path: Optional[str] = DEFAULT_CACHE_PATH, max_age: float = DEFAULT_MAX_AGE,
+                 commit_every: int = DEFAULT_COMMIT_EVERY):
+        self.max_age = max_age
+        self.commit_every = commit_every
+        self.uncommitted = 0
+        self.visited = set()
+        # path=None keeps only the per-run dedup
+        self.db = sqlite3.connect(path) if path else None
+        if self.db is not None:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "url TEXT PRIMARY KEY, content_hash TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+        self.appearances = 0
+        self.repeat_hits = 0
+        self.fresh_hits = 0
+        self.unchanged_hits = 0
+        self.misses = 0
+
+    def seen(self, url: str) -> bool:
+        """True if the link was already handled this run; marks it handled otherwise."""
+        self.appearances += 1
+        if url in self.visited:
+            self.repeat_hits += 1
+            return True
+        self.visited.add(url)
+        return False
+
+    def is_fresh(self, url: str) -> bool:
+        """True if the page was fetched within max_age on an earlier run."""
+        if self.db is None:
+            return False
+        row = self.db.execute("SELECT fetched_at FROM pages WHERE url = ?", (url,)).fetchone()
+        if row and time.time() - row[0] < self.max_age:
+            self.fresh_hits += 1
+            return True
+        return False
+
+    def changed(self, url: str, detail: Dict[str, Any]) -> Optional[str]:
+        """Content hash of a freshly fetched page if it differs from the stored one, else None."""
+        content_hash = detail_hash(detail)
+        row = None
+        if self.db is not None:
+            row = self.db.execute("SELECT content_hash FROM pages WHERE url = ?", (url,)).fetchone()
+        if row and row[0] == content_hash:
+            self.unchanged_hits += 1
+            self.touch(url, content_hash)
+            return None
+        self.misses += 1
+        return content_hash
+
+    def touch(self, url: str, content_hash: str):
+        """Record a page as fetched now; call once its content has been saved."""
+        if self.db is not None:
+            self.db.execute(
+                "INSERT OR REPLACE INTO pages (url, content_hash, fetched_at) VALUES (?, ?, ?)",
+                (url, content_hash, time.time())
+            )
+            self.uncommitted += 1
+            if self.uncommitted >= self.commit_every:
+                self.commit()
+
+    def commit(self):
+        if self.db is not None and self.uncommitted:
+            self.db.commit()
+            self.uncommitted = 0
+
+    def close(self):
+        if self.db is not None:
+            self.commit()
+            self.db.close()
+            self.db = None
+
+    def stats(self) -> Dict[str, Any]:
+        unique = len(self.visited)
+        return {
+            "appearances": self.appearances,
+            "unique_pages": unique,
+            "repeat_hits": self.repeat_hits,
+            "fresh_hits": self.fresh_hits,
+            "unchanged_hits": self.unchanged_hits,
+            "misses": self.misses,
+            "repeat_hit_rate": self.repeat_hits / self.appearances if self.appearances else 0.0,
+            "cache_hit_rate": (self.fresh_hits + self.unchanged_hits) / unique if unique else 0.0,
+        }
+
+    def report(self):
+        s = self.stats()
+        print(
+            f"Detail pages: {s['appearances']} listed, {s['unique_pages']} unique "
+            f"({s['repeat_hit_rate']:.0%} repeats skipped); cache: {s['fresh_hits']} fresh, "
+            f"{s['unchanged_hits']} unchanged, {s['misses']} new or changed "
+            f"({s['cache_hit_rate']:.0%} hit rate)"
+        )
@@ -1,3 +1,4 @@
+import argparse
 import os
 import sys
 import platform
@@ -8,12 +9,17 @@ from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.common.by import By
 from selenium.webdriver.safari.webdriver import WebDriver as SafariDriver
 from selenium.common.exceptions import WebDriverException
-from bs4 import BeautifulSoup
 from pymongo import MongoClient
 from dotenv import load_dotenv
 
 # Load MongoDB URI from backend/.env
 BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+from bulk_writer import BulkWriter, ThreadedBulkWriter
+from extract_lxml import parse_detail_page, parse_list_page
+from frontier import DETAIL, PENDING, Frontier
+from page_cache import PageCache
+
 load_dotenv(os.path.join(BACKEND_DIR, ".env"))
 MONGODB_URI = os.getenv("MONGODB_URI")
 DB_NAME = os.getenv("DATABASE_NAME", "scholarship_db")
@@ -136,125 +142,107 @@ def get_driver():
 client = MongoClient(MONGODB_URI)
 db = client[DB_NAME]
 collection = db[COLLECTION_NAME]
+meta_collection = db["meta"]
+
+def load_detail(driver, link, frontier):
+    """Load and parse a detail page with exponential backoff between attempts, recording failures in the frontier."""
+    time.sleep(frontier.delay(link))
+    while True:
+        try:
+            driver.get(link)
+            time.sleep(3)  # Wait for detail page to load
+            return parse_detail_page(driver.page_source)
+        except Exception as e:
+            delay = frontier.failed(link, str(e))
+            if delay is None:
+                raise
+            print(f"Retrying {link} in {delay:.0f}s: {str(e)}")
+            time.sleep(delay)
 
-def extract_description(soup):
-    header = soup.find('h2', string=lambda s: s and s.strip() == "Scholarship Description")
-    if not header:
-        return None
-    next_div = header.find_next_sibling('div')
-    if next_div:
-        ps = next_div.find_all('p', recursive=False)
-        return "\n".join(p.get_text(strip=True) for p in ps)
-    return None
+def scrape_detail(driver, scholarship, cache, writer, frontier):
+    """Scrape a scholarship's detail page and queue it for writing; returns whether the page loaded."""
+    link = scholarship["link"]
+    frontier.add(link, DETAIL, scholarship)
+    try:
+        detail = load_detail(driver, link, frontier)
+    except Exception as e:
+        # Out of attempts: saved without details, and the frontier has the link
+        # failed for --retry-failed
+        print(f"Error scraping details for {scholarship['title']}: {str(e)}")
+        writer.add(scholarship)
+        return False
 
-def extract_section(soup, header_text):
-    header = soup.find('h2', string=lambda s: s and s.strip() == header_text)
-    if not header:
-        return None
-    content = []
-    next_elem = header.find_next_sibling()
-    while next_elem:
-        if next_elem.name == 'h2':
-            break
-        if next_elem.name == 'ul':
-            items = [li.get_text(strip=True) for li in next_elem.find_all('li')]
-            content.extend(items)
-        next_elem = next_elem.find_next_sibling()
-    return content if content else None
+    content_hash = cache.changed(link, detail)
+    if content_hash:
+        scholarship = {**scholarship, **detail}
 
-def upsert_scholarship(scholarship):
-    # Separate list fields and scalar fields
-    list_fields = {
-        'academic_major', 'age', 'financial_need', 'gender',
-        'grade_point_average', 'sat_score', 'eligibility_criteria', 'qualified_based_on'
-    }
-    
-    set_data = {}
-    add_to_set = {}
-    
-    for key, value in scholarship.items():
-        if value is not None:
-            if key in list_fields:
-                if isinstance(value, list):
-                    add_to_set[key] = {"$each": value}
-                else:
-                    add_to_set[key] = {"$each": [value]}
-            else:
-                set_data[key] = value
-    
-    update_operations = {}
-    if set_data:
-        update_operations["$set"] = set_data
-    if add_to_set:
-        update_operations["$addToSet"] = add_to_set
-    
-    collection.update_one(
-        {"link": scholarship["link"]},
-        update_operations,
-        upsert=True
-    )
+    # Only mark the page cached and done once its content is written
+    def written():
+        if content_hash:
+            cache.touch(link, content_hash)
+        frontier.done(link)
+
+    writer.add(scholarship, written)
+    writer.flush_if_due()
+    return True
 
-def scrape_scholarships(url, field_name=None, field_value=None, max_count=25):
+def scrape_scholarships(url, field_name=None, field_value=None, max_count=25, cache=None, writer=None,
+                        frontier=None):
+    cache = cache or PageCache(None)
+    frontier = frontier or Frontier(":memory:")
+    own_writer = writer is None
+    if own_writer:
+        writer = BulkWriter(collection, meta_collection)
     driver = get_driver()
     driver.get(url)
     time.sleep(5)  # Let JS load for list page
 
-    soup = BeautifulSoup(driver.page_source, "lxml")
-    rows = soup.find_all('tr')
-    count = 0
-    
+    rows = parse_list_page(driver.page_source, max_count)
+    fetched = 0
+
     for row in rows:
-        if count >= max_count:
-            break
-        tds = row.find_all('td')
-        if len(tds) >= 4:
-            a_tag = tds[1].find('a')
-            amount_label = tds[2].find('label')
-            amount_span = tds[2].find('span')
-            if a_tag and amount_label and "Amount" in amount_label.text:
-                title = a_tag.text.strip()
-                link = a_tag['href'].strip()
-                full_link = "https://www.scholarships.com" + link
-                amount = amount_span.text.strip() if amount_span else None
-                due_date = tds[3].get_text(strip=True).replace("Due Date:", "").strip()
-                
-                # Scrape detailed page
-                try:
-                    driver.get(full_link)
-                    time.sleep(3)  # Wait for detail page to load
-                    detail_soup = BeautifulSoup(driver.page_source, "lxml")
-                    
-                    description = extract_description(detail_soup)
-                    details = extract_section(detail_soup, "Scholarship Details")
-                    eligibility = extract_section(detail_soup, "Eligibility Criteria")
-                except Exception as e:
-                    print(f"Error scraping details for {title}: {str(e)}")
-                    description = details = eligibility = None
+        title = row["title"]
+        link = row["link"]
+        scholarship = {
+            "title": title,
+            "link": link,
+            "amount": row["amount"],
+            "due_date": row["due_date"]
+        }
+
+        if field_name and field_value:
+            scholarship[field_name] = [field_value]
+
+        # Already scraped under another category, before a restart, or recently: only merge this category
+        if cache.seen(link) or frontier.is_done(link) or cache.is_fresh(link):
+            writer.add(scholarship)
+            print(f"Merged: {title} | {field_name}: {field_value}")
+            continue
 
-                scholarship = {
-                    "title": title,
-                    "link": full_link,
-                    "amount": amount,
-                    "due_date": due_date,
-                    "description": description,
-                    "details": details,
-                    "eligibility_criteria": eligibility
-                }
-                
-                if field_name and field_value:
-                    scholarship[field_name] = [field_value]
-                
-                upsert_scholarship(scholarship)
-                print(f"Saved: {title} | {field_name}: {field_value}")
-                count += 1
-                
-                # Return to list page
-                driver.back()
-                time.sleep(2)  # Wait for list page to reload
+        fetched += scrape_detail(driver, scholarship, cache, writer, frontier)
+        print(f"Saved: {title} | {field_name}: {field_value}")
+
+        # Return to list page
+        driver.back()
+        time.sleep(2)  # Wait for list page to reload
     driver.quit()
+    if own_writer:
+        writer.flush_now()
+    return fetched
 
-def main():
-    print("Starting Scholarship Scraper...")
+def scrape_details(scholarships, cache, writer, frontier):
+    """Retry detail pages left pending or failed by an earlier run."""
+    driver = get_driver()
+    fetched = 0
+    for scholarship in scholarships:
+        if not cache.seen(scholarship["link"]):
+            fetched += scrape_detail(driver, scholarship, cache, writer, frontier)
+    driver.quit()
+    return fetched
+
+def category_targets():
+    """(url, field_name, field_value) for every category list page to crawl."""
+    targets = []
     for idx, url in enumerate(urls):
         if idx < len(field_map):
             field_name, field_values = field_map[idx]
@@ -273,13 +261,60 @@ def main():
                 value = sat_ranges[idx - len(academic_majors) - len(age_ranges) - len(genders) - len(financial_needs) - len(gpa_ranges)]
             else:
                 value = None
-            
-            print(f"Scraping {url} with {field_name}={value}")
-            scrape_scholarships(url, field_name, value)
+            targets.append((url, field_name, value))
         else:
-            print(f"Scraping {url} with no extra field")
-            scrape_scholarships(url)
+            targets.append((url, None, None))
+    return targets
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape scholarships.com with a browser")
+    parser.add_argument("--resume", action="store_true", help="Continue the checkpointed crawl instead of starting over")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Resume, giving pages that failed another try")
+    args = parser.parse_args()
+
+    print("Starting Scholarship Scraper...")
+    started = time.perf_counter()
+    pages = 0
+    cache = PageCache()
+    # Writes happen on a background thread; the crawl loop only queues them
+    writer = ThreadedBulkWriter(collection, meta_collection)
+    writer.start()
+    frontier = Frontier()
+    if args.retry_failed:
+        frontier.retry_failed()
+    elif not args.resume:
+        frontier.reset()
+    frontier.seed(category_targets())
+    targets = frontier.targets(PENDING)
+    details = [data for _, data in frontier.items(DETAIL, PENDING)]
+    if args.resume or args.retry_failed:
+        print(f"Resuming: {len(targets)} list pages and {len(details)} detail pages left")
+    try:
+        for url, field_name, value in targets:
+            if field_name:
+                print(f"Scraping {url} with {field_name}={value}")
+            else:
+                print(f"Scraping {url} with no extra field")
+            pages += 1 + scrape_scholarships(url, field_name, value, cache=cache, writer=writer, frontier=frontier)
+
+            # Checkpoint the page once everything from it is written
+            def checkpoint(url=url):
+                cache.commit()
+                frontier.done(url)
+            writer.hand_off(then=checkpoint)
+        if details:
+            pages += scrape_details(details, cache, writer, frontier)
+    finally:
+        writer.join()
+        cache.close()
+        frontier.report()
+        frontier.close()
+    elapsed = time.perf_counter() - started
     print("Scraping complete. Merged all scholarship attributes.")
+    print(f"Fetched {pages} pages in {elapsed:.1f}s ({pages / elapsed:.2f} pages/sec)")
+    writer.report()
+    cache.report()
 
 if __name__ == "__main__":
     main()
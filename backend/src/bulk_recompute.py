@@ -0,0 +1,128 @@
+# bulk_recompute.py
+"""Recompute every user's recommendations after a catalog refresh.
+
+Users are streamed from Mongo in chunks and ranked across a process pool.
+Each worker holds its own ScoringEngine built from one snapshot of the
+catalog, and results are written back with unordered bulk_write batches.
+Run from the backend directory:
+
+    python -m src.bulk_recompute --workers 8
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Tuple
+
+from src.dal import ScholarshipDAL
+from src.migrations import DATABASE_NAME, get_client
+from src.recommendation import TOP_K
+from src.recommendation_cache import ENUM_FIELDS, profile_fingerprint
+from src.scoring_engine import ScoringEngine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Profile fields recommendations depend on
+PROFILE_FIELDS = ENUM_FIELDS + ('grade_point_average', 'sat_score', 'interests')
+
+# ---- Worker process state ----
+_engine: ScoringEngine = None
+
+def _init_worker(scholarships: List[Dict[str, Any]]):
+    global _engine
+    _engine = ScoringEngine(scholarships)
+
+def _rank_chunk(users: List[Dict[str, Any]]) -> Tuple[List[Tuple[str, List[Tuple[int, float]]]], float]:
+    """Rank a chunk of users; returns (user_id, [(catalog position, score)]) pairs and CPU seconds used."""
+    started = time.process_time()
+    results = []
+    # Users with the same fingerprint get the same ranking
+    memo: Dict[str, List[Tuple[int, float]]] = {}
+    for user in users:
+        key = profile_fingerprint(user)
+        if key not in memo:
+            memo[key] = _engine.top_k(user, TOP_K)
+        results.append((user["_id"], memo[key]))
+    return results, time.process_time() - started
+
+
+class Progress:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.started = time.perf_counter()
+        self.users = 0
+        self.written = 0
+        self.cpu_seconds = 0.0
+
+    def report(self, final: bool = False):
+        elapsed = time.perf_counter() - self.started
+        rate = self.users / elapsed if elapsed else 0.0
+        cpu_rate = self.users / self.cpu_seconds if self.cpu_seconds else 0.0
+        logger.info(
+            f"{'Done' if final else 'Progress'}: {self.users} users ranked, {self.written} updated, "
+            f"{elapsed:.1f}s elapsed, {rate:.0f} users/s, {rate / self.workers:.0f} users/s/core "
+            f"({cpu_rate:.0f} users per worker CPU-second)"
+        )
+
+
+async def recompute_all(dal: ScholarshipDAL, workers: int = os.cpu_count() or 1,
+                        chunk_size: int = 500) -> Progress:
+    """Rank every user against the current catalog and store the results."""
+    scholarships = [sch async for sch in dal.iter_scholarships()]
+    logger.info(f"Loaded {len(scholarships)} scholarships, starting {workers} workers")
+
+    progress = Progress(workers)
+    loop = asyncio.get_running_loop()
+    in_flight = set()
+
+    async def write(future):
+        results, cpu_seconds = await future
+        progress.users += len(results)
+        progress.cpu_seconds += cpu_seconds
+        progress.written += await dal.bulk_set_recommendations({
+            user_id: [(scholarships[pos], score) for pos, score in ranked] for user_id, ranked in results
+        })
+        progress.report()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(scholarships,)) as pool:
+        chunk = []
+        projection = {field: 1 for field in PROFILE_FIELDS}
+        async for user in dal.iter_profiles(projection=projection, batch_size=chunk_size):
+            chunk.append(user)
+            if len(chunk) >= chunk_size:
+                in_flight.add(asyncio.ensure_future(write(loop.run_in_executor(pool, _rank_chunk, chunk))))
+                chunk = []
+                # Bound memory: keep at most two chunks per worker outstanding
+                if len(in_flight) >= workers * 2:
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        task.result()
+        if chunk:
+            in_flight.add(asyncio.ensure_future(write(loop.run_in_executor(pool, _rank_chunk, chunk))))
+        for task in asyncio.as_completed(in_flight):
+            await task
+
+    progress.report(final=True)
+    return progress
+
+async def run(args):
+    client = get_client()
+    try:
+        db = client[DATABASE_NAME]
+        dal = ScholarshipDAL(db["users"], db["scholarships"], db["meta"])
+        await recompute_all(dal, workers=args.workers, chunk_size=args.chunk_size)
+    finally:
+        client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute all users' recommendations")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=500, help="Users per worker task and per bulk_write")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
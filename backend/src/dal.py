@@ -1,9 +1,19 @@
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorCollection
-from pymongo import ReturnDocument
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import OperationFailure
 from pydantic import BaseModel, Field, EmailStr
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
+from datetime import datetime
 from enum import Enum
+import logging
+from src.metrics import timed_methods
+from src.pagination import SORT_FIELDS, ScholarshipSort, decode_cursor, encode_cursor, keyset_filter, sort_spec
+from src.parsing import parsed_fields
+from src.profile_cache import ProfileCache
+from src.sentiment import sentiment_fields
+
+logger = logging.getLogger(__name__)
 
 # ======================== ENUMS ========================
 class AcademicMajor(str, Enum):
@@ -71,6 +81,11 @@ class SATScoreRange(str, Enum):
     SAT_1201_1400 = "SAT Scores From 1,201 To 1,400"
     SAT_1401_1600 = "SAT Scores From 1,401 To 1,600"
 
+class RecommendationStatus(str, Enum):
+    PENDING = "pending"
+    READY = "ready"
+    FAILED = "failed"
+
 # ======================== MODELS ========================
 
 class Scholarship(BaseModel):
@@ -89,10 +104,39 @@ class Scholarship(BaseModel):
     gender: Optional[List[Gender]] = None
     grade_point_average: Optional[List[GradePointAverageRange]] = None
     sat_score: Optional[List[SATScoreRange]] = None
+    # Stored documents also carry sentiment and parsed fields (src/sentiment.py,
+    # src/parsing.py). They are computed at ingest and kept out of the API so a
+    # client can neither read nor set them.
+
+    class Config:
+        populate_by_name = True
+
+class ScholarshipSummary(BaseModel):
+    """What a list view shows; the full document is fetched when a scholarship is opened."""
+    id: str = Field(alias="_id")
+    title: str
+    link: str
+    amount: Optional[str] = None
+    due_date: Optional[str] = None
+    deadline: Optional[datetime] = None
+    amount_max: Optional[float] = None
 
     class Config:
         populate_by_name = True
 
+class ScholarshipPage(BaseModel):
+    items: List[Scholarship]
+    next_cursor: Optional[str] = None
+
+class ScholarshipSummaryPage(BaseModel):
+    items: List[ScholarshipSummary]
+    next_cursor: Optional[str] = None
+
+class RecommendationRef(BaseModel):
+    scholarship_id: str
+    score: Optional[float] = None
+    computed_at: Optional[datetime] = None
+
 class UserProfile(BaseModel):
     name: str
     email: EmailStr
@@ -104,7 +148,8 @@ class UserProfile(BaseModel):
     grade_point_average: Optional[float] = Field(default=None, ge=0, le=4)
     sat_score: Optional[int] = Field(default=None, ge=0, le=1600)
     interests: Optional[List[str]] = None  
-    recommend: Optional[List[Scholarship]] = None
+    recommend: Optional[List[RecommendationRef]] = None
+    recommend_status: Optional[RecommendationStatus] = None
 
     class Config:
         populate_by_name = True
@@ -119,7 +164,6 @@ class UserProfileUpdate(BaseModel):
     grade_point_average: Optional[float] = Field(default=None, ge=0, le=4)
     sat_score: Optional[int] = Field(default=None, ge=0, le=1600)
     interests: Optional[List[str]] = None  
-    recommend: Optional[List[Scholarship]] = None
 
     class Config:
         populate_by_name = True
@@ -136,15 +180,80 @@ class UserProfileResponse(BaseModel):
     sat_score: Optional[int] = None
     interests: Optional[List[str]] = None  
     recommend: Optional[List[Scholarship]] = None
+    recommend_status: Optional[RecommendationStatus] = None
+    recommend_error: Optional[str] = None
 
     class Config:
         populate_by_name = True
 
+class RecommendationStatusResponse(BaseModel):
+    status: Optional[RecommendationStatus] = None
+    error: Optional[str] = None
+    done: bool
+
 # ================== DATA ACCESS LAYER ==================
+CATALOG_VERSION_ID = "catalog"
+
+# Scholarship fields returned when hydrating a user's recommendations
+RECOMMEND_PROJECTION = {
+    field: 1 for field in (
+        "title", "link", "amount", "due_date", "description", "details", "eligibility_criteria",
+        "qualified_based_on", "academic_major", "age", "financial_need", "gender",
+        "grade_point_average", "sat_score",
+    )
+}
+
+# Fields a list view can ask for with fields=; title and link are always returned
+SUMMARY_FIELDS = ("title", "link", "amount", "due_date", "deadline", "amount_max")
+
+def summary_projection(fields: str) -> Dict[str, int]:
+    """Projection for a comma-separated fields= value, "summary" meaning all summary fields.
+
+    Raises ValueError for fields outside the summary view.
+    """
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    if "summary" in names:
+        names = set(SUMMARY_FIELDS)
+    unknown = names - set(SUMMARY_FIELDS) - {"_id", "id"}
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    names = (names - {"_id", "id"}) | {"title", "link"}
+    return {name: 1 for name in SUMMARY_FIELDS if name in names}
+
+def range_filter(field: str, value: float) -> Dict[str, Any]:
+    """Scholarships open to a GPA or SAT score of value, the way check_eligibility decides it.
+
+    Scholarships without a requirement on field match; the others need one
+    of their parsed [lower, upper] bounds to contain value.
+    """
+    return {"$or": [
+        {field: {"$in": [None, []]}},
+        {f"{field}_bounds": {"$elemMatch": {"0": {"$lte": value}, "1": {"$gte": value}}}},
+    ]}
+
+def recommendation_refs(ranked: List[Tuple[Dict[str, Any], float]],
+                        computed_at: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Compact {scholarship_id, score, computed_at} entries for the user's recommend array."""
+    computed_at = computed_at or datetime.utcnow()
+    return [
+        {"scholarship_id": str(sch["_id"]), "score": score, "computed_at": computed_at}
+        for sch, score in ranked
+    ]
+
+@timed_methods("dal")
 class ScholarshipDAL:
-    def __init__(self, user_collection: AsyncIOMotorCollection, scholarship_collection: AsyncIOMotorCollection):
+    def __init__(self, user_collection: AsyncIOMotorCollection, scholarship_collection: AsyncIOMotorCollection,
+                 meta_collection: Optional[AsyncIOMotorCollection] = None,
+                 profile_cache: Optional[ProfileCache] = None):
         self.user_collection = user_collection
         self.scholarship_collection = scholarship_collection
+        self.meta_collection = meta_collection
+        # Shared between the per-request DAL instances; see src/profile_cache.py
+        self.profile_cache = profile_cache
+
+    def _invalidate_profile(self, user_id: str):
+        if self.profile_cache is not None:
+            self.profile_cache.invalidate(user_id)
 
     # User Operations
     async def add_profile(self, user_data: UserProfile) -> str:
@@ -153,16 +262,44 @@ class ScholarshipDAL:
         return str(result.inserted_id)
 
     async def fetch_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
+        cache = self.profile_cache
+        if cache is not None:
+            cached = cache.get(user_id)
+            if cached is not None:
+                return cached
+            generation = cache.generation
         user = await self.user_collection.find_one({"_id": ObjectId(user_id)})
         if user:
             # Convert _id to string
             user["_id"] = str(user["_id"])
-            # Convert recommend scholarships' _id to strings
-            if "recommend" in user and isinstance(user["recommend"], list):
-                for sch in user["recommend"]:
-                    if "_id" in sch:
-                        sch["_id"] = str(sch["_id"])
             user.pop("password", None)
+            await self.hydrate_recommendations(user)
+            if cache is not None:
+                cache.set(user_id, user, generation)
+        return user
+
+    async def fetch_credentials(self, email: str) -> Optional[Dict[str, Any]]:
+        """_id and password hash of the user with this email, from the unique email index."""
+        user = await self.user_collection.find_one({"email": email}, {"password": 1})
+        if user:
+            user["_id"] = str(user["_id"])
+        return user
+
+    async def hydrate_recommendations(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        """Replace the user's recommendation refs with scholarship documents, in rank order."""
+        recommend = user.get("recommend")
+        if not isinstance(recommend, list):
+            return user
+        refs = [entry["scholarship_id"] for entry in recommend if "scholarship_id" in entry]
+        if refs:
+            found = {sch["_id"]: sch for sch in await self.fetch_scholarships_by_ids(refs, RECOMMEND_PROJECTION)}
+            # Scholarships deleted since the ranking was computed are dropped
+            user["recommend"] = [found[sch_id] for sch_id in refs if sch_id in found]
+        else:
+            # Profiles not yet migrated still embed full documents
+            for sch in recommend:
+                if "_id" in sch:
+                    sch["_id"] = str(sch["_id"])
         return user
 
     async def modify_profile(self, user_id: str, update_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -176,43 +313,182 @@ class ScholarshipDAL:
             {"$set": update_data},
             return_document=ReturnDocument.AFTER
         )
+        self._invalidate_profile(user_id)
         if result:
             result["_id"] = str(result["_id"])
             result.pop("password", None)
+            await self.hydrate_recommendations(result)
         return result
 
+    async def set_password(self, user_id: str, password_hash: str):
+        await self.user_collection.update_one({"_id": ObjectId(user_id)}, {"$set": {"password": password_hash}})
+
+    async def set_recommendations(self, user_id: str, ranked: List[Tuple[Dict[str, Any], float]]):
+        await self.user_collection.update_one(
+            {"_id": ObjectId(user_id)},
+            {"$set": {"recommend": recommendation_refs(ranked), "recommend_status": RecommendationStatus.READY.value},
+             "$unset": {"recommend_error": ""}}
+        )
+        self._invalidate_profile(user_id)
+
+    async def set_recommendation_status(self, user_id: str, status: RecommendationStatus, error: Optional[str] = None):
+        await self.user_collection.update_one(
+            {"_id": ObjectId(user_id)},
+            {"$set": {"recommend_status": status.value, "recommend_error": error}}
+        )
+        self._invalidate_profile(user_id)
+
+    async def bulk_set_recommendations(self, recommendations: Dict[str, List[Tuple[Dict[str, Any], float]]]) -> int:
+        """Write many users' recommendations in one unordered bulk_write."""
+        if not recommendations:
+            return 0
+        computed_at = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"_id": ObjectId(user_id)},
+                {"$set": {"recommend": recommendation_refs(ranked, computed_at),
+                          "recommend_status": RecommendationStatus.READY.value},
+                 "$unset": {"recommend_error": ""}}
+            )
+            for user_id, ranked in recommendations.items()
+        ]
+        result = await self.user_collection.bulk_write(operations, ordered=False)
+        for user_id in recommendations:
+            self._invalidate_profile(user_id)
+        return result.modified_count
+
+    async def iter_profiles(self, projection: Optional[Dict[str, Any]] = None,
+                            batch_size: int = 1000) -> AsyncIterator[Dict[str, Any]]:
+        """Stream user profiles, without passwords, batch_size documents per round trip."""
+        cursor = self.user_collection.find({}, projection).batch_size(batch_size)
+        async for user in cursor:
+            user["_id"] = str(user["_id"])
+            user.pop("password", None)
+            yield user
+
+    async def iter_user_ids(self, filters: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        async for user in self.user_collection.find(filters or {}, {"_id": 1}):
+            yield str(user["_id"])
+
     async def delete_profile(self, user_id: str) -> bool:
         result = await self.user_collection.delete_one({"_id": ObjectId(user_id)})
+        self._invalidate_profile(user_id)
         return result.deleted_count > 0
 
     # Scholarship Operations
     async def add_scholarship(self, scholarship_data: Scholarship) -> str:
         scholarship_dict = scholarship_data.model_dump(by_alias=True)
+        scholarship_dict.update(sentiment_fields(scholarship_dict, force=True))
+        scholarship_dict.update(parsed_fields(scholarship_dict))
         result = await self.scholarship_collection.insert_one(scholarship_dict)
+        await self.bump_catalog_version()
         return str(result.inserted_id)
 
+    async def delete_scholarship(self, scholarship_id: str) -> bool:
+        keys = [scholarship_id] + ([ObjectId(scholarship_id)] if ObjectId.is_valid(scholarship_id) else [])
+        result = await self.scholarship_collection.delete_one({"_id": {"$in": keys}})
+        if result.deleted_count > 0:
+            await self.bump_catalog_version()
+        return result.deleted_count > 0
+
     async def fetch_scholarship(self, link: str) -> Optional[Dict[str, Any]]:
         sch = await self.scholarship_collection.find_one({"link": link})
         if sch:
             sch["_id"] = str(sch["_id"])
         return sch
 
-    async def fetch_all_scholarships(self, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
-        cursor = self.scholarship_collection.find({}).skip(skip).limit(limit)
+    async def fetch_all_scholarships(self, skip: int = 0, limit: int = 100,
+                                     projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        cursor = self.scholarship_collection.find({}, projection).skip(skip).limit(limit)
         scholarships = await cursor.to_list(length=limit)
         for sch in scholarships:
             sch["_id"] = str(sch["_id"])
         return scholarships
 
-    async def search_scholarships(self, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
-        cursor = self.scholarship_collection.find(filters)
-        scholarships = await cursor.to_list(length=1000)
+    async def fetch_scholarships_page(self, limit: int = 100, sort: ScholarshipSort = ScholarshipSort.ID,
+                                      descending: bool = False,
+                                      cursor: Optional[str] = None,
+                                      projection: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page in (sort field, _id) order after the cursor, plus the cursor for the next page.
+
+        Raises InvalidCursor for tokens that don't decode or were issued for another sort.
+        """
+        after = decode_cursor(cursor, sort, descending) if cursor else None
+        if projection is not None:
+            # The next cursor is built from the sort field of the last document
+            projection = {**projection, SORT_FIELDS[sort]: 1}
+        query = self.scholarship_collection.find(keyset_filter(sort, descending, after), projection)
+        # One extra document tells whether there is a next page
+        scholarships = await query.sort(sort_spec(sort, descending)).limit(limit + 1).to_list(length=limit + 1)
+        next_cursor = encode_cursor(sort, descending, scholarships[limit - 1]) if len(scholarships) > limit else None
+        scholarships = scholarships[:limit]
+        for sch in scholarships:
+            sch["_id"] = str(sch["_id"])
+        return scholarships, next_cursor
+
+    async def iter_scholarships(self, projection: Optional[Dict[str, Any]] = None,
+                                batch_size: int = 500) -> AsyncIterator[Dict[str, Any]]:
+        """Stream every scholarship in natural order, batch_size documents per round trip."""
+        cursor = self.scholarship_collection.find({}, projection).batch_size(batch_size)
+        async for sch in cursor:
+            sch["_id"] = str(sch["_id"])
+            yield sch
+
+    async def fetch_scholarships_by_ids(self, ids: List[str],
+                                        projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Fetch scholarships by string _id in one $in query, in no particular order."""
+        if not ids:
+            return []
+        # Scraped documents have ObjectId keys, API-created ones keep the client's string
+        keys = list(ids) + [ObjectId(i) for i in ids if ObjectId.is_valid(i)]
+        cursor = self.scholarship_collection.find({"_id": {"$in": keys}}, projection)
+        scholarships = await cursor.to_list(length=len(keys))
         for sch in scholarships:
             sch["_id"] = str(sch["_id"])
         return scholarships
 
+    async def search_scholarships(self, filters: Dict[str, Any], projection: Optional[Dict[str, Any]] = None,
+                                  skip: int = 0, limit: int = 1000) -> List[Dict[str, Any]]:
+        # Sorted on _id so skip/limit pages are stable
+        cursor = self.scholarship_collection.find(filters, projection).sort("_id", 1).skip(skip).limit(limit)
+        scholarships = await cursor.to_list(length=limit)
+        for sch in scholarships:
+            sch["_id"] = str(sch["_id"])
+        return scholarships
+
+    async def fetch_scholarship_ids(self, filters: Dict[str, Any]) -> List[str]:
+        cursor = self.scholarship_collection.find(filters, {"_id": 1})
+        return [str(sch["_id"]) async for sch in cursor]
+
+    # Catalog Version
+    # Bumped on every catalog write (here and in the scraper) so cached
+    # recommendation state can be keyed on it across workers.
+    async def catalog_version(self) -> int:
+        if self.meta_collection is None:
+            return 0
+        meta = await self.meta_collection.find_one({"_id": CATALOG_VERSION_ID})
+        return meta.get("version", 0) if meta else 0
+
+    async def bump_catalog_version(self):
+        # Cached profiles embed scholarship documents
+        if self.profile_cache is not None:
+            self.profile_cache.clear()
+        if self.meta_collection is None:
+            return
+        await self.meta_collection.update_one(
+            {"_id": CATALOG_VERSION_ID},
+            {"$inc": {"version": 1}},
+            upsert=True
+        )
+
     # Index Management
     async def create_indexes(self):
+        try:
+            await self.user_collection.create_index("email", unique=True)
+        except OperationFailure as e:
+            # Existing duplicate emails block the unique index; still index the lookups
+            logger.warning(f"Could not create unique index on users.email, using a plain one: {e}")
+            await self.user_collection.create_index("email")
         await self.scholarship_collection.create_index("link", unique=True)
         await self.scholarship_collection.create_index("academic_major")
         await self.scholarship_collection.create_index("age")
@@ -220,3 +496,6 @@ class ScholarshipDAL:
         await self.scholarship_collection.create_index("financial_need")
         await self.scholarship_collection.create_index("grade_point_average")
         await self.scholarship_collection.create_index("sat_score")
+        # Keyset pagination sorts on (field, _id); the compound indexes also serve plain field lookups
+        await self.scholarship_collection.create_index([("deadline", 1), ("_id", 1)])
+        await self.scholarship_collection.create_index([("amount_max", 1), ("_id", 1)])
@@ -0,0 +1,155 @@
+# eligibility_index.py
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+from datetime import datetime
+import bisect
+from src.parsing import get_deadline, get_range_bounds
+
+# Set-bit positions for every byte value, used to decode bitsets quickly.
+_BYTE_POSITIONS = [tuple(i for i in range(8) if byte >> i & 1) for byte in range(256)]
+
+
+def _value(value: Any) -> Any:
+    """Unwrap enum members so lookups work for both enums and raw strings."""
+    return getattr(value, "value", value)
+
+
+def _as_list(values: Any) -> List[Any]:
+    return values if isinstance(values, list) else [values]
+
+
+class EligibilityIndex:
+    """Bitset index over the scholarship catalog for eligibility lookups.
+
+    Bit ``i`` of every posting list refers to ``scholarships[i]``. A user's
+    candidate set is the intersection of the posting lists for their profile
+    values, which gives the same result as running ``check_eligibility`` on
+    every scholarship.
+    """
+
+    ENUM_FIELDS = ('academic_major', 'age', 'financial_need', 'gender')
+    RANGE_FIELDS = ('grade_point_average', 'sat_score')
+
+    def __init__(self, scholarships: Iterable[Dict[str, Any]]):
+        self.scholarships = list(scholarships)
+        self.size = len(self.scholarships)
+        self.all_bits = (1 << self.size) - 1
+
+        # Enum fields: one posting list per value, plus the scholarships
+        # that have no requirement on the field at all.
+        self.postings: Dict[str, Dict[str, int]] = {f: {} for f in self.ENUM_FIELDS}
+        self.unrestricted: Dict[str, int] = {f: 0 for f in self.ENUM_FIELDS + self.RANGE_FIELDS}
+
+        # Range fields: (lower, upper, bits) per distinct range.
+        self.intervals: Dict[str, List[Tuple[float, float, int]]] = {}
+
+        # Deadlines: unparseable dates are never eligible, the rest expire over time.
+        self.invalid_deadline_bits = 0
+        self._deadlines: List[Tuple[datetime, int]] = []
+        self._expired_bits = 0
+        self._expired_count = 0
+
+        range_bits: Dict[str, Dict[Tuple[float, float], int]] = {f: {} for f in self.RANGE_FIELDS}
+
+        for pos, scholarship in enumerate(self.scholarships):
+            bit = 1 << pos
+            self._index_deadline(scholarship, pos, bit)
+
+            for field in self.ENUM_FIELDS:
+                values = scholarship.get(field)
+                if values is None:
+                    self.unrestricted[field] |= bit
+                    continue
+                postings = self.postings[field]
+                for value in _as_list(values):
+                    value = _value(value)
+                    postings[value] = postings.get(value, 0) | bit
+
+            for field in self.RANGE_FIELDS:
+                ranges = scholarship.get(field)
+                if not ranges:
+                    self.unrestricted[field] |= bit
+                    continue
+                for lower, upper in get_range_bounds(scholarship, field):
+                    key = (lower, upper)
+                    range_bits[field][key] = range_bits[field].get(key, 0) | bit
+
+        for field, by_range in range_bits.items():
+            intervals = [(lower, upper, bits) for (lower, upper), bits in by_range.items()]
+            intervals.sort(key=lambda interval: interval[0])
+            self.intervals[field] = intervals
+
+        self._deadlines.sort(key=lambda entry: entry[0])
+        self._deadline_keys = [deadline for deadline, _ in self._deadlines]
+
+    def _index_deadline(self, scholarship: Dict[str, Any], pos: int, bit: int):
+        if not scholarship.get('due_date'):
+            return
+        deadline = get_deadline(scholarship)
+        if deadline is None:
+            self.invalid_deadline_bits |= bit
+            return
+        self._deadlines.append((deadline, pos))
+
+    def open_bits(self, now: Optional[datetime] = None) -> int:
+        """Bitset of scholarships whose deadline is valid and has not passed."""
+        now = now or datetime.now()
+        expired_count = bisect.bisect_left(self._deadline_keys, now)
+        if expired_count < self._expired_count:
+            # Clock moved backwards (or an explicit earlier ``now``); rebuild.
+            self._expired_bits = 0
+            self._expired_count = 0
+        for _, pos in self._deadlines[self._expired_count:expired_count]:
+            self._expired_bits |= 1 << pos
+        self._expired_count = expired_count
+        return self.all_bits & ~self.invalid_deadline_bits & ~self._expired_bits
+
+    def range_bits(self, field: str, user_value: float) -> int:
+        """Bitset of scholarships whose ``field`` ranges admit ``user_value``."""
+        bits = self.unrestricted[field]
+        for lower, upper, interval_bits in self.intervals.get(field, []):
+            if lower > user_value:
+                break
+            if user_value <= upper:
+                bits |= interval_bits
+        return bits
+
+    def candidate_bits(self, user: Dict[str, Any], now: Optional[datetime] = None) -> int:
+        """Bitset of scholarships the user is eligible for."""
+        bits = self.open_bits(now)
+
+        for field in self.ENUM_FIELDS:
+            user_value = user.get(field)
+            if user_value is not None:
+                bits &= self.unrestricted[field] | self.postings[field].get(_value(user_value), 0)
+            if not bits:
+                return 0
+
+        for field in self.RANGE_FIELDS:
+            user_value = user.get(field)
+            if user_value:
+                bits &= self.range_bits(field, user_value)
+            if not bits:
+                return 0
+
+        return bits
+
+    def candidate_positions(self, user: Dict[str, Any], now: Optional[datetime] = None) -> List[int]:
+        """Catalog positions of eligible scholarships, in catalog order."""
+        return bits_to_positions(self.candidate_bits(user, now))
+
+    def candidates(self, user: Dict[str, Any], now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Eligible scholarships, in catalog order."""
+        return [self.scholarships[pos] for pos in self.candidate_positions(user, now)]
+
+
+def bits_to_positions(bits: int) -> List[int]:
+    """Decode a bitset into the ascending list of its set-bit positions."""
+    if not bits:
+        return []
+    positions = []
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    for byte_idx, byte in enumerate(data):
+        if byte:
+            base = byte_idx * 8
+            positions.extend(base + offset for offset in _BYTE_POSITIONS[byte])
+    return positions
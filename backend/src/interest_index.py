@@ -0,0 +1,95 @@
+# interest_index.py
+from typing import Dict, List, Iterable, Optional
+from collections import OrderedDict
+import numpy as np
+
+
+class InterestIndex:
+    """Inverted token index over the pre-lowercased scholarship texts.
+
+    ``texts`` are the lowercased scholarship texts, one per catalog position.
+    Each distinct whitespace-separated token maps to the positions whose
+    text contains it, stored as one CSR array. Matching keeps the substring
+    semantics of ``calculate_interest_score``: a text containing an interest
+    contains the interest's longest non-space run inside one of its tokens,
+    so the candidates are the postings of the vocabulary tokens containing
+    that run. A one-word interest needs nothing more; others are confirmed
+    with the same ``in`` test on the candidates only. Only blank interests
+    fall back to scanning every text.
+
+    Matches are cached per interest as sorted positions, bounded by
+    ``max_bytes`` in total.
+    """
+
+    def __init__(self, texts: List[str], max_bytes: int = 32 * 1024 * 1024):
+        self.texts = texts
+        self.size = len(texts)
+        self.max_bytes = max_bytes
+
+        vocabulary: Dict[str, int] = {}
+        token_ids: List[int] = []
+        doc_ids: List[int] = []
+        for position, text in enumerate(texts):
+            ids = [vocabulary.setdefault(token, len(vocabulary)) for token in set(text.split())]
+            token_ids.extend(ids)
+            doc_ids.extend([position] * len(ids))
+        tokens = np.array(token_ids, dtype=np.int64)
+        docs = np.array(doc_ids, dtype=np.int32)
+        order = np.argsort(tokens, kind="stable")
+        # postings[offsets[t]:offsets[t + 1]] are the positions containing token t, ascending
+        self.postings = docs[order]
+        self.offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(tokens, minlength=len(vocabulary)), out=self.offsets[1:])
+        self.vocabulary = list(vocabulary)
+
+        self._matches: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cached_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _candidates(self, run: str) -> np.ndarray:
+        """Positions whose text has a token containing ``run``."""
+        slices = [self.postings[self.offsets[i]:self.offsets[i + 1]]
+                  for i, token in enumerate(self.vocabulary) if run in token]
+        if not slices:
+            return np.zeros(0, dtype=np.int32)
+        return slices[0] if len(slices) == 1 else np.unique(np.concatenate(slices))
+
+    def _find(self, term: str) -> np.ndarray:
+        runs = term.split()
+        if not runs:
+            return np.flatnonzero([term in text for text in self.texts]).astype(np.int32)
+        run = max(runs, key=len)
+        candidates = self._candidates(run)
+        if run == term:
+            return candidates
+        return np.array([p for p in candidates if term in self.texts[p]], dtype=np.int32)
+
+    def matches(self, interest: str) -> np.ndarray:
+        """Sorted positions of the texts that contain ``interest``."""
+        term = interest.lower()
+        found: Optional[np.ndarray] = self._matches.get(term)
+        if found is not None:
+            self.hits += 1
+            self._matches.move_to_end(term)
+            return found
+
+        self.misses += 1
+        found = self._find(term)
+        self._matches[term] = found
+        self._cached_bytes += found.nbytes
+        while self._cached_bytes > self.max_bytes and len(self._matches) > 1:
+            _, evicted = self._matches.popitem(last=False)
+            self._cached_bytes -= evicted.nbytes
+        return found
+
+    def match_counts(self, interests: Iterable[str], positions: np.ndarray) -> np.ndarray:
+        """Number of ``interests`` found in the text at each of ``positions``.
+
+        Repeated interests count once per occurrence in the list, matching the
+        per-document scorer.
+        """
+        hits = np.zeros(self.size, dtype=np.float64)
+        for interest in interests:
+            hits[self.matches(interest)] += 1
+        return hits[positions]
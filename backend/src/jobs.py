@@ -0,0 +1,119 @@
+# jobs.py
+from typing import Callable, Dict, List, Optional, Set
+import asyncio
+import logging
+
+from src.dal import ScholarshipDAL, RecommendationStatus
+from src.recommendation import compute_recommendations
+
+logger = logging.getLogger(__name__)
+
+
+class RecommendationJobQueue:
+    """In-process queue that recomputes users' recommendations in the background.
+
+    Jobs are coalesced per user: enqueueing a user who is already queued is a
+    no-op, since the job reads the latest profile when it starts, and
+    enqueueing a user whose job is running schedules exactly one rerun.
+    Outcomes are written to the profile's ``recommend_status`` and
+    ``recommend_error`` fields.
+    """
+
+    def __init__(self, dal_factory: Callable[[], ScholarshipDAL], workers: int = 2):
+        self.dal_factory = dal_factory
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._queued: Set[str] = set()
+        self._running: Set[str] = set()
+        self._rerun: Set[str] = set()
+        self._done: Dict[str, asyncio.Event] = {}
+        self.completed = 0
+        self.failed = 0
+        self.coalesced = 0
+
+    async def start(self, recover: bool = True):
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if recover:
+            # Jobs still pending from a previous process were lost on shutdown
+            dal = self.dal_factory()
+            async for user_id in dal.iter_user_ids({"recommend_status": RecommendationStatus.PENDING.value}):
+                self.enqueue(user_id)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def is_active(self, user_id: str) -> bool:
+        return user_id in self._queued or user_id in self._running
+
+    def enqueue(self, user_id: str):
+        """Schedule a recomputation for the user, coalescing with outstanding work."""
+        if user_id in self._queued:
+            self.coalesced += 1
+            return
+        if user_id in self._running:
+            self.coalesced += 1
+            self._rerun.add(user_id)
+            return
+        self._done.setdefault(user_id, asyncio.Event())
+        self._queued.add(user_id)
+        self._queue.put_nowait(user_id)
+
+    async def wait(self, user_id: str, timeout: Optional[float] = None) -> bool:
+        """Wait until the user has no queued or running job. Returns False on timeout."""
+        event = self._done.get(user_id)
+        if event is None:
+            return True
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _worker(self):
+        while True:
+            user_id = await self._queue.get()
+            self._queued.discard(user_id)
+            self._running.add(user_id)
+            try:
+                await self.run(user_id)
+            except Exception as e:
+                logger.error(f"Recommendation job for user {user_id} could not record its outcome: {str(e)}")
+            finally:
+                self._running.discard(user_id)
+                self._queue.task_done()
+                if user_id in self._rerun:
+                    self._rerun.discard(user_id)
+                    self.enqueue(user_id)
+                else:
+                    event = self._done.pop(user_id, None)
+                    if event:
+                        event.set()
+
+    async def run(self, user_id: str):
+        """Recompute and store one user's recommendations, recording the outcome."""
+        dal = self.dal_factory()
+        try:
+            user = await dal.fetch_profile(user_id)
+            if user is None:
+                return
+            recommendations = await compute_recommendations(user, dal)
+            await dal.set_recommendations(user_id, recommendations)
+            self.completed += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Recommendation job for user {user_id} failed: {str(e)}", exc_info=True)
+            await dal.set_recommendation_status(user_id, RecommendationStatus.FAILED, error=str(e))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": len(self._queued),
+            "running": len(self._running),
+            "completed": self.completed,
+            "failed": self.failed,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,175 @@
+# metrics.py
+"""Latency histograms, timing spans and their Prometheus text rendering.
+
+``span(name)`` times a block into the ``span_duration_seconds`` histogram
+and, inside a request started with ``request_spans()``, into the list the
+server turns into a Server-Timing header. ``timed_methods`` wraps every
+coroutine method of a class in a span, which is how ScholarshipDAL calls
+are timed; DAL spans slower than SLOW_QUERY_MS are also logged.
+"""
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+import bisect
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# DAL calls at least this slow are logged; 0 turns the log off
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # One count per bucket plus the +Inf overflow, not cumulative
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Labelled histograms, rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self.histograms: Dict[str, Dict[LabelSet, Histogram]] = {}
+        self.help: Dict[str, str] = {}
+        # Counters and gauges read from their owner at render time
+        self.callbacks: Dict[str, Tuple[str, Callable[[], float]]] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, help_text: str):
+        self.help[name] = help_text
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def register(self, name: str, metric_type: str, help_text: str, collect: Callable[[], float]):
+        """Expose collect() as a "counter" or "gauge" called name."""
+        self.help[name] = help_text
+        self.callbacks[name] = (metric_type, collect)
+
+    def get(self, name: str, **labels: str) -> Optional[Histogram]:
+        return self.histograms.get(name, {}).get(tuple(sorted(labels.items())))
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.histograms.items()):
+                if name in self.help:
+                    lines.append(f"# HELP {name} {self.help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(labels)} {histogram.sum!r}")
+                    lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+        for name, (metric_type, collect) in sorted(self.callbacks.items()):
+            lines.append(f"# HELP {name} {self.help[name]}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.append(f"{name} {float(collect())!r}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: LabelSet) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels) + "}"
+
+
+registry = Registry()
+registry.describe("http_request_duration_seconds", "Request latency by method, route and status")
+registry.describe("span_duration_seconds", "Latency of DAL calls and recommendation stages")
+
+# Spans of the current request, None outside a request
+_request_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_spans", default=None)
+
+
+@contextmanager
+def request_spans() -> Iterator[List[Tuple[str, float]]]:
+    """Collect the (name, seconds) of every span finished in this context."""
+    spans: List[Tuple[str, float]] = []
+    token = _request_spans.set(spans)
+    try:
+        yield spans
+    finally:
+        _request_spans.reset(token)
+
+
+def record_span(name: str, seconds: float):
+    registry.observe("span_duration_seconds", seconds, span=name)
+    spans = _request_spans.get()
+    if spans is not None:
+        spans.append((name, seconds))
+    if SLOW_QUERY_MS and name.startswith("dal.") and seconds * 1000 >= SLOW_QUERY_MS:
+        logger.warning(f"Slow query: {name} took {seconds * 1000:.1f} ms")
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - started)
+
+
+def timed(name: str) -> Callable:
+    """Decorator running a coroutine function inside a span."""
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def timed_methods(prefix: str) -> Callable[[type], type]:
+    """Class decorator timing every public coroutine method as ``prefix.method``.
+
+    Async generators are left alone: their time is spent in the consumer's
+    loop as much as in the database.
+    """
+    def decorate(cls: type) -> type:
+        for attr, fn in list(vars(cls).items()):
+            if not attr.startswith("_") and inspect.iscoroutinefunction(fn):
+                setattr(cls, attr, timed(f"{prefix}.{attr}")(fn))
+        return cls
+    return decorate
+
+
+def server_timing(spans: List[Tuple[str, float]], total: float) -> str:
+    """Server-Timing header value: the total, then each span name with its summed duration."""
+    durations: Dict[str, float] = {}
+    for name, seconds in spans:
+        durations[name] = durations.get(name, 0.0) + seconds
+    entries = [("total", total)] + list(durations.items())
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in entries)
@@ -0,0 +1,122 @@
+# migrations.py
+"""One-off batch jobs that backfill derived fields on existing documents.
+
+Run from the backend directory, e.g.:
+
+    python -m src.migrations sentiment
+    python -m src.migrations numeric
+    python -m src.migrations recommend-refs
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+import certifi
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from src.dal import recommendation_refs
+from src.recommendation import calculate_grant_score, calculate_interest_score, calculate_sentiment_score
+from src.parsing import SOURCE_FIELDS, PARSED_FIELDS, parsed_fields, stale_parsed_fields
+from src.sentiment import TEXT_FIELDS, sentiment_fields
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "scholarship_db")
+
+def get_client() -> AsyncIOMotorClient:
+    return AsyncIOMotorClient(MONGODB_URI, tls=True, tlsCAFile=certifi.where())
+
+async def backfill(db, name: str, fields: Iterable[str],
+                   derive: Callable[[Dict[str, Any]], Dict[str, Any]], batch_size: int = 500,
+                   collection: str = "scholarships", filters: Optional[Dict[str, Any]] = None) -> int:
+    """Stream documents and $set whatever ``derive`` returns for each one."""
+    projection = {field: 1 for field in fields}
+    cursor = db[collection].find(filters or {}, projection).batch_size(batch_size)
+
+    operations = []
+    scanned = updated = 0
+    started = time.perf_counter()
+    async for scholarship in cursor:
+        scanned += 1
+        derived = derive(scholarship)
+        if derived:
+            operations.append(UpdateOne({"_id": scholarship["_id"]}, {"$set": derived}))
+        if len(operations) >= batch_size:
+            result = await db[collection].bulk_write(operations, ordered=False)
+            updated += result.modified_count
+            operations = []
+            logger.info(f"{name} backfill: {scanned} scanned, {updated} updated")
+    if operations:
+        result = await db[collection].bulk_write(operations, ordered=False)
+        updated += result.modified_count
+
+    logger.info(f"{name} backfill done: {scanned} scanned, {updated} updated "
+                f"in {time.perf_counter() - started:.1f}s")
+    return updated
+
+async def backfill_sentiment(db, batch_size: int = 500, force: bool = False) -> int:
+    """Compute sentiment scores for scholarships that are unscored or stale."""
+    return await backfill(
+        db, "Sentiment", TEXT_FIELDS + ('sentiment_score', 'sentiment_hash'),
+        lambda scholarship: sentiment_fields(scholarship, force=force),
+        batch_size=batch_size
+    )
+
+async def backfill_numeric(db, batch_size: int = 500, force: bool = False) -> int:
+    """Parse deadlines, amounts and GPA/SAT bounds for scholarships missing them."""
+    return await backfill(
+        db, "Numeric", SOURCE_FIELDS + PARSED_FIELDS,
+        parsed_fields if force else stale_parsed_fields,
+        batch_size=batch_size
+    )
+
+def embedded_to_refs(user: Dict[str, Any], computed_at: datetime) -> Dict[str, Any]:
+    """Convert a user's embedded recommendation documents to id+score refs."""
+    recommend = user.get("recommend") or []
+    if not recommend or all("scholarship_id" in entry for entry in recommend):
+        return {}
+    ranked = [
+        (sch, calculate_grant_score(sch) + calculate_interest_score(user, sch) + calculate_sentiment_score(sch))
+        for sch in recommend if "_id" in sch
+    ]
+    return {"recommend": recommendation_refs(ranked, computed_at)}
+
+async def migrate_recommend_refs(db, batch_size: int = 500) -> int:
+    """Replace embedded scholarship documents in users' recommend arrays with refs."""
+    computed_at = datetime.utcnow()
+    return await backfill(
+        db, "Recommend refs", ("recommend", "interests"),
+        lambda user: embedded_to_refs(user, computed_at),
+        batch_size=batch_size, collection="users", filters={"recommend._id": {"$exists": True}}
+    )
+
+async def run(args):
+    client = get_client()
+    try:
+        db = client[DATABASE_NAME]
+        if args.command == "sentiment":
+            await backfill_sentiment(db, batch_size=args.batch_size, force=args.force)
+        elif args.command == "numeric":
+            await backfill_numeric(db, batch_size=args.batch_size, force=args.force)
+        elif args.command == "recommend-refs":
+            await migrate_recommend_refs(db, batch_size=args.batch_size)
+    finally:
+        client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill derived fields and migrate stored documents")
+    parser.add_argument("command", choices=["sentiment", "numeric", "recommend-refs"])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--force", action="store_true", help="Recompute even if the stored value is current")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# pagination.py
+"""Keyset pagination over the scholarship catalog.
+
+A page continues after the last document of the previous one instead of
+skipping over everything before it, so each page is one index range scan
+on (sort field, _id). The position is handed to clients as an opaque
+base64 cursor.
+
+Mongo sorts missing/null values before any other value, strings before
+ObjectIds, and $gt/$lt only compare values of the same type, so the
+filters below spell out the crossings between those groups.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from enum import Enum
+import base64
+import binascii
+import json
+from bson import ObjectId
+
+
+class ScholarshipSort(str, Enum):
+    ID = "id"
+    DEADLINE = "deadline"
+    AMOUNT = "amount"
+
+# Stored field behind each sort option; each has an index on (field, _id)
+SORT_FIELDS = {
+    ScholarshipSort.ID: "_id",
+    ScholarshipSort.DEADLINE: "deadline",
+    ScholarshipSort.AMOUNT: "amount_max",
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort: ScholarshipSort, descending: bool, doc: Dict[str, Any]) -> str:
+    """Cursor pointing just past doc, a raw document with its original _id."""
+    field = SORT_FIELDS[sort]
+    value = doc.get(field) if field != "_id" else None
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    state = {
+        "s": sort.value,
+        "d": descending,
+        "v": value,
+        "i": str(doc["_id"]),
+        "o": isinstance(doc["_id"], ObjectId),
+    }
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: ScholarshipSort, descending: bool) -> Tuple[Any, Any]:
+    """(sort value, _id) of the last document seen; raises InvalidCursor."""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if state["s"] != sort.value or state["d"] != descending:
+            raise InvalidCursor("Cursor was issued for a different sort order")
+        last_id = ObjectId(state["i"]) if state["o"] else state["i"]
+        value = state["v"]
+        if value is not None and sort == ScholarshipSort.DEADLINE:
+            value = datetime.fromisoformat(value)
+        elif value is not None and sort == ScholarshipSort.AMOUNT:
+            value = float(value)
+        return value, last_id
+    except InvalidCursor:
+        raise
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+        raise InvalidCursor("Malformed cursor") from e
+
+
+def _after_id(last_id: Any, descending: bool) -> Dict[str, Any]:
+    """Documents whose _id comes after last_id in the sort order."""
+    if not descending:
+        if isinstance(last_id, ObjectId):
+            return {"_id": {"$gt": last_id}}
+        return {"$or": [{"_id": {"$gt": last_id}}, {"_id": {"$type": "objectId"}}]}
+    if isinstance(last_id, ObjectId):
+        return {"$or": [{"_id": {"$lt": last_id}}, {"_id": {"$type": "string"}}]}
+    return {"_id": {"$lt": last_id}}
+
+
+def keyset_filter(sort: ScholarshipSort, descending: bool, after: Optional[Tuple[Any, Any]]) -> Dict[str, Any]:
+    """Query for the documents after the (value, _id) position, in the given order."""
+    if after is None:
+        return {}
+    value, last_id = after
+    field = SORT_FIELDS[sort]
+    if field == "_id":
+        return _after_id(last_id, descending)
+
+    same_value = {"$and": [{field: value}, _after_id(last_id, descending)]}
+    if value is None:
+        # Nulls sort first ascending, last descending
+        if descending:
+            return same_value
+        return {"$or": [same_value, {field: {"$ne": None}}]}
+    past_value = {field: {"$lt" if descending else "$gt": value}}
+    if descending:
+        return {"$or": [past_value, same_value, {field: None}]}
+    return {"$or": [past_value, same_value]}
+
+
+def sort_spec(sort: ScholarshipSort, descending: bool) -> List[Tuple[str, int]]:
+    direction = -1 if descending else 1
+    field = SORT_FIELDS[sort]
+    if field == "_id":
+        return [("_id", direction)]
+    return [(field, direction), ("_id", direction)]
@@ -0,0 +1,86 @@
+# parsing.py
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime
+import re
+
+# Source string fields and the numeric fields parsed from them at ingest
+SOURCE_FIELDS = ('due_date', 'amount', 'grade_point_average', 'sat_score')
+PARSED_FIELDS = ('deadline', 'amount_max', 'grade_point_average_bounds', 'sat_score_bounds')
+RANGE_BOUNDS_FIELDS = {
+    'grade_point_average': 'grade_point_average_bounds',
+    'sat_score': 'sat_score_bounds',
+}
+
+DUE_DATE_FORMAT = "%B %d, %Y"  # "June 07, 2025"
+
+def parse_deadline(date_str: Optional[str]) -> Optional[datetime]:
+    """Parse a due date string, returning None if it is missing or malformed."""
+    if not date_str:
+        return None
+    try:
+        return datetime.strptime(date_str, DUE_DATE_FORMAT)
+    except ValueError:
+        return None
+
+def parse_max_amount(amount_str: Optional[str]) -> Optional[float]:
+    """Largest dollar figure in an amount string such as "$500 - $2,500"."""
+    if not amount_str:
+        return None
+    numbers = re.findall(r"[\d,]+", amount_str)
+    if not numbers:
+        return None
+    try:
+        return max(float(num.replace(',', '')) for num in numbers)
+    except ValueError:
+        return None
+
+def parse_range(range_str: str) -> Optional[Tuple[float, float]]:
+    """Lower and upper bound of a range string such as "SAT Scores From 1,001 To 1,200"."""
+    numbers = re.findall(r"\d[\d,]*(?:\.\d+)?", range_str)
+    if len(numbers) >= 2:
+        return float(numbers[0].replace(',', '')), float(numbers[1].replace(',', ''))
+    return None
+
+def parse_range_list(ranges: Optional[List[str]]) -> List[List[float]]:
+    """Bounds for every parseable range in a list of range strings."""
+    bounds = []
+    for range_str in ranges or []:
+        parsed = parse_range(getattr(range_str, "value", range_str))
+        if parsed is not None:
+            bounds.append(list(parsed))
+    return bounds
+
+def parsed_fields(scholarship: Dict[str, Any]) -> Dict[str, Any]:
+    """Numeric fields derived from the scholarship's string fields."""
+    fields = {
+        'deadline': parse_deadline(scholarship.get('due_date')),
+        'amount_max': parse_max_amount(scholarship.get('amount')),
+    }
+    for source, target in RANGE_BOUNDS_FIELDS.items():
+        fields[target] = parse_range_list(scholarship.get(source))
+    return fields
+
+def stale_parsed_fields(scholarship: Dict[str, Any]) -> Dict[str, Any]:
+    """Parsed fields whose stored value is missing or out of date."""
+    return {
+        key: value for key, value in parsed_fields(scholarship).items()
+        if key not in scholarship or scholarship[key] != value
+    }
+
+# ---- Readers that prefer the stored parse and fall back to the raw string ----
+
+def get_deadline(scholarship: Dict[str, Any]) -> Optional[datetime]:
+    if 'deadline' in scholarship:
+        return scholarship['deadline']
+    return parse_deadline(scholarship.get('due_date'))
+
+def get_max_amount(scholarship: Dict[str, Any]) -> Optional[float]:
+    if 'amount_max' in scholarship:
+        return scholarship['amount_max']
+    return parse_max_amount(scholarship.get('amount'))
+
+def get_range_bounds(scholarship: Dict[str, Any], field: str) -> List[List[float]]:
+    target = RANGE_BOUNDS_FIELDS[field]
+    if target in scholarship:
+        return scholarship[target] or []
+    return parse_range_list(scholarship.get(field))
@@ -0,0 +1,85 @@
+# passwords.py
+"""Password hashing that keeps bcrypt off the event loop.
+
+bcrypt costs tens of milliseconds per call by design, so hashing and
+checking run on a small dedicated thread pool (bcrypt releases the GIL
+while it works). The pool size bounds how many CPU cores logins can
+occupy at once; extra calls queue instead of spawning threads.
+
+Accounts created before bcrypt store an unsalted hex SHA-256 digest.
+verify() still accepts those and reports that the hash should be
+replaced, as it does for bcrypt hashes made with a different cost.
+"""
+from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import re
+import bcrypt
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+
+_LEGACY_SHA256 = re.compile(r"[0-9a-f]{64}")
+
+
+def legacy_hash(password: str) -> str:
+    """The original unsalted SHA-256 scheme."""
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def _bcrypt_input(password: str) -> bytes:
+    # bcrypt only reads 72 bytes (and bcrypt 5 rejects longer input), so
+    # long passwords are digested first to keep every character significant
+    return base64.b64encode(hashlib.sha256(password.encode()).digest())
+
+
+def hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    return bcrypt.hashpw(_bcrypt_input(password), bcrypt.gensalt(rounds)).decode()
+
+
+def check_password(password: str, stored: str) -> bool:
+    if _LEGACY_SHA256.fullmatch(stored):
+        return hmac.compare_digest(legacy_hash(password), stored)
+    try:
+        return bcrypt.checkpw(_bcrypt_input(password), stored.encode())
+    except ValueError:
+        # Not a hash this module wrote
+        return False
+
+
+def bcrypt_rounds(stored: str) -> Optional[int]:
+    """Cost factor of a bcrypt hash, None for anything else."""
+    match = re.match(r"\$2[aby]\$(\d\d)\$", stored)
+    return int(match.group(1)) if match else None
+
+
+class PasswordHasher:
+    def __init__(self, rounds: int = BCRYPT_ROUNDS, workers: int = PASSWORD_HASH_WORKERS):
+        self.rounds = rounds
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    async def hash(self, password: str) -> str:
+        return await asyncio.get_running_loop().run_in_executor(self._pool(), hash_password, password, self.rounds)
+
+    async def verify(self, password: str, stored: str) -> Tuple[bool, bool]:
+        """(matches, needs_rehash) for a password against its stored hash."""
+        matches = await asyncio.get_running_loop().run_in_executor(self._pool(), check_password, password, stored)
+        return matches, matches and self.needs_rehash(stored)
+
+    def needs_rehash(self, stored: str) -> bool:
+        return bcrypt_rounds(stored) != self.rounds
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -0,0 +1,75 @@
+# profile_cache.py
+from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict
+import time
+
+
+class ProfileCache:
+    """Size- and TTL-bounded LRU of hydrated user profiles, keyed by user id.
+
+    ScholarshipDAL reads through it in fetch_profile and drops a user's
+    entry on every write to that user; catalog writes drop everything,
+    since hydrated recommendations embed scholarship documents. The cache
+    is per process, so writes made by other workers or by the scraper are
+    only picked up once entries expire after ttl_seconds.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        # Bumped by every invalidation; a read that raced one is not cached
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            expires_at, profile = entry
+            if time.monotonic() < expires_at:
+                self.hits += 1
+                self._entries.move_to_end(user_id)
+                # Shallow copy so callers can't rewrite the cached profile
+                return dict(profile)
+            self.expired += 1
+            del self._entries[user_id]
+        self.misses += 1
+        return None
+
+    def set(self, user_id: str, profile: Dict[str, Any], generation: Optional[int] = None):
+        """Store a profile; with generation, only if nothing was invalidated since it was read."""
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        if generation is not None and generation != self.generation:
+            return
+        self._entries[user_id] = (time.monotonic() + self.ttl_seconds, dict(profile))
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        self.generation += 1
+        self.invalidations += 1
+        self._entries.pop(user_id, None)
+
+    def clear(self):
+        self.generation += 1
+        self.invalidations += 1
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
@@ -1,77 +1,213 @@
 # recommendation.py
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import re
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+import asyncio
+import heapq
+import os
+import time
 import logging
+from src.eligibility_index import EligibilityIndex
+from src.metrics import span
+from src.parsing import get_deadline, get_max_amount, get_range_bounds, parse_range
+from src.recommendation_cache import RecommendationCache, cache_key
+from src.scoring_engine import ScoringEngine, interest_text
+from src.sentiment import sentiment_text, score_text
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-analyzer = SentimentIntensityAnalyzer()
+# "engine" ranks against an in-memory copy of the catalog, "stream" scores
+# straight off a Mongo cursor and keeps only the top k in memory
+RECOMMENDATION_MODE = os.getenv("RECOMMENDATION_MODE", "engine")
+STREAM_BATCH_SIZE = int(os.getenv("RECOMMENDATION_STREAM_BATCH_SIZE", "500"))
+
+TOP_K = 15
+
+# Fields check_eligibility and the calculate_* scorers read
+TEXT_FIELDS = ('description', 'details', 'eligibility_criteria')
+SCORING_FIELDS = (
+    'due_date', 'deadline', 'amount', 'amount_max', 'sentiment_score',
+    'academic_major', 'age', 'financial_need', 'gender',
+    'grade_point_average', 'grade_point_average_bounds', 'sat_score', 'sat_score_bounds',
+)
+
+# Catalog cache, rebuilt when the catalog version changes (or after
+# INDEX_TTL_SECONDS as a safety net)
+INDEX_TTL_SECONDS = float(os.getenv("RECOMMENDATION_INDEX_TTL", "300"))
+_engine: Optional[ScoringEngine] = None
+_engine_version: Optional[int] = None
+_engine_built_at = 0.0
+# Rebuild in progress, shared by every caller that finds the engine stale
+_rebuild: Optional[asyncio.Task] = None
+_rebuild_version: Optional[int] = None
+# Bumped by invalidate_catalog_cache so a rebuild started before it is discarded
+_generation = 0
+
+# Engine builds and rankings are CPU-bound, so they run on this thread instead
+# of the event loop. A single thread also means the engine's match caches are
+# never used concurrently.
+_executor: Optional[ThreadPoolExecutor] = None
+
+# Result cache shared by users with the same eligibility profile and interests
+recommendation_cache = RecommendationCache(max_entries=int(os.getenv("RECOMMENDATION_CACHE_SIZE", "1024")))
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recommendation")
+    return _executor
+
+def _build_engine(scholarships: List[Dict[str, Any]]) -> ScoringEngine:
+    return ScoringEngine(scholarships, EligibilityIndex(scholarships))
+
+async def _rebuild_engine(dal, catalog_version: int) -> ScoringEngine:
+    global _engine, _engine_version, _engine_built_at
+    generation = _generation
+    with span("recommendation.fetch"):
+        scholarships = [sch async for sch in dal.iter_scholarships(batch_size=STREAM_BATCH_SIZE)]
+    with span("recommendation.index"):
+        engine = await asyncio.get_running_loop().run_in_executor(_pool(), _build_engine, scholarships)
+    if generation == _generation and (_engine_version is None or catalog_version >= _engine_version):
+        _engine, _engine_version, _engine_built_at = engine, catalog_version, time.monotonic()
+    return engine
+
+async def get_scoring_engine(dal, catalog_version: Optional[int] = None) -> ScoringEngine:
+    """Return the cached scoring engine, rebuilding it off the event loop when stale."""
+    global _rebuild, _rebuild_version
+    if catalog_version is None:
+        catalog_version = await dal.catalog_version()
+    age = time.monotonic() - _engine_built_at
+    if _engine is not None and _engine_version == catalog_version and age <= INDEX_TTL_SECONDS:
+        return _engine
+    if (_rebuild is None or _rebuild.done() or _rebuild_version != catalog_version
+            or _rebuild.get_loop() is not asyncio.get_running_loop()):
+        _rebuild = asyncio.create_task(_rebuild_engine(dal, catalog_version))
+        _rebuild_version = catalog_version
+    # Shielded so a cancelled request doesn't cancel the rebuild other callers wait on
+    return await asyncio.shield(_rebuild)
+
+def invalidate_catalog_cache():
+    """Drop the cached engine and results so the next recommendation rebuilds them."""
+    global _engine, _rebuild, _generation
+    _engine = None
+    _rebuild = None
+    _generation += 1
+    recommendation_cache.clear()
 
 async def generate_recommendations(user: Dict[str, Any], dal) -> List[Dict[str, Any]]:
-    """Generate scholarship recommendations for a user with detailed logging."""
+    """Generate scholarship recommendations for a user, returning [] on failure."""
     try:
-        #logger.info("Starting recommendation generation...")
-        scholarships = await dal.fetch_all_scholarships(limit=1000)
-        #logger.info(f"Fetched {len(scholarships)} scholarships for processing")
-
-        scored_scholarships = []
-        eligible_count = 0
-        
-        for idx, scholarship in enumerate(scholarships, 1):
-            #logger.info(f"\nProcessing scholarship {idx}/{len(scholarships)}: {scholarship.get('title')}")
-            
-            # Eligibility Check
-            is_eligible, reason = check_eligibility(user, scholarship)
-            if not is_eligible:
-                #logger.info(f"❌ Not eligible: {reason}")
-                continue
-            eligible_count += 1
-            
-            # Score Calculation
-            grant_score = calculate_grant_score(scholarship)
-            interest_score = calculate_interest_score(user, scholarship)
-            sentiment_score = calculate_sentiment_score(scholarship)
-            total_score = grant_score + interest_score + sentiment_score
-            
-            #logger.info(f"⭐ Scores - Grant: {grant_score:.2f}, Interest: {interest_score:.2f}, Sentiment: {sentiment_score:.2f}, Total: {total_score:.2f}")
-            
-            scored_scholarships.append((scholarship, total_score))
-
-        #logger.info(f"Eligible scholarships: {eligible_count}/{len(scholarships)}")
-        
-        # Sorting and selection
-        scored_scholarships.sort(key=lambda x: x[1], reverse=True)
-        top_scholarships = [scholarship for scholarship, _ in scored_scholarships[:15]]
-        
-        #logger.info("Top 5 recommended scholarships:")
-        for i, sch in enumerate(top_scholarships[:5], 1):
-            #logger.info(f"{i}. {sch.get('title')} - Score: {scored_scholarships[i-1][1]:.2f}")
-            ohh=1
-        
-        return top_scholarships
-        
+        return [scholarship for scholarship, _ in await compute_recommendations(user, dal)]
     except Exception as e:
         logger.error(f"Recommendation generation failed: {str(e)}", exc_info=True)
         return []
 
+async def compute_recommendations(user: Dict[str, Any], dal) -> List[Tuple[Dict[str, Any], float]]:
+    """Rank scholarships for a user as (scholarship, score) pairs, raising on failure."""
+    #logger.info("Starting recommendation generation...")
+    catalog_version = await dal.catalog_version()
+    key = cache_key(user, catalog_version)
+    cached = await recommendation_cache.get(key)
+    if cached is not None:
+        return cached
+
+    if RECOMMENDATION_MODE == "stream":
+        ranked = await generate_recommendations_streaming(user, dal)
+    else:
+        engine = await get_scoring_engine(dal, catalog_version)
+        #logger.info(f"Indexed {engine.size} scholarships for processing")
+
+        # Eligibility masks, vectorized scoring and top-k selection in one pass
+        top = await asyncio.get_running_loop().run_in_executor(_pool(), engine.top_k, user, TOP_K)
+        ranked = [(engine.scholarships[pos], score) for pos, score in top]
+
+    await recommendation_cache.set(key, ranked)
+    return ranked
+
+async def generate_recommendations_streaming(user: Dict[str, Any], dal, k: int = TOP_K,
+                                             batch_size: int = STREAM_BATCH_SIZE) -> List[Tuple[Dict[str, Any], float]]:
+    """Score the catalog straight off a cursor, keeping only the best k in a heap.
+
+    Only the fields scoring needs are projected, and full documents are
+    fetched for the winners at the end, so memory stays bounded by the batch
+    size and k however large the catalog grows.
+    """
+    needs_text = bool(user.get('interests'))
+    projection = {field: 1 for field in SCORING_FIELDS + (TEXT_FIELDS if needs_text else ())}
+
+    # Min-heap of (score, -seq, id): equal scores favour the earlier document,
+    # as the stable sort in recommend_linear does
+    heap: List[Tuple[float, int, str]] = []
+    unscored: Dict[str, int] = {}
+
+    def offer(scholarship: Dict[str, Any], seq: int):
+        is_eligible, _ = check_eligibility(user, scholarship)
+        if not is_eligible:
+            return
+        total_score = (calculate_grant_score(scholarship)
+                       + calculate_interest_score(user, scholarship)
+                       + calculate_sentiment_score(scholarship))
+        entry = (total_score, -seq, scholarship['_id'])
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heappushpop(heap, entry)
+
+    seq = 0
+    # Fetching, eligibility and scoring interleave on the cursor, so the scan is one span
+    with span("recommendation.scan"):
+        async for scholarship in dal.iter_scholarships(projection=projection, batch_size=batch_size):
+            if not needs_text and scholarship.get('sentiment_score') is None:
+                # Not backfilled yet: sentiment needs the text, score it after the scan
+                unscored[scholarship['_id']] = seq
+            else:
+                offer(scholarship, seq)
+            seq += 1
+
+        if unscored:
+            for scholarship in await dal.fetch_scholarships_by_ids(list(unscored)):
+                offer(scholarship, unscored[scholarship['_id']])
+
+    with span("recommendation.sort"):
+        ranked = sorted(heap, reverse=True)
+    winners = {sch['_id']: sch for sch in await dal.fetch_scholarships_by_ids([sch_id for _, _, sch_id in ranked])}
+    return [(winners[sch_id], score) for score, _, sch_id in ranked if sch_id in winners]
+
+def recommend_linear(user: Dict[str, Any], scholarships: List[Dict[str, Any]], k: int = TOP_K) -> List[Tuple[Dict[str, Any], float]]:
+    """Reference scorer: check and score every scholarship one at a time.
+
+    This is the original per-document loop. It is kept as the ground truth
+    that ScoringEngine rankings are checked against in benchmarks.
+    """
+    scored_scholarships = []
+    for scholarship in scholarships:
+        is_eligible, reason = check_eligibility(user, scholarship)
+        if not is_eligible:
+            continue
+        grant_score = calculate_grant_score(scholarship)
+        interest_score = calculate_interest_score(user, scholarship)
+        sentiment_score = calculate_sentiment_score(scholarship)
+        total_score = grant_score + interest_score + sentiment_score
+        scored_scholarships.append((scholarship, total_score))
+
+    scored_scholarships.sort(key=lambda x: x[1], reverse=True)
+    return scored_scholarships[:k]
+
 def check_eligibility(user: Dict[str, Any], scholarship: Dict[str, Any]) -> (bool, str):
 
     """Check if user is eligible for scholarship with detailed failure reasons."""
     #Deadline check
     if scholarship.get('due_date'):
         date_str = scholarship['due_date']
-        try:
-            # Handle "June 07, 2025" format
-            deadline = datetime.strptime(date_str, "%B %d, %Y")
-            if deadline < datetime.now():
-                return False, f"Deadline has passed ({date_str})"
-        except ValueError:
+        # Parsed from the "June 07, 2025" format at ingest
+        deadline = get_deadline(scholarship)
+        if deadline is None:
             #logger.error(f"⚠️ Invalid date format: '{date_str}'. Expected 'Month Day, Year' (e.g., 'June 07, 2025').")
             return False, "Invalid deadline format"
+        if deadline < datetime.now():
+            return False, f"Deadline has passed ({date_str})"
 
 
     # Field-specific checks
@@ -92,46 +228,38 @@ def check_eligibility(user: Dict[str, Any], scholarship: Dict[str, Any]) -> (boo
 
     # GPA check
     if scholarship.get('grade_point_average') and user.get('grade_point_average'):
-        if not any(check_range(user['grade_point_average'], r) 
-                  for r in scholarship['grade_point_average']):
+        if not any(lower <= user['grade_point_average'] <= upper
+                  for lower, upper in get_range_bounds(scholarship, 'grade_point_average')):
             return False, "GPA requirement not met"
 
     # SAT check
     if scholarship.get('sat_score') and user.get('sat_score'):
-        if not any(check_range(user['sat_score'], r) 
-                  for r in scholarship['sat_score']):
+        if not any(lower <= user['sat_score'] <= upper
+                  for lower, upper in get_range_bounds(scholarship, 'sat_score')):
             return False, "SAT score requirement not met"
 
     return True, "All eligibility criteria met"
 
 def check_range(user_value: float, range_str: str) -> bool:
     """Check if user value falls within a range string."""
-    numbers = re.findall(r"[\d.]+", range_str)
-    if len(numbers) >= 2:
-        lower = float(numbers[0])
-        upper = float(numbers[1])
+    bounds = parse_range(range_str)
+    if bounds is not None:
+        lower, upper = bounds
         return lower <= user_value <= upper
     logger.warning(f"Invalid range format: {range_str}")
     return False
 
 def calculate_grant_score(scholarship: Dict[str, Any]) -> float:
     """Calculate score based on scholarship amount."""
-    amount_str = scholarship.get('amount', '')
-    numbers = re.findall(r"[\d,]+", amount_str)
-    
-    if not numbers:
+    max_amount = get_max_amount(scholarship)
+
+    if max_amount is None:
         logger.debug("No valid amount found")
         return 0.0
-    
-    try:
-        amounts = [float(num.replace(',', '')) for num in numbers]
-        max_amount = max(amounts)
-        score = max_amount / 10000  # Normalize
-        logger.debug(f"Grant score: {score:.2f} (Amount: {max_amount})")
-        return score
-    except Exception as e:
-        logger.warning(f"Error parsing amount '{amount_str}': {str(e)}")
-        return 0.0
+
+    score = max_amount / 10000  # Normalize
+    logger.debug(f"Grant score: {score:.2f} (Amount: {max_amount})")
+    return score
 
 def calculate_interest_score(user: Dict[str, Any], scholarship: Dict[str, Any]) -> float:
     """Calculate score based on user interests in scholarship content."""
@@ -140,12 +268,7 @@ def calculate_interest_score(user: Dict[str, Any], scholarship: Dict[str, Any])
         return 0.0
     
     # Combine all relevant text fields
-    text_parts = [
-        scholarship.get('description', ''),
-        ' '.join(scholarship.get('details', [])),
-        ' '.join(scholarship.get('eligibility_criteria', []))
-    ]
-    text = ' '.join(text_parts).lower()
+    text = interest_text(scholarship)
     
     # Count matches for each interest
     score = 0
@@ -160,25 +283,9 @@ def calculate_interest_score(user: Dict[str, Any], scholarship: Dict[str, Any])
     return final_score
 
 def calculate_sentiment_score(scholarship: Dict[str, Any]) -> float:
-    """Calculate score based on sentiment analysis of scholarship text."""
-    text_parts = []
-    for key in ['description', 'details', 'eligibility_criteria']:
-        value = scholarship.get(key)
-        if isinstance(value, list):
-            text_parts.extend(value)
-        elif value:
-            text_parts.append(str(value))
-    
-    text = ' '.join(text_parts)
-    if not text.strip():
-        logger.debug("No text for sentiment analysis")
-        return 0.0
-    
-    try:
-        vs = analyzer.polarity_scores(text)
-        score = (vs['compound'] + 1) * 50  # Scale to 0-100
-        logger.debug(f"Sentiment score: {score:.2f} (Compound: {vs['compound']:.2f})")
-        return score
-    except Exception as e:
-        logger.warning(f"Sentiment analysis failed: {str(e)}")
-        return 0.0
+    """Return the sentiment score stored at ingest, analysing the text only if it is missing."""
+    stored = scholarship.get('sentiment_score')
+    if stored is not None:
+        return stored
+    logger.debug("No stored sentiment score, analysing text")
+    return score_text(sentiment_text(scholarship))
@@ -0,0 +1,133 @@
+# recommendation_cache.py
+from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict
+from datetime import date, datetime
+import hashlib
+import json
+from src.dal import GradePointAverageRange, SATScoreRange
+from src.parsing import parse_range
+
+# Fields that decide which scholarships a user is eligible for
+ENUM_FIELDS = ('academic_major', 'age', 'gender', 'financial_need')
+
+# Bounds of the GPA/SAT bands scholarships can require
+GPA_BANDS = [parse_range(r.value) for r in GradePointAverageRange]
+SAT_BANDS = [parse_range(r.value) for r in SATScoreRange]
+
+
+def _band(value: Optional[float], bands: List[Tuple[float, float]]) -> Optional[Tuple[int, ...]]:
+    """Indices of the bands containing value; users in the same bands are interchangeable."""
+    if not value:
+        return None
+    return tuple(i for i, (lower, upper) in enumerate(bands) if lower <= value <= upper)
+
+
+def profile_fingerprint(user: Dict[str, Any], today: Optional[date] = None) -> str:
+    """Hash of everything that affects a user's recommendations.
+
+    Deadlines expire at midnight, so the date is part of the fingerprint too.
+    """
+    fields = {field: getattr(user.get(field), "value", user.get(field)) for field in ENUM_FIELDS}
+    fields['gpa_band'] = _band(user.get('grade_point_average'), GPA_BANDS)
+    fields['sat_band'] = _band(user.get('sat_score'), SAT_BANDS)
+    # Order doesn't affect the score, repeats do
+    fields['interests'] = sorted(interest.lower() for interest in user.get('interests') or [])
+    fields['date'] = (today or date.today()).isoformat()
+    return hashlib.sha1(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+
+
+def cache_key(user: Dict[str, Any], catalog_version: int) -> str:
+    return f"{catalog_version}:{profile_fingerprint(user)}"
+
+
+class InMemoryCacheBackend:
+    """Dict-backed shared backend, for tests and single-process setups."""
+
+    def __init__(self):
+        self.entries: Dict[str, Any] = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self.entries.get(key)
+
+    async def set(self, key: str, value: Any):
+        self.entries[key] = value
+
+
+class MongoCacheBackend:
+    """Shares cache entries between workers through a Mongo collection."""
+
+    def __init__(self, collection, ttl_seconds: int = 3600):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+
+    async def create_indexes(self):
+        await self.collection.create_index("created_at", expireAfterSeconds=self.ttl_seconds)
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = await self.collection.find_one({"_id": key})
+        return entry["value"] if entry else None
+
+    async def set(self, key: str, value: Any):
+        await self.collection.replace_one(
+            {"_id": key},
+            {"_id": key, "value": value, "created_at": datetime.utcnow()},
+            upsert=True
+        )
+
+
+class RecommendationCache:
+    """Size-bounded LRU of recommendation results, with an optional shared backend.
+
+    Keys combine the catalog version with a profile fingerprint, so entries
+    go stale as soon as the catalog changes and are then evicted by LRU.
+    Local misses fall through to the shared backend when one is configured.
+    """
+
+    def __init__(self, max_entries: int = 1024, backend=None):
+        self.max_entries = max_entries
+        self.backend = backend
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _store(self, key: str, value: Any):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Any]:
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        if self.backend is not None:
+            value = await self.backend.get(key)
+            if value is not None:
+                self.shared_hits += 1
+                self._store(key, value)
+                return value
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any):
+        self._store(key, value)
+        if self.backend is not None:
+            await self.backend.set(key, value)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,43 @@
+# responses.py
+"""orjson responses for trusted DAL output.
+
+FastAPI normally validates a handler's return value into its
+response_model (coercing every enum value of every document) and then
+encodes the validated models. Documents coming out of ScholarshipDAL were
+already validated when they were written, so for large lists that work
+is pure overhead. shape() only trims and fills each document to the
+model's keys, in the model's order, so the bytes match what the
+validated path produces, and TrustedJSONResponse encodes the result with
+orjson.
+"""
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple, Type
+from bson import ObjectId
+from fastapi.responses import Response
+from pydantic import BaseModel
+import orjson
+
+
+@lru_cache(maxsize=None)
+def _response_keys(model: Type[BaseModel]) -> Tuple[str, ...]:
+    return tuple(field.alias or name for name, field in model.model_fields.items())
+
+
+def shape(docs: List[Dict[str, Any]], model: Type[BaseModel]) -> List[Dict[str, Any]]:
+    """Documents reduced to the model's keys, missing ones as None, without validation."""
+    keys = _response_keys(model)
+    return [{key: doc.get(key) for key in keys} for doc in docs]
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class TrustedJSONResponse(Response):
+    """JSON response for content that is already in response shape."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default)
@@ -0,0 +1,145 @@
+# scoring_engine.py
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime
+import numpy as np
+from src.eligibility_index import EligibilityIndex
+from src.interest_index import InterestIndex
+from src.metrics import span
+from src.parsing import get_deadline, get_max_amount
+from src.sentiment import sentiment_text, score_text
+
+
+def bits_to_mask(bits: int, size: int) -> np.ndarray:
+    """Expand an EligibilityIndex bitset into a boolean array of length ``size``."""
+    if size == 0:
+        return np.zeros(0, dtype=bool)
+    raw = np.frombuffer(bits.to_bytes((size + 7) // 8, "little"), dtype=np.uint8)
+    return np.unpackbits(raw, bitorder="little")[:size].astype(bool)
+
+
+def interest_text(scholarship: Dict[str, Any]) -> str:
+    """Lowercased text that user interests are matched against."""
+    text_parts = [
+        scholarship.get('description') or '',
+        ' '.join(scholarship.get('details') or []),
+        ' '.join(scholarship.get('eligibility_criteria') or [])
+    ]
+    return ' '.join(text_parts).lower()
+
+
+class ScoringEngine:
+    """Column-oriented copy of the catalog for batch eligibility and scoring.
+
+    Every per-scholarship input to the recommendation score is precomputed
+    into a NumPy column, and the eligibility posting lists of an
+    ``EligibilityIndex`` are expanded into boolean masks. Ranking a user is
+    then a handful of mask intersections, one vector add and an
+    ``argpartition``; ties are broken by catalog order so results match the
+    stable sort in the per-document scorer.
+    """
+
+    def __init__(self, scholarships: List[Dict[str, Any]], index: Optional[EligibilityIndex] = None):
+        self.index = index or EligibilityIndex(scholarships)
+        self.scholarships = self.index.scholarships
+        self.size = self.index.size
+
+        # Score columns
+        self.grant = np.array([self._grant_score(s) for s in self.scholarships], dtype=np.float64)
+        self.sentiment = np.array([self._sentiment_score(s) for s in self.scholarships], dtype=np.float64)
+        self.interests = InterestIndex([interest_text(s) for s in self.scholarships])
+
+        # Deadline column: NaT when there is no due date
+        deadlines = [get_deadline(s) if s.get('due_date') else None for s in self.scholarships]
+        self.deadline = np.array(
+            [np.datetime64(d, "us") if d is not None else np.datetime64("NaT") for d in deadlines],
+            dtype="datetime64[us]"
+        )
+        self.invalid_deadline = bits_to_mask(self.index.invalid_deadline_bits, self.size)
+
+        # Eligibility masks
+        self.unrestricted = {
+            field: bits_to_mask(bits, self.size) for field, bits in self.index.unrestricted.items()
+        }
+        self.enum_masks = {
+            field: {value: bits_to_mask(bits, self.size) for value, bits in postings.items()}
+            for field, postings in self.index.postings.items()
+        }
+        self.interval_masks = {
+            field: [(lower, upper, bits_to_mask(bits, self.size)) for lower, upper, bits in intervals]
+            for field, intervals in self.index.intervals.items()
+        }
+        self._none = np.zeros(self.size, dtype=bool)
+
+    @staticmethod
+    def _grant_score(scholarship: Dict[str, Any]) -> float:
+        max_amount = get_max_amount(scholarship)
+        return max_amount / 10000 if max_amount is not None else 0.0
+
+    @staticmethod
+    def _sentiment_score(scholarship: Dict[str, Any]) -> float:
+        stored = scholarship.get('sentiment_score')
+        if stored is not None:
+            return stored
+        return score_text(sentiment_text(scholarship))
+
+    def open_mask(self, now: Optional[datetime] = None) -> np.ndarray:
+        """Scholarships with a valid deadline that has not passed."""
+        now = np.datetime64(now or datetime.now(), "us")
+        return ~self.invalid_deadline & ~(self.deadline < now)
+
+    def eligibility_mask(self, user: Dict[str, Any], now: Optional[datetime] = None) -> np.ndarray:
+        """Boolean mask of the scholarships the user is eligible for."""
+        mask = self.open_mask(now)
+
+        for field in EligibilityIndex.ENUM_FIELDS:
+            user_value = user.get(field)
+            if user_value is not None:
+                value = getattr(user_value, "value", user_value)
+                mask &= self.unrestricted[field] | self.enum_masks[field].get(value, self._none)
+
+        for field in EligibilityIndex.RANGE_FIELDS:
+            user_value = user.get(field)
+            if user_value:
+                admitted = self.unrestricted[field].copy()
+                for lower, upper, interval_mask in self.interval_masks[field]:
+                    if lower <= user_value <= upper:
+                        admitted |= interval_mask
+                mask &= admitted
+
+        return mask
+
+    def interest_scores(self, user: Dict[str, Any], positions: np.ndarray) -> np.ndarray:
+        """Interest score for each catalog position in ``positions``."""
+        interests = user.get('interests')
+        if not interests:
+            return np.zeros(len(positions), dtype=np.float64)
+        return self.interests.match_counts(interests, positions) * 50.0
+
+    def scores(self, user: Dict[str, Any], positions: np.ndarray) -> np.ndarray:
+        """Total score (grant + interest + sentiment) for ``positions``."""
+        return self.grant[positions] + self.interest_scores(user, positions) + self.sentiment[positions]
+
+    def top_k(self, user: Dict[str, Any], k: int = 15, now: Optional[datetime] = None) -> List[Tuple[int, float]]:
+        """Best ``k`` eligible (catalog position, score) pairs, highest score first."""
+        with span("recommendation.eligibility"):
+            positions = np.flatnonzero(self.eligibility_mask(user, now))
+        if len(positions) == 0 or k <= 0:
+            return []
+        with span("recommendation.scoring"):
+            scores = self.scores(user, positions)
+        with span("recommendation.sort"):
+            return self._rank(positions, scores, k)
+
+    @staticmethod
+    def _rank(positions: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        if len(scores) > k:
+            # Everything above the k-th best score, then the earliest ties
+            threshold = scores[np.argpartition(scores, -k)[-k]]
+            above = np.flatnonzero(scores > threshold)
+            ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+            chosen = np.concatenate([above, ties])
+        else:
+            chosen = np.arange(len(scores))
+
+        order = chosen[np.lexsort((chosen, -scores[chosen]))]
+        return [(int(positions[i]), float(scores[i])) for i in order]
@@ -0,0 +1,161 @@
+# search_index.py
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+from collections import Counter
+import asyncio
+import logging
+import math
+import os
+import re
+import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Scholarship fields searched, and the weight of a term occurrence in each
+SEARCH_FIELDS = {
+    'title': 2.0,
+    'description': 1.0,
+    'details': 1.0,
+    'eligibility_criteria': 1.0,
+}
+SEARCH_PROJECTION = {field: 1 for field in SEARCH_FIELDS}
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def _field_text(value: Any) -> str:
+    if isinstance(value, list):
+        return ' '.join(v for v in value if isinstance(v, str))
+    return value if isinstance(value, str) else ''
+
+
+class SearchIndex:
+    """BM25 inverted index over scholarship text.
+
+    Each term maps to the catalog positions that contain it and the
+    field-weighted term frequency at each position, so a query scores only
+    the postings of its own terms. Document lengths are the weighted term
+    counts, normalised against the catalog average.
+    """
+
+    def __init__(self, scholarships: Iterable[Dict[str, Any]], k1: float = 1.2, b: float = 0.75):
+        scholarships = list(scholarships)
+        self.ids = [str(s["_id"]) for s in scholarships]
+        self.position = {sid: pos for pos, sid in enumerate(self.ids)}
+        self.size = len(self.ids)
+        self.k1 = k1
+
+        postings: Dict[str, Tuple[List[int], List[float]]] = {}
+        lengths = np.zeros(self.size, dtype=np.float64)
+        for pos, scholarship in enumerate(scholarships):
+            counts: Counter = Counter()
+            for field, weight in SEARCH_FIELDS.items():
+                for token in tokenize(_field_text(scholarship.get(field))):
+                    counts[token] += weight
+            lengths[pos] = sum(counts.values())
+            for token, tf in counts.items():
+                positions, freqs = postings.setdefault(token, ([], []))
+                positions.append(pos)
+                freqs.append(tf)
+
+        self.postings = {
+            token: (np.array(positions, dtype=np.int64), np.array(freqs, dtype=np.float64))
+            for token, (positions, freqs) in postings.items()
+        }
+        avg_length = lengths.mean() if self.size and lengths.any() else 1.0
+        # Per-document part of the BM25 denominator
+        self.norm = k1 * (1 - b + b * lengths / avg_length)
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings[term][0])
+        return math.log(1 + (self.size - df + 0.5) / (df + 0.5))
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every catalog position for the query; 0 where no term matches."""
+        scores = np.zeros(self.size, dtype=np.float64)
+        for term in set(tokenize(query)):
+            if term not in self.postings:
+                continue
+            positions, tf = self.postings[term]
+            scores[positions] += self.idf(term) * tf * (self.k1 + 1) / (tf + self.norm[positions])
+        return scores
+
+    def search(self, query: str, ids: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """(id, score) of the matching scholarships, best first, ties in catalog order.
+
+        With ``ids``, only those scholarships are considered.
+        """
+        scores = self.scores(query)
+        matched = scores > 0
+        if ids is not None:
+            allowed = np.zeros(self.size, dtype=bool)
+            allowed[[self.position[i] for i in ids if i in self.position]] = True
+            matched &= allowed
+        positions = np.flatnonzero(matched)
+        order = positions[np.lexsort((positions, -scores[positions]))]
+        return [(self.ids[pos], float(scores[pos])) for pos in order]
+
+
+# Index cache, rebuilt when the catalog version changes (or after
+# SEARCH_INDEX_TTL seconds as a safety net). Rebuilds run in the background
+# and searches keep using the previous index until the new one is ready; only
+# the very first search waits for a build.
+SEARCH_INDEX_TTL = float(os.getenv("SEARCH_INDEX_TTL", "300"))
+_index: Optional[SearchIndex] = None
+_index_version: Optional[int] = None
+_index_built_at = 0.0
+_rebuild: Optional[asyncio.Task] = None
+# Bumped by invalidate_search_index so a rebuild started before it is discarded
+_generation = 0
+
+async def _rebuild_index(dal, catalog_version: int) -> SearchIndex:
+    global _index, _index_version, _index_built_at
+    generation = _generation
+    scholarships = [sch async for sch in dal.iter_scholarships(projection=SEARCH_PROJECTION)]
+    # Tokenizing the catalog takes seconds on large catalogs; keep it off the event loop
+    index = await asyncio.get_running_loop().run_in_executor(None, SearchIndex, scholarships)
+    if generation == _generation:
+        _index, _index_version, _index_built_at = index, catalog_version, time.monotonic()
+    return index
+
+def _log_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Search index rebuild failed: {str(task.exception())}")
+
+async def get_search_index(dal, catalog_version: Optional[int] = None) -> SearchIndex:
+    """Return the cached search index, starting a rebuild when stale."""
+    global _rebuild
+    if catalog_version is None:
+        catalog_version = await dal.catalog_version()
+    age = time.monotonic() - _index_built_at
+    if _index is not None and _index_version == catalog_version and age <= SEARCH_INDEX_TTL:
+        return _index
+    # One rebuild at a time; a change while it runs starts another once it is done
+    if _rebuild is None or _rebuild.done() or _rebuild.get_loop() is not asyncio.get_running_loop():
+        _rebuild = asyncio.create_task(_rebuild_index(dal, catalog_version))
+        _rebuild.add_done_callback(_log_failure)
+    if _index is not None:
+        return _index
+    return await asyncio.shield(_rebuild)
+
+def invalidate_search_index():
+    """Mark the index stale; searches use it until the rebuild finishes."""
+    global _index_version, _generation
+    _index_version = None
+    _generation += 1
+
+async def ranked_search(dal, query: str, filters: Dict[str, Any],
+                        projection: Optional[Dict[str, Any]] = None,
+                        skip: int = 0, limit: int = 1000) -> List[Dict[str, Any]]:
+    """One page of the scholarships matching both the query and the Mongo filters, by relevance."""
+    index = await get_search_index(dal)
+    # Filters are still evaluated by Mongo; only ids come back
+    allowed = await dal.fetch_scholarship_ids(filters) if filters else None
+    ranked = index.search(query, allowed)[skip:skip + limit]
+    page = await dal.fetch_scholarships_by_ids([sid for sid, _ in ranked], projection)
+    by_id = {sch["_id"]: sch for sch in page}
+    return [by_id[sid] for sid, _ in ranked if sid in by_id]
@@ -0,0 +1,53 @@
+# sentiment.py
+from typing import Dict, Any
+import hashlib
+import logging
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+logger = logging.getLogger(__name__)
+
+analyzer = SentimentIntensityAnalyzer()
+
+# Fields whose text feeds the sentiment score
+TEXT_FIELDS = ('description', 'details', 'eligibility_criteria')
+
+def sentiment_text(scholarship: Dict[str, Any]) -> str:
+    """Join the scholarship text that sentiment analysis runs over."""
+    text_parts = []
+    for key in TEXT_FIELDS:
+        value = scholarship.get(key)
+        if isinstance(value, list):
+            text_parts.extend(value)
+        elif value:
+            text_parts.append(str(value))
+    return ' '.join(text_parts)
+
+def content_hash(scholarship: Dict[str, Any]) -> str:
+    """Hash of the sentiment text, used to detect when a score is stale."""
+    return hashlib.sha256(sentiment_text(scholarship).encode()).hexdigest()
+
+def score_text(text: str) -> float:
+    """Run VADER over text and scale the compound score to 0-100."""
+    if not text.strip():
+        logger.debug("No text for sentiment analysis")
+        return 0.0
+
+    try:
+        vs = analyzer.polarity_scores(text)
+        score = (vs['compound'] + 1) * 50  # Scale to 0-100
+        logger.debug(f"Sentiment score: {score:.2f} (Compound: {vs['compound']:.2f})")
+        return score
+    except Exception as e:
+        logger.warning(f"Sentiment analysis failed: {str(e)}")
+        return 0.0
+
+def sentiment_fields(scholarship: Dict[str, Any], force: bool = False) -> Dict[str, Any]:
+    """Return the stored sentiment fields to $set, or {} if they are up to date.
+
+    sentiment_score and sentiment_hash are storage-only: they are not part
+    of the Scholarship API model, so clients can neither read nor set them.
+    """
+    digest = content_hash(scholarship)
+    if not force and scholarship.get('sentiment_hash') == digest and scholarship.get('sentiment_score') is not None:
+        return {}
+    return {'sentiment_score': score_text(sentiment_text(scholarship)), 'sentiment_hash': digest}
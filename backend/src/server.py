@@ -1,11 +1,9 @@
-import certifi
-from fastapi import FastAPI, HTTPException, Depends, Query
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
-from typing import List, Optional
+from typing import List, Optional, Union
 import os
+import time
 from datetime import datetime
-import hashlib
 from pydantic import BaseModel, EmailStr, Field
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
@@ -14,7 +12,14 @@ from src.dal import (
     UserProfile,
     UserProfileUpdate,
     UserProfileResponse,
+    RecommendationStatus,
+    RecommendationStatusResponse,
     Scholarship,
+    ScholarshipPage,
+    ScholarshipSummary,
+    ScholarshipSummaryPage,
+    summary_projection,
+    range_filter,
     AcademicMajor,
     AgeRange,
     Gender,
@@ -23,7 +28,17 @@ from src.dal import (
     SATScoreRange
 )
 from bson import ObjectId
-from src.recommendation import generate_recommendations
+from pymongo.errors import DuplicateKeyError
+from src.metrics import registry, request_spans, server_timing
+from src.pagination import InvalidCursor, ScholarshipSort
+from src.passwords import PasswordHasher
+from src.profile_cache import ProfileCache
+from src.responses import TrustedJSONResponse, shape
+from src.search_index import invalidate_search_index, ranked_search, tokenize
+from src.storage import create_client
+from src.recommendation import generate_recommendations, invalidate_catalog_cache, recommendation_cache
+from src.recommendation_cache import MongoCacheBackend
+from src.jobs import RecommendationJobQueue
 
 
 
@@ -33,6 +48,18 @@ load_dotenv()
 # Environment variables
 MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "scholarship_db")
+# "memory" keeps every collection in this process (benchmarks, offline testing), see src/storage.py
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo")
+# Set to "mongo" to share cached recommendations between workers
+RECOMMENDATION_CACHE_BACKEND = os.getenv("RECOMMENDATION_CACHE_BACKEND", "local")
+RECOMMENDATION_WORKERS = int(os.getenv("RECOMMENDATION_WORKERS", "2"))
+# Serialize scholarship lists straight from the DAL with orjson, skipping response_model validation
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "false").lower() in ("1", "true", "yes")
+# Send per-request span timings to clients in a Server-Timing header
+SERVER_TIMING = os.getenv("SERVER_TIMING", "true").lower() in ("1", "true", "yes")
+# Hydrated profiles cached per process; PROFILE_CACHE_TTL=0 turns the cache off
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "1024"))
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "30"))
 
 # Auth models
 class UserLogin(BaseModel):
@@ -52,26 +79,42 @@ class UserRegister(BaseModel):
     interests: Optional[List[str]] = None
 
 # Database connection
-client: AsyncIOMotorClient = None
+client = None
+# Background recommendation jobs, started in lifespan
+job_queue: RecommendationJobQueue = None
+# bcrypt runs on its own bounded thread pool, see src/passwords.py
+password_hasher = PasswordHasher()
+profile_cache = ProfileCache(max_entries=PROFILE_CACHE_SIZE, ttl_seconds=PROFILE_CACHE_TTL)
+
+registry.register("profile_cache_hits_total", "counter", "Profile reads served from the cache",
+                  lambda: profile_cache.hits)
+registry.register("profile_cache_misses_total", "counter", "Profile reads that went to Mongo",
+                  lambda: profile_cache.misses)
+registry.register("profile_cache_hit_ratio", "gauge", "Share of profile reads served from the cache",
+                  lambda: profile_cache.stats()["hit_ratio"])
+registry.register("profile_cache_entries", "gauge", "Profiles currently cached", lambda: len(profile_cache))
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global client
+    global client, job_queue
     try:
-        client = AsyncIOMotorClient(
-            MONGODB_URI,
-            tls=True,
-            tlsCAFile=certifi.where()
-        )
+        client = create_client(STORAGE_BACKEND, MONGODB_URI)
         await client.server_info()
-        print("✅ Connected to MongoDB!")
+        print("✅ Connected to MongoDB!" if STORAGE_BACKEND == "mongo" else "✅ Using in-memory storage")
         # Initialize indexes
-        dal = ScholarshipDAL(client[DATABASE_NAME]["users"], client[DATABASE_NAME]["scholarships"])
+        dal = get_dal()
         await dal.create_indexes()
+        if RECOMMENDATION_CACHE_BACKEND == "mongo":
+            recommendation_cache.backend = MongoCacheBackend(client[DATABASE_NAME]["recommendation_cache"])
+            await recommendation_cache.backend.create_indexes()
     except Exception as e:
         print(f"❌ MongoDB connection failed: {e}")
         raise
+    job_queue = RecommendationJobQueue(get_dal, workers=RECOMMENDATION_WORKERS)
+    await job_queue.start()
     yield
+    await job_queue.stop()
+    password_hasher.shutdown()
     if client:
         client.close()
 
@@ -90,57 +133,98 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Helper functions
-def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode()).hexdigest()
+@app.middleware("http")
+async def record_request_timing(request: Request, call_next):
+    started = time.perf_counter()
+    with request_spans() as spans:
+        response = await call_next(request)
+    elapsed = time.perf_counter() - started
+    # Label by route template so /users/{user_id} is one series; unmatched paths share one
+    route = request.scope.get("route")
+    registry.observe(
+        "http_request_duration_seconds", elapsed,
+        method=request.method, route=getattr(route, "path", "unmatched"), status=str(response.status_code)
+    )
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = server_timing(spans, elapsed)
+    return response
 
+# Helper functions
 def get_dal() -> ScholarshipDAL:
     return ScholarshipDAL(
         user_collection=client[DATABASE_NAME]["users"],
-        scholarship_collection=client[DATABASE_NAME]["scholarships"]
+        scholarship_collection=client[DATABASE_NAME]["scholarships"],
+        meta_collection=client[DATABASE_NAME]["meta"],
+        profile_cache=profile_cache
     )
 
+def scholarship_projection(fields: Optional[str]) -> Optional[dict]:
+    """Projection for a fields= query value; None returns whole documents."""
+    if fields is None:
+        return None
+    try:
+        return summary_projection(fields)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+def scholarship_list_model(projection: Optional[dict]):
+    return ScholarshipSummary if projection is not None else Scholarship
+
+def scholarship_list_response(scholarships: List[dict], projection: Optional[dict]):
+    """Scholarships in the model chosen by fields=, never by matching documents against a union.
+
+    A full document that happens to hold only summary keys would otherwise
+    validate as a summary and lose the rest of its fields.
+    """
+    model = scholarship_list_model(projection)
+    if FAST_JSON_RESPONSES:
+        return TrustedJSONResponse(shape(scholarships, model))
+    return [model.model_validate(scholarship) for scholarship in scholarships]
+
 # Authentication endpoints
 @app.post("/register", response_model=UserProfileResponse)
 async def register_user(user_data: UserRegister, dal: ScholarshipDAL = Depends(get_dal)):
-    existing_user = await dal.user_collection.find_one({"email": user_data.email})
+    existing_user = await dal.fetch_credentials(user_data.email)
     if existing_user:
         raise HTTPException(400, "Email already registered")
     
     user_dict = user_data.model_dump(exclude={"password"})
     user_profile = UserProfile(
         **user_dict,
-        password=hash_password(user_data.password)
+        password=await password_hasher.hash(user_data.password)
     )
     
-    # Insert user
-    result = await dal.user_collection.insert_one(user_profile.model_dump(by_alias=True))
-    
-    # Generate recommendations
+    # Insert user; recommendations are computed in the background
+    user = user_profile.model_dump(by_alias=True)
+    user["recommend_status"] = RecommendationStatus.PENDING.value
     try:
-        user = await dal.fetch_profile(str(result.inserted_id))
-        recommended_scholarships = await generate_recommendations(user, dal)
-        
-        # Update with recommendations
-        await dal.user_collection.update_one(
-            {"_id": result.inserted_id},
-            {"$set": {"recommend": recommended_scholarships}}
-        )
-        user = await dal.fetch_profile(str(result.inserted_id))
-    except Exception as e:
-        ohh=1
-    
+        result = await dal.user_collection.insert_one(user)
+    except DuplicateKeyError:
+        # Lost a race with a concurrent registration, caught by the unique email index
+        raise HTTPException(400, "Email already registered")
+    user_id = str(result.inserted_id)
+    job_queue.enqueue(user_id)
+
+    user["_id"] = user_id
+    user.pop("password", None)
     return user
 
 
 @app.post("/login", response_model=UserProfileResponse)
 async def login_user(user_data: UserLogin, dal: ScholarshipDAL = Depends(get_dal)):
-    user = await dal.user_collection.find_one({"email": user_data.email})
-    if not user or user["password"] != hash_password(user_data.password):
+    credentials = await dal.fetch_credentials(user_data.email)
+    if not credentials:
+        raise HTTPException(401, "Invalid credentials")
+    valid, needs_rehash = await password_hasher.verify(user_data.password, credentials["password"])
+    if not valid:
         raise HTTPException(401, "Invalid credentials")
     
-    user["_id"] = str(user["_id"])
-    user.pop("password", None)
+    if needs_rehash:
+        # Legacy SHA-256 (or old-cost bcrypt) hashes are upgraded while the password is at hand
+        await dal.set_password(credentials["_id"], await password_hasher.hash(user_data.password))
+    user = await dal.fetch_profile(credentials["_id"])
+    if not user:
+        raise HTTPException(401, "Invalid credentials")
     return UserProfileResponse(**user)
 
 # User endpoints
@@ -161,22 +245,35 @@ async def update_user(
     update_dict = update_data.model_dump(exclude_unset=True)
     
     if 'password' in update_dict:
-        update_dict['password'] = hash_password(update_dict['password'])
+        update_dict['password'] = await password_hasher.hash(update_dict['password'])
     
-    # Update user
+    # Update user; recommendations are recomputed in the background
+    update_dict['recommend_status'] = RecommendationStatus.PENDING.value
     updated_user = await dal.modify_profile(user_id, update_dict)
-    
-    # Generate new recommendations
-    try:
-        recommended_scholarships = await generate_recommendations(updated_user, dal)
-        await dal.modify_profile(user_id, {"recommend": recommended_scholarships})
-        updated_user = await dal.fetch_profile(user_id)
-    except Exception as e:
-        #print(f"Recommendation update error: {str(e)}")
-        ohh=1
-    
+    if not updated_user:
+        raise HTTPException(404, "User not found")
+    job_queue.enqueue(user_id)
+
     return updated_user
 
+@app.get("/users/{user_id}/recommendations/status", response_model=RecommendationStatusResponse)
+async def get_recommendation_status(
+    user_id: str,
+    wait: bool = Query(False, description="Block until the pending recomputation finishes"),
+    timeout: float = Query(10.0, gt=0, le=60),
+    dal: ScholarshipDAL = Depends(get_dal)
+):
+    if wait:
+        await job_queue.wait(user_id, timeout)
+    user = await dal.fetch_profile(user_id)
+    if not user:
+        raise HTTPException(404, "User not found")
+    return {
+        "status": user.get("recommend_status"),
+        "error": user.get("recommend_error"),
+        "done": not job_queue.is_active(user_id)
+    }
+
 
 @app.delete("/users/{user_id}")
 async def delete_user(user_id: str, dal: ScholarshipDAL = Depends(get_dal)):
@@ -189,24 +286,60 @@ async def delete_user(user_id: str, dal: ScholarshipDAL = Depends(get_dal)):
 @app.post("/scholarships", response_model=Scholarship)
 async def create_scholarship(scholarship: Scholarship, dal: ScholarshipDAL = Depends(get_dal)):
     await dal.add_scholarship(scholarship)
+    invalidate_catalog_cache()
+    invalidate_search_index()
     return scholarship
 
-@app.get("/scholarships", response_model=List[Scholarship])
+# The response model depends on fields=, so each handler validates against the one it picked;
+# responses= only documents the possible shapes
+@app.get("/scholarships", response_model=None, responses={
+    200: {"model": Union[List[Scholarship], List[ScholarshipSummary], ScholarshipPage, ScholarshipSummaryPage]}
+})
 async def get_scholarships(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, le=1000),
+    cursor: Optional[str] = Query(None, description="Keyset cursor; pass an empty value for the first page"),
+    sort: ScholarshipSort = Query(ScholarshipSort.ID),
+    descending: bool = Query(False),
+    fields: Optional[str] = Query(None, description="Comma-separated summary fields, or 'summary'"),
     dal: ScholarshipDAL = Depends(get_dal)
 ):
-    return await dal.fetch_all_scholarships(skip=skip, limit=limit)
+    projection = scholarship_projection(fields)
+    # Without a cursor the endpoint keeps returning a plain skip/limit list
+    if cursor is None:
+        scholarships = await dal.fetch_all_scholarships(skip=skip, limit=limit, projection=projection)
+        return scholarship_list_response(scholarships, projection)
+    if limit < 1:
+        raise HTTPException(400, "limit must be positive when paging with a cursor")
+    try:
+        items, next_cursor = await dal.fetch_scholarships_page(
+            limit=limit, sort=sort, descending=descending, cursor=cursor, projection=projection
+        )
+    except InvalidCursor as e:
+        raise HTTPException(400, str(e))
+    if FAST_JSON_RESPONSES:
+        return TrustedJSONResponse({"items": shape(items, scholarship_list_model(projection)), "next_cursor": next_cursor})
+    page_model = ScholarshipSummaryPage if projection is not None else ScholarshipPage
+    return page_model.model_validate({"items": items, "next_cursor": next_cursor})
 
-@app.get("/scholarships/search", response_model=List[Scholarship])
+@app.get("/scholarships/search", response_model=None, responses={
+    200: {"model": Union[List[Scholarship], List[ScholarshipSummary]]}
+})
 async def search_scholarships(
+    q: Optional[str] = Query(None, description="Free-text query over title, description, details and criteria; "
+                                               "results are ranked by relevance"),
     academic_majors: Optional[List[AcademicMajor]] = Query(None),
     age_ranges: Optional[List[AgeRange]] = Query(None),
     genders: Optional[List[Gender]] = Query(None),
     financial_needs: Optional[List[FinancialNeed]] = Query(None),
+    grade_point_average: Optional[float] = Query(None, ge=0, le=4, description="Only scholarships open to this GPA"),
+    sat_score: Optional[int] = Query(None, ge=0, le=1600, description="Only scholarships open to this SAT score"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description="Comma-separated summary fields, or 'summary'"),
     dal: ScholarshipDAL = Depends(get_dal)
 ):
+    projection = scholarship_projection(fields)
     filters = {}
     if academic_majors:
         filters["academic_major"] = {"$in": academic_majors}
@@ -216,16 +349,37 @@ async def search_scholarships(
         filters["gender"] = {"$in": genders}
     if financial_needs:
         filters["financial_need"] = {"$in": financial_needs}
-    
-    return await dal.search_scholarships(filters)
+    ranges = [range_filter(field, value) for field, value in
+              (("grade_point_average", grade_point_average), ("sat_score", sat_score)) if value is not None]
+    if ranges:
+        filters["$and"] = ranges
+
+    if q is not None and tokenize(q):
+        scholarships = await ranked_search(dal, q, filters, projection=projection, skip=skip, limit=limit)
+    else:
+        scholarships = await dal.search_scholarships(filters, projection=projection, skip=skip, limit=limit)
+    return scholarship_list_response(scholarships, projection)
+
+@app.get("/scholarships/{scholarship_id}", response_model=Scholarship)
+async def get_scholarship(scholarship_id: str, dal: ScholarshipDAL = Depends(get_dal)):
+    scholarships = await dal.fetch_scholarships_by_ids([scholarship_id])
+    if not scholarships:
+        raise HTTPException(404, "Scholarship not found")
+    return scholarships[0]
 
 @app.delete("/scholarships/{scholarship_id}")
 async def delete_scholarship(scholarship_id: str, dal: ScholarshipDAL = Depends(get_dal)):
     success = await dal.delete_scholarship(scholarship_id)
     if not success:
         raise HTTPException(404, "Scholarship not found")
+    invalidate_catalog_cache()
+    invalidate_search_index()
     return {"message": "Scholarship deleted"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Health check
 @app.get("/health")
 async def health_check():
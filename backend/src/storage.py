@@ -0,0 +1,708 @@
+# storage.py
+"""Storage backends behind ScholarshipDAL.
+
+The DAL, the recommendation cache and the server only use the part of
+Motor's collection API described by ``Collection``. STORAGE_BACKEND picks
+what implements it: "mongo" connects to MONGODB_URI with Motor, "memory"
+keeps every collection in this process with MemoryCollection, so the API,
+benchmarks and load tests run without a database.
+
+MemoryCollection implements the query operators, updates, projections and
+sorts the DAL issues, with MongoDB's rules for missing fields, arrays and
+ordering across types. Single-field unique indexes are enforced and also
+serve equality and $in lookups; other indexes are only recorded, and TTL
+indexes don't expire anything. Operators it doesn't know raise
+NotImplementedError instead of quietly matching nothing.
+"""
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Protocol, Tuple, Union
+from datetime import datetime, timezone
+from enum import Enum
+import asyncio
+import re
+import certifi
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pymongo.results import BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+STORAGE_BACKENDS = ("mongo", "memory")
+
+
+class Collection(Protocol):
+    """The collection methods the backend code calls, as Motor defines them."""
+
+    def find(self, filter: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, Any]] = None) -> Any: ...
+    async def find_one(self, filter: Optional[Dict[str, Any]] = None,
+                       projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]: ...
+    async def find_one_and_update(self, filter: Dict[str, Any], update: Dict[str, Any], **kwargs: Any) -> Any: ...
+    async def insert_one(self, document: Dict[str, Any]) -> InsertOneResult: ...
+    async def insert_many(self, documents: Iterable[Dict[str, Any]], ordered: bool = True) -> InsertManyResult: ...
+    async def update_one(self, filter: Dict[str, Any], update: Dict[str, Any], upsert: bool = False) -> UpdateResult: ...
+    async def replace_one(self, filter: Dict[str, Any], replacement: Dict[str, Any],
+                          upsert: bool = False) -> UpdateResult: ...
+    async def delete_one(self, filter: Dict[str, Any]) -> DeleteResult: ...
+    async def bulk_write(self, requests: List[Any], ordered: bool = True) -> BulkWriteResult: ...
+    async def count_documents(self, filter: Dict[str, Any]) -> int: ...
+    async def create_index(self, keys: Any, **kwargs: Any) -> str: ...
+
+
+def create_client(backend: str, uri: str):
+    """Client for the configured backend; both are indexed as client[db][collection]."""
+    if backend == "mongo":
+        return AsyncIOMotorClient(uri, tls=True, tlsCAFile=certifi.where())
+    if backend == "memory":
+        return MemoryClient()
+    raise ValueError(f"Unknown STORAGE_BACKEND {backend!r}, expected one of {', '.join(STORAGE_BACKENDS)}")
+
+
+# ---- Values ----
+
+_MISSING = object()
+
+
+def _copy(value: Any) -> Any:
+    """What a BSON round trip returns: fresh containers, plain strings for enums,
+    naive UTC datetimes with millisecond precision."""
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_copy(item) for item in value]
+    if isinstance(value, Enum):
+        return _copy(value.value)
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    return value
+
+
+def _type_rank(value: Any) -> int:
+    """Position of the value's type in MongoDB's cross-type sort order."""
+    if value is None or value is _MISSING:
+        return 1
+    if isinstance(value, bool):
+        return 8
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, str):
+        return 3
+    if isinstance(value, dict):
+        return 4
+    if isinstance(value, list):
+        return 5
+    if isinstance(value, bytes):
+        return 6
+    if isinstance(value, ObjectId):
+        return 7
+    if isinstance(value, datetime):
+        return 9
+    return 10
+
+
+def _order_key(value: Any) -> Tuple[int, Any]:
+    rank = _type_rank(value)
+    if rank == 1:
+        return rank, 0
+    if rank in (4, 5, 10):
+        return rank, repr(value)
+    return rank, value
+
+
+def _equal(a: Any, b: Any) -> bool:
+    if _type_rank(a) != _type_rank(b):
+        return False
+    return a == b
+
+
+def _hashable(value: Any) -> Any:
+    if isinstance(value, list):
+        return tuple(_hashable(item) for item in value)
+    if isinstance(value, dict):
+        return tuple((key, _hashable(item)) for key, item in value.items())
+    return value
+
+
+def _values(doc: Any, path: str) -> List[Any]:
+    """Every value at a dotted path, descending through arrays; [] when missing."""
+    current = [doc]
+    for part in path.split("."):
+        found = []
+        for value in current:
+            if isinstance(value, dict):
+                if part in value:
+                    found.append(value[part])
+            elif isinstance(value, list):
+                if part.isdigit() and int(part) < len(value):
+                    found.append(value[int(part)])
+                found.extend(item[part] for item in value if isinstance(item, dict) and part in item)
+        current = found
+    return current
+
+
+def _candidates(values: List[Any]) -> Iterable[Any]:
+    """Values a condition is tested against: each value, and the elements of arrays."""
+    for value in values:
+        yield value
+        if isinstance(value, list):
+            yield from value
+
+
+# ---- Queries ----
+
+_TYPE_ALIASES: Dict[str, Callable[[Any], bool]] = {
+    "string": lambda v: isinstance(v, str),
+    "objectId": lambda v: isinstance(v, ObjectId),
+    "null": lambda v: v is None,
+    "double": lambda v: isinstance(v, float),
+    "int": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "long": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "bool": lambda v: isinstance(v, bool),
+    "date": lambda v: isinstance(v, datetime),
+    "array": lambda v: isinstance(v, list),
+    "object": lambda v: isinstance(v, dict),
+}
+
+
+def _eq(values: List[Any], operand: Any) -> bool:
+    if operand is None and not values:
+        return True
+    return any(_equal(candidate, operand) for candidate in _candidates(values))
+
+
+def _compare(values: List[Any], operand: Any, test: Callable[[Any, Any], bool], inclusive: bool) -> bool:
+    if operand is None:
+        # Only $gte/$lte null match, and only null or missing values
+        return inclusive and (not values or any(c is None for c in _candidates(values)))
+    rank = _type_rank(operand)
+    return any(_type_rank(c) == rank and test(c, operand) for c in _candidates(values))
+
+
+def _match_operator(values: List[Any], op: str, operand: Any, condition: Dict[str, Any]) -> bool:
+    if op == "$eq":
+        return _eq(values, operand)
+    if op == "$ne":
+        return not _eq(values, operand)
+    if op == "$in":
+        return any(_eq(values, item) for item in operand)
+    if op == "$nin":
+        return not any(_eq(values, item) for item in operand)
+    if op == "$gt":
+        return _compare(values, operand, lambda a, b: a > b, False)
+    if op == "$gte":
+        return _compare(values, operand, lambda a, b: a >= b, True)
+    if op == "$lt":
+        return _compare(values, operand, lambda a, b: a < b, False)
+    if op == "$lte":
+        return _compare(values, operand, lambda a, b: a <= b, True)
+    if op == "$exists":
+        return bool(values) == bool(operand)
+    if op == "$type":
+        aliases = operand if isinstance(operand, list) else [operand]
+        checks = []
+        for alias in aliases:
+            if alias not in _TYPE_ALIASES:
+                raise NotImplementedError(f"$type {alias!r} is not supported by the memory backend")
+            checks.append(_TYPE_ALIASES[alias])
+        return any(check(c) for c in _candidates(values) for check in checks)
+    if op == "$size":
+        return any(isinstance(v, list) and len(v) == operand for v in values)
+    if op == "$elemMatch":
+        is_operator = all(key.startswith("$") for key in operand)
+        for value in values:
+            if isinstance(value, list):
+                for item in value:
+                    if is_operator and _match_field([item], operand):
+                        return True
+                    if not is_operator and isinstance(item, (dict, list)) and matches(item, operand):
+                        return True
+        return False
+    if op == "$not":
+        return not _match_field(values, operand)
+    if op == "$regex":
+        pattern = re.compile(operand, _regex_flags(condition.get("$options", "")))
+        return any(isinstance(c, str) and pattern.search(c) for c in _candidates(values))
+    if op == "$options":
+        return True
+    raise NotImplementedError(f"Query operator {op} is not supported by the memory backend")
+
+
+def _regex_flags(options: str) -> int:
+    flags = 0
+    for option, flag in (("i", re.IGNORECASE), ("m", re.MULTILINE), ("s", re.DOTALL), ("x", re.VERBOSE)):
+        if option in options:
+            flags |= flag
+    return flags
+
+
+def _is_operator_dict(condition: Any) -> bool:
+    return isinstance(condition, dict) and bool(condition) and all(key.startswith("$") for key in condition)
+
+
+def _match_field(values: List[Any], condition: Any) -> bool:
+    if _is_operator_dict(condition):
+        return all(_match_operator(values, op, operand, condition) for op, operand in condition.items())
+    if isinstance(condition, re.Pattern):
+        return any(isinstance(c, str) and condition.search(c) for c in _candidates(values))
+    return _eq(values, condition)
+
+
+def matches(doc: Any, query: Optional[Dict[str, Any]]) -> bool:
+    """Whether a document satisfies a MongoDB query."""
+    for key, condition in (query or {}).items():
+        if key == "$and":
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$nor":
+            if any(matches(doc, sub) for sub in condition):
+                return False
+        elif key.startswith("$"):
+            raise NotImplementedError(f"Query operator {key} is not supported by the memory backend")
+        elif not _match_field(_values(doc, key), condition):
+            return False
+    return True
+
+
+# ---- Updates ----
+
+def _parent(doc: Dict[str, Any], path: str, create: bool) -> Tuple[Optional[Dict[str, Any]], str]:
+    parts = path.split(".")
+    current = doc
+    for part in parts[:-1]:
+        if not isinstance(current.get(part), dict):
+            if not create:
+                return None, parts[-1]
+            current[part] = {}
+        current = current[part]
+    return current, parts[-1]
+
+
+def _get(doc: Dict[str, Any], path: str) -> Any:
+    parent, key = _parent(doc, path, create=False)
+    return parent.get(key, _MISSING) if parent is not None else _MISSING
+
+
+def _set(doc: Dict[str, Any], path: str, value: Any) -> bool:
+    parent, key = _parent(doc, path, create=True)
+    if key in parent and _equal(parent[key], value):
+        return False
+    parent[key] = value
+    return True
+
+
+def apply_update(doc: Dict[str, Any], update: Dict[str, Any], inserting: bool = False) -> bool:
+    """Apply update operators to doc in place; returns whether anything changed."""
+    changed = False
+    for op, fields in update.items():
+        if op == "$setOnInsert" and not inserting:
+            continue
+        for path, operand in fields.items():
+            if path == "_id" and op in ("$set", "$unset", "$inc") and not inserting:
+                raise ValueError("Performing an update on the path '_id' would modify the immutable field '_id'")
+            if op in ("$set", "$setOnInsert"):
+                changed |= _set(doc, path, _copy(operand))
+            elif op == "$unset":
+                parent, key = _parent(doc, path, create=False)
+                if parent is not None and key in parent:
+                    del parent[key]
+                    changed = True
+            elif op == "$inc":
+                current = _get(doc, path)
+                changed |= _set(doc, path, operand if current is _MISSING or current is None else current + operand)
+            elif op in ("$addToSet", "$push"):
+                items = operand["$each"] if isinstance(operand, dict) and "$each" in operand else [operand]
+                current = _get(doc, path)
+                if current is _MISSING or current is None:
+                    current = []
+                    _set(doc, path, current)
+                    changed = True
+                elif not isinstance(current, list):
+                    raise ValueError(f"Cannot apply {op} to non-array field {path}")
+                for item in items:
+                    if op == "$push" or not any(_equal(existing, item) for existing in current):
+                        current.append(_copy(item))
+                        changed = True
+            else:
+                raise NotImplementedError(f"Update operator {op} is not supported by the memory backend")
+    return changed
+
+
+def _upsert_document(query: Dict[str, Any]) -> Dict[str, Any]:
+    """The equality fields of a query, which an upsert inserts along with the update."""
+    doc: Dict[str, Any] = {}
+    for key, condition in query.items():
+        if key == "$and":
+            for sub in condition:
+                doc.update(_upsert_document(sub))
+        elif not key.startswith("$"):
+            if _is_operator_dict(condition):
+                if "$eq" in condition:
+                    _set(doc, key, _copy(condition["$eq"]))
+            else:
+                _set(doc, key, _copy(condition))
+    return doc
+
+
+# ---- Projection and sorting ----
+
+def project(doc: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Copy of a stored document with a top-level inclusion or exclusion projection applied."""
+    if not projection:
+        return _copy(doc)
+    include_id = bool(projection.get("_id", 1))
+    fields = {key: value for key, value in projection.items() if key != "_id"}
+    if any("." in key for key in fields):
+        raise NotImplementedError("Dotted projections are not supported by the memory backend")
+    if fields and all(fields.values()):
+        result = {key: _copy(doc[key]) for key in fields if key in doc}
+        if include_id and "_id" in doc:
+            result = {"_id": doc["_id"], **result}
+        return result
+    excluded = {key for key, value in fields.items() if not value}
+    if not include_id:
+        excluded.add("_id")
+    return {key: _copy(value) for key, value in doc.items() if key not in excluded}
+
+
+def _sort_spec(key_or_list: Union[str, List[Tuple[str, int]]], direction: Optional[int]) -> List[Tuple[str, int]]:
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction or 1)]
+    return list(key_or_list)
+
+
+def _sort_value(doc: Dict[str, Any], field: str, descending: bool) -> Tuple[int, Any]:
+    values = _values(doc, field)
+    if not values:
+        return _order_key(None)
+    value = values[0] if len(values) == 1 else values
+    if isinstance(value, list):
+        # Arrays sort by their smallest element ascending and largest descending
+        elements = [_order_key(item) for item in _candidates([value]) if not isinstance(item, list)] \
+            if value else [(0, 0)]
+        return max(elements) if descending else min(elements)
+    return _order_key(value)
+
+
+def sort_documents(docs: List[Dict[str, Any]], spec: List[Tuple[str, int]]) -> List[Dict[str, Any]]:
+    # Stable sorts from the last key to the first give the compound order
+    for field, direction in reversed(spec):
+        descending = direction == -1
+        docs = sorted(docs, key=lambda doc: _sort_value(doc, field, descending), reverse=descending)
+    return docs
+
+
+# ---- Collections ----
+
+class MemoryCursor:
+    def __init__(self, collection: "MemoryCollection", query: Optional[Dict[str, Any]],
+                 projection: Optional[Dict[str, Any]]):
+        self.collection = collection
+        self.query = query or {}
+        self.projection = projection
+        self._sort: List[Tuple[str, int]] = []
+        self._skip = 0
+        self._limit = 0
+        self._batch_size = 101
+
+    def sort(self, key_or_list: Union[str, List[Tuple[str, int]]], direction: Optional[int] = None) -> "MemoryCursor":
+        self._sort = _sort_spec(key_or_list, direction)
+        return self
+
+    def skip(self, skip: int) -> "MemoryCursor":
+        self._skip = skip
+        return self
+
+    def limit(self, limit: int) -> "MemoryCursor":
+        self._limit = limit
+        return self
+
+    def batch_size(self, batch_size: int) -> "MemoryCursor":
+        self._batch_size = batch_size
+        return self
+
+    def _documents(self) -> List[Dict[str, Any]]:
+        docs = self.collection._matching(self.query)
+        if self._sort:
+            docs = sort_documents(docs, self._sort)
+        docs = docs[self._skip:]
+        if self._limit:
+            docs = docs[:abs(self._limit)]
+        return docs
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict[str, Any]]:
+        docs = self._documents()
+        return [project(doc, self.projection) for doc in (docs[:length] if length else docs)]
+
+    async def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        # Yield to the event loop once per batch, as Motor does between round trips
+        for i, doc in enumerate(self._documents(), 1):
+            yield project(doc, self.projection)
+            if i % self._batch_size == 0:
+                await asyncio.sleep(0)
+
+
+class MemoryCollection:
+    """A collection held in a dict keyed by _id, in insertion (natural) order."""
+
+    def __init__(self, name: str = "collection"):
+        self.name = name
+        self.documents: Dict[Any, Dict[str, Any]] = {}
+        self.indexes: Dict[str, Dict[str, Any]] = {"_id_": {"key": [("_id", 1)], "unique": True}}
+        # Single-field unique indexes: field -> indexed value -> _id
+        self._unique: Dict[str, Dict[Any, Any]] = {}
+
+    # Index maintenance
+    def _index_key(self, doc: Dict[str, Any], field: str) -> Any:
+        values = _values(doc, field)
+        return _hashable(values[0]) if values else None
+
+    def _check_unique(self, doc: Dict[str, Any], own_id: Any = _MISSING):
+        if own_id is _MISSING and doc["_id"] in self.documents:
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: _id_ "
+                                    f"dup key: {{ _id: {doc['_id']!r} }}", 11000)
+        for field, entries in self._unique.items():
+            existing = entries.get(self._index_key(doc, field), _MISSING)
+            if existing is not _MISSING and existing != own_id:
+                raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: {field}_1 "
+                                        f"dup key: {{ {field}: {self._index_key(doc, field)!r} }}", 11000)
+
+    def _index(self, doc: Dict[str, Any]):
+        for field, entries in self._unique.items():
+            entries[self._index_key(doc, field)] = doc["_id"]
+
+    def _unindex(self, doc: Dict[str, Any]):
+        for field, entries in self._unique.items():
+            entries.pop(self._index_key(doc, field), None)
+
+    def _store(self, doc: Dict[str, Any]):
+        self._check_unique(doc)
+        self.documents[doc["_id"]] = doc
+        self._index(doc)
+
+    def _replace(self, old: Dict[str, Any], new: Dict[str, Any]):
+        self._check_unique(new, own_id=old["_id"])
+        self._unindex(old)
+        self.documents[old["_id"]] = new
+        self._index(new)
+
+    def _remove(self, doc: Dict[str, Any]):
+        self._unindex(doc)
+        del self.documents[doc["_id"]]
+
+    # Lookup
+    def _lookup(self, query: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """Documents for a query on _id or a unique field, None when it needs a scan."""
+        for field, condition in query.items():
+            if field == "_id":
+                index = None
+            elif field in self._unique:
+                index = self._unique[field]
+            else:
+                continue
+            if isinstance(condition, dict) and set(condition) == {"$in"}:
+                keys = condition["$in"]
+            elif isinstance(condition, (dict, list, re.Pattern)):
+                continue
+            else:
+                keys = [condition]
+            ids = keys if index is None else [index.get(_hashable(key), _MISSING) for key in keys]
+            found: Dict[Any, Dict[str, Any]] = {}
+            for _id in ids:
+                doc = self.documents.get(_id) if not isinstance(_id, (list, dict)) else None
+                if doc is not None:
+                    found[_id] = doc
+            # Unsorted $in results come back in $in order rather than natural order
+            return list(found.values())
+        return None
+
+    def _matching(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        candidates = self._lookup(query)
+        if candidates is None:
+            candidates = self.documents.values()
+        return [doc for doc in candidates if matches(doc, query)]
+
+    def _first(self, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        candidates = self._lookup(query)
+        for doc in candidates if candidates is not None else self.documents.values():
+            if matches(doc, query):
+                return doc
+        return None
+
+    # Reads
+    def find(self, filter: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, Any]] = None) -> MemoryCursor:
+        return MemoryCursor(self, filter, projection)
+
+    async def find_one(self, filter: Optional[Dict[str, Any]] = None,
+                       projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        doc = self._first(filter or {})
+        return project(doc, projection) if doc is not None else None
+
+    async def count_documents(self, filter: Dict[str, Any]) -> int:
+        return len(self._matching(filter))
+
+    # Writes
+    def _insert(self, document: Dict[str, Any]) -> Any:
+        if "_id" not in document:
+            # Like pymongo, the caller's document gets the generated _id
+            document["_id"] = ObjectId()
+        self._store(_copy(document))
+        return document["_id"]
+
+    def _update(self, query: Dict[str, Any], update: Dict[str, Any], upsert: bool, many: bool = False,
+                replace: bool = False) -> Dict[str, Any]:
+        """Apply an update; returns {n, nModified, upserted, before, after} for the result types."""
+        if not replace and not _is_operator_dict(update):
+            raise ValueError("update only works with $ operators")
+        targets = self._matching(query) if many else [doc for doc in [self._first(query)] if doc is not None]
+        result: Dict[str, Any] = {"n": 0, "nModified": 0, "upserted": None, "before": None, "after": None}
+        for doc in targets:
+            new = _copy(doc)
+            if replace:
+                new = {"_id": doc["_id"], **_copy({k: v for k, v in update.items() if k != "_id"})}
+                changed = new != doc
+            else:
+                changed = apply_update(new, update)
+            if changed:
+                self._replace(doc, new)
+            result["n"] += 1
+            result["nModified"] += int(changed)
+            result["before"], result["after"] = doc, new
+        if not targets and upsert:
+            new = _upsert_document(query)
+            if replace:
+                new.update(_copy({k: v for k, v in update.items() if k != "_id"}))
+            else:
+                apply_update(new, update, inserting=True)
+            new.setdefault("_id", ObjectId())
+            self._store(new)
+            result["upserted"] = new["_id"]
+            result["after"] = new
+        return result
+
+    async def insert_one(self, document: Dict[str, Any]) -> InsertOneResult:
+        return InsertOneResult(self._insert(document), True)
+
+    async def insert_many(self, documents: Iterable[Dict[str, Any]], ordered: bool = True) -> InsertManyResult:
+        return InsertManyResult([self._insert(document) for document in documents], True)
+
+    async def update_one(self, filter: Dict[str, Any], update: Dict[str, Any], upsert: bool = False) -> UpdateResult:
+        result = self._update(filter, update, upsert)
+        return UpdateResult({"n": result["n"] + (result["upserted"] is not None), "nModified": result["nModified"],
+                             "upserted": result["upserted"]}, True)
+
+    async def update_many(self, filter: Dict[str, Any], update: Dict[str, Any], upsert: bool = False) -> UpdateResult:
+        result = self._update(filter, update, upsert, many=True)
+        return UpdateResult({"n": result["n"] + (result["upserted"] is not None), "nModified": result["nModified"],
+                             "upserted": result["upserted"]}, True)
+
+    async def replace_one(self, filter: Dict[str, Any], replacement: Dict[str, Any],
+                          upsert: bool = False) -> UpdateResult:
+        result = self._update(filter, replacement, upsert, replace=True)
+        return UpdateResult({"n": result["n"] + (result["upserted"] is not None), "nModified": result["nModified"],
+                             "upserted": result["upserted"]}, True)
+
+    async def find_one_and_update(self, filter: Dict[str, Any], update: Dict[str, Any],
+                                  projection: Optional[Dict[str, Any]] = None, return_document: bool = False,
+                                  upsert: bool = False) -> Optional[Dict[str, Any]]:
+        # return_document is pymongo's ReturnDocument: False before the update, True after
+        result = self._update(filter, update, upsert)
+        doc = result["after"] if return_document else result["before"]
+        return project(doc, projection) if doc is not None else None
+
+    async def delete_one(self, filter: Dict[str, Any]) -> DeleteResult:
+        doc = self._first(filter)
+        if doc is not None:
+            self._remove(doc)
+        return DeleteResult({"n": int(doc is not None)}, True)
+
+    async def delete_many(self, filter: Dict[str, Any]) -> DeleteResult:
+        docs = self._matching(filter)
+        for doc in docs:
+            self._remove(doc)
+        return DeleteResult({"n": len(docs)}, True)
+
+    async def bulk_write(self, requests: List[Any], ordered: bool = True) -> BulkWriteResult:
+        details: Dict[str, Any] = {"writeErrors": [], "writeConcernErrors": [], "nInserted": 0, "nUpserted": 0,
+                                   "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": []}
+        for index, request in enumerate(requests):
+            try:
+                if isinstance(request, InsertOne):
+                    self._insert(request._doc)
+                    details["nInserted"] += 1
+                    continue
+                if isinstance(request, (DeleteOne, DeleteMany)):
+                    docs = self._matching(request._filter)
+                    for doc in docs[:1] if isinstance(request, DeleteOne) else docs:
+                        self._remove(doc)
+                        details["nRemoved"] += 1
+                    continue
+                if not isinstance(request, (UpdateOne, UpdateMany, ReplaceOne)):
+                    raise NotImplementedError(f"{type(request).__name__} is not supported by the memory backend")
+                result = self._update(request._filter, request._doc, bool(request._upsert),
+                                      many=isinstance(request, UpdateMany), replace=isinstance(request, ReplaceOne))
+                details["nMatched"] += result["n"]
+                details["nModified"] += result["nModified"]
+                if result["upserted"] is not None:
+                    details["nUpserted"] += 1
+                    details["upserted"].append({"index": index, "_id": result["upserted"]})
+            except DuplicateKeyError as e:
+                details["writeErrors"].append({"index": index, "code": 11000, "errmsg": str(e), "op": request})
+                if ordered:
+                    break
+        if details["writeErrors"]:
+            raise BulkWriteError(details)
+        return BulkWriteResult(details, True)
+
+    async def create_index(self, keys: Union[str, List[Tuple[str, int]]], unique: bool = False, **kwargs: Any) -> str:
+        spec = _sort_spec(keys, None)
+        name = kwargs.get("name") or "_".join(f"{field}_{direction}" for field, direction in spec)
+        if unique and len(spec) == 1 and spec[0][0] != "_id" and spec[0][0] not in self._unique:
+            field = spec[0][0]
+            entries: Dict[Any, Any] = {}
+            for doc in self.documents.values():
+                key = self._index_key(doc, field)
+                if key in entries:
+                    raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: {name} "
+                                            f"dup key: {{ {field}: {key!r} }}", 11000)
+                entries[key] = doc["_id"]
+            self._unique[field] = entries
+        self.indexes[name] = {"key": spec, "unique": unique, **kwargs}
+        return name
+
+
+class MemoryDatabase:
+    def __init__(self, name: str):
+        self.name = name
+        self.collections: Dict[str, MemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        if name not in self.collections:
+            self.collections[name] = MemoryCollection(f"{self.name}.{name}")
+        return self.collections[name]
+
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+
+class MemoryClient:
+    """Stands in for AsyncIOMotorClient when STORAGE_BACKEND=memory."""
+
+    def __init__(self):
+        self.databases: Dict[str, MemoryDatabase] = {}
+
+    def __getitem__(self, name: str) -> MemoryDatabase:
+        if name not in self.databases:
+            self.databases[name] = MemoryDatabase(name)
+        return self.databases[name]
+
+    async def server_info(self) -> Dict[str, Any]:
+        return {"version": "memory"}
+
+    def close(self):
+        pass
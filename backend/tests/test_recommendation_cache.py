@@ -0,0 +1,60 @@
+# test_recommendation_cache.py
+import asyncio
+from src import recommendation
+from src.dal import ScholarshipDAL
+from src.recommendation import compute_recommendations, invalidate_catalog_cache
+from src.recommendation_cache import InMemoryCacheBackend, RecommendationCache, cache_key
+from src.storage import MemoryClient
+from benchmarks.synthetic import make_catalog, make_users
+
+
+def test_lru_evicts_least_recently_used():
+    async def scenario():
+        cache = RecommendationCache(max_entries=2)
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        assert await cache.get("a") == 1  # "b" is now the oldest
+        await cache.set("c", 3)
+        assert len(cache) == 2
+        assert await cache.get("b") is None
+        assert await cache.get("a") == 1
+        assert await cache.get("c") == 3
+        assert cache.stats()["misses"] == 1
+    asyncio.run(scenario())
+
+
+def test_local_miss_falls_through_to_shared_backend():
+    async def scenario():
+        backend = InMemoryCacheBackend()
+        await RecommendationCache(backend=backend).set("k", [1])
+        other_worker = RecommendationCache(backend=backend)
+        assert await other_worker.get("k") == [1]
+        assert await other_worker.get("k") == [1]
+        assert (other_worker.shared_hits, other_worker.hits) == (1, 1)
+    asyncio.run(scenario())
+
+
+def test_catalog_version_bump_invalidates_entries(monkeypatch):
+    cache = RecommendationCache(max_entries=16, backend=InMemoryCacheBackend())
+    monkeypatch.setattr(recommendation, "recommendation_cache", cache)
+    user = make_users(1, seed=5)[0]
+
+    async def scenario():
+        db = MemoryClient()["test"]
+        dal = ScholarshipDAL(user_collection=db["users"], scholarship_collection=db["scholarships"],
+                             meta_collection=db["meta"])
+        await db["scholarships"].insert_many(make_catalog(200))
+        invalidate_catalog_cache()
+
+        first = await compute_recommendations(user, dal)
+        assert await compute_recommendations(user, dal) is first
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        old_key = cache_key(user, await dal.catalog_version())
+        await dal.bump_catalog_version()
+        assert cache_key(user, await dal.catalog_version()) != old_key
+        await compute_recommendations(user, dal)
+        assert (cache.hits, cache.misses) == (1, 2)
+        invalidate_catalog_cache()
+
+    asyncio.run(scenario())
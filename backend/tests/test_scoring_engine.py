@@ -0,0 +1,37 @@
+# test_scoring_engine.py
+import pytest
+from src.recommendation import recommend_linear, TOP_K
+from src.scoring_engine import ScoringEngine
+from benchmarks.synthetic import make_catalog, make_users, without_stored_sentiment
+
+USERS = make_users(30, seed=2)
+
+
+def ranking(engine: ScoringEngine, catalog, user):
+    return [(catalog[pos]["_id"], score) for pos, score in engine.top_k(user, TOP_K)]
+
+
+def reference(catalog, user):
+    return [(s["_id"], score) for s, score in recommend_linear(user, catalog, TOP_K)]
+
+
+@pytest.mark.parametrize("size,seed", [(50, 0), (500, 1), (2000, 3)])
+def test_top_k_matches_reference(size, seed):
+    catalog = make_catalog(size, seed=seed)
+    engine = ScoringEngine(catalog)
+    for user in USERS:
+        assert ranking(engine, catalog, user) == reference(catalog, user)
+
+
+@pytest.mark.parametrize("size,seed", [(500, 0), (2000, 4)])
+def test_top_k_matches_reference_without_stored_sentiment(size, seed):
+    # Documents not backfilled yet take the engine's analyse-the-text fallback
+    catalog = without_stored_sentiment(make_catalog(size, seed=seed), seed=seed)
+    assert any("sentiment_score" not in s for s in catalog)
+    engine = ScoringEngine(catalog)
+    for user in USERS[:10]:
+        assert ranking(engine, catalog, user) == reference(catalog, user)
+
+
+def test_top_k_on_empty_catalog():
+    assert ScoringEngine([]).top_k(USERS[0], TOP_K) == []